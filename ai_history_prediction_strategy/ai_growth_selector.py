@@ -1,43 +1,66 @@
-import os
 import pandas as pd
 from datetime import datetime
 from ai_history_prediction_strategy.ai_price_predictor import predict_next_price
 from data_fetcher import load_close_series
+from indicator_store import feature_array, update_indicators
+from prediction_store import STORE_FILE, import_csv_log, save_run
 
 
-def analyze_growth(tickers, window=31, log_path="ai_predictions.csv"):
+def analyze_growth(tickers, window=31, store_path=STORE_FILE, indicators=None):
+    """
+    Prognozy bieżącego przebiegu (zapisywane w magazynie prognoz jako nowy przebieg).
+    indicators — opcjonalna lista wskaźników z indicator_store dołączanych do okna cen.
+    """
     results = []
+    if indicators:
+        update_indicators(tickers)  # tylko nowe słupki od ostatniego przebiegu
 
     for t in tickers:
         s = load_close_series(t)
         if len(s) < window + 2:
             continue
 
-        last = float(s.iloc[-1])
-        pred = predict_next_price(s, window)
-        if not pred:
-            continue
+        features = None
+        if indicators:
+            features = feature_array(t, s, indicators)
+            if features is None:
+                print(f"Brak aktualnych wskaźników dla {t} — prognoza tylko z cen.")
+
+        row = predict_row(t, s, window, features=features)
+        if row is not None:
+            results.append(row)
+
+    return save_predictions(results, store_path)
 
-        growth = (pred / last) - 1.0
-        results.append({
-            "Ticker": t,
-            "LastClose": last,
-            "PredictedNextClose": pred,
-            "PredictedGrowth": growth
-        })
 
+def predict_row(ticker, s, window, features=None):
+    """Prognoza jednej spółki jako wiersz wyników (None, gdy model nie dał prognozy)."""
+    last = float(s.iloc[-1])
+    pred = predict_next_price(s, window, features=features)
+    if not pred:
+        return None
+    return {
+        "Ticker": ticker,
+        "LastClose": last,
+        "PredictedNextClose": pred,
+        "PredictedGrowth": (pred / last) - 1.0,
+    }
+
+
+def save_predictions(results, store_path=STORE_FILE):
+    """Wiersze prognoz posortowane po wzroście i zapisane w magazynie jako nowy przebieg."""
     if not results:
         return pd.DataFrame()
 
     df = pd.DataFrame(results).sort_values("PredictedGrowth", ascending=False)
 
-    df.insert(0, "Timestamp", datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-    if os.path.exists(log_path):
-        old = pd.read_csv(log_path)
-        df = pd.concat([old, df], ignore_index=True)
-    df.to_csv(log_path, index=False)
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    df.insert(0, "Timestamp", timestamp)
+
+    import_csv_log(path=store_path)  # stary ai_predictions.csv trafia do magazynu raz
+    save_run("AI", df, timestamp=timestamp, path=store_path)
 
-    return df
+    return df.reset_index(drop=True)
 
 
 def select_top_n(df, n=10):
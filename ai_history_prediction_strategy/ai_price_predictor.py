@@ -29,18 +29,37 @@ def _prepare_features(series, window=30, horizon=1):
     return X, y
 
 
-def predict_next_price(close_series, window=5):
+def _add_indicators(X, y, features, window):
+    """
+    Dokleja do każdego okna wskaźniki z ostatniego dnia okna (features: wiersze wyrównane
+    z serią cen, np. z indicator_store.feature_array); okna z rozgrzewką wskaźników odpadają.
+    """
+    F = np.asarray(features, dtype=float)
+    F = F.reshape(len(F), -1)[window - 1:window - 1 + len(X)]
+    X = np.hstack([X, F])
+    ok = ~np.isnan(X).any(axis=1)
+    return X[ok], y[ok]
+
+
+def predict_next_price(close_series, window=5, features=None):
 
     if len(close_series) < window + 2:
         return None
 
     X, y = _prepare_features(close_series, window, )
+    last_window = np.asarray(close_series[-window:], dtype=float).reshape(1, -1)
+    if features is not None:
+        X, y = _add_indicators(X, y, features, window)
+        last_features = np.asarray(features, dtype=float).reshape(len(features), -1)[-1:]
+        if len(y) < 2 or np.isnan(last_features).any():
+            return None
+        last_window = np.hstack([last_window, last_features])
+
     scaler = StandardScaler()
     Xs = scaler.fit_transform(X)
 
     model = LinearRegression()
     model.fit(Xs, y)
 
-    last_window = np.asarray(close_series[-window:], dtype=float).reshape(1, -1)
     predicted = model.predict(scaler.transform(last_window))[0]
     return float(predicted)
@@ -1,13 +1,18 @@
 # ai_trend_strategy_remote.py
-import os, time, requests, yfinance as yf, pandas as pd
+import os, time, requests, numpy as np, pandas as pd
 from pathlib import Path
 from datetime import datetime
 
+from data_fetcher import load_close_matrix
+from market_data import get_history, to_price_csv
+
 HF_API_TOKEN = os.getenv("HF_API_TOKEN")
 MODEL_ID = "mrm8488/distilroberta-finetuned-financial-news-sentiment-analysis"
 API_URL = f"https://router.huggingface.co/hf-inference/models/{MODEL_ID}"
 DATA_DIR = Path("../data/prices")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
+HF_BATCH = 16
+MIN_HISTORY = 10
 
 def fetch_price_history(tickers, period="3mo", overwrite=False):
 
@@ -21,42 +26,54 @@ def fetch_price_history(tickers, period="3mo", overwrite=False):
     if not to_fetch:
         return
 
+    history = get_history(to_fetch, period=period, interval="1d")
     for i, t in enumerate(to_fetch, start=1):
-        try:
-            df = yf.download(t, period=period, interval="1d", auto_adjust=True, progress=False)
-            if not df.empty:
-                df.to_csv(DATA_DIR / f"{t}.csv")
-                print(f"  [{i}/{len(to_fetch)}] ✅ {t}")
-            time.sleep(0.3)
-        except Exception as e:
-            print(f"Błąd pobierania {t}: {e}")
+        if t not in history:
+            print(f"Błąd pobierania {t}: brak danych")
+            continue
+        to_price_csv(history[t], t, DATA_DIR / f"{t}.csv")
+        print(f"  [{i}/{len(to_fetch)}] ✅ {t}")
 
 
-def summarize_stock_trend(ticker):
-    path = DATA_DIR / f"{ticker}.csv"
-    if not path.exists():
-        return None
+def _trend_text(ticker, change_30, change_7):
+    return (
+        f"The stock {ticker} changed {change_30:.2%} in the last 30 days "
+        f"and {change_7:.2%} in the last 7 days."
+    )
 
-    df = pd.read_csv(path)
-    if "Close" not in df.columns:
-        return None
 
-    df["Close"] = pd.to_numeric(df["Close"], errors="coerce")
-    df.dropna(subset=["Close"], inplace=True)
-    if len(df) < 10:
-        return None
+def summarize_trends(tickers):
+    """Zmiany 7/30-dniowe dla wszystkich tickerów w jednym przebiegu po macierzy cen."""
+    columns = ["Ticker", "Change30", "Change7", "Text"]
+    closes = load_close_matrix(tickers, DATA_DIR)
+    if closes.empty:
+        return pd.DataFrame(columns=columns)
 
-    days_30 = min(30, len(df) - 1)
-    days_7 = min(7, len(df) - 1)
+    arr = closes.to_numpy(dtype=float)
+    valid = ~np.isnan(arr)
+    # wyrównanie do prawej: NaN-y na początek kolumny, kolejność notowań zachowana
+    order = np.argsort(valid, axis=0, kind="stable")
+    aligned = np.take_along_axis(arr, order, axis=0)
 
-    change_30 = (df["Close"].iloc[-1] / df["Close"].iloc[-days_30]) - 1
-    change_7 = (df["Close"].iloc[-1] / df["Close"].iloc[-days_7]) - 1
+    n_rows = arr.shape[0]
+    cols = np.arange(arr.shape[1])
+    counts = valid.sum(axis=0)
+    days_30 = np.clip(np.minimum(30, counts - 1), 1, None)
+    days_7 = np.clip(np.minimum(7, counts - 1), 1, None)
 
-    desc = (
-        f"The stock {ticker} changed {change_30:.2%} in the last 30 days "
-        f"and {change_7:.2%} in the last 7 days."
-    )
-    return desc
+    last = aligned[-1]
+    change_30 = last / aligned[n_rows - days_30, cols] - 1
+    change_7 = last / aligned[n_rows - days_7, cols] - 1
+
+    df = pd.DataFrame({"Ticker": closes.columns, "Change30": change_30, "Change7": change_7})
+    df = df[counts >= MIN_HISTORY].reset_index(drop=True)
+    df["Text"] = [_trend_text(t, c30, c7) for t, c30, c7 in zip(df["Ticker"], df["Change30"], df["Change7"])]
+    return df[columns]
+
+
+def summarize_stock_trend(ticker):
+    df = summarize_trends([ticker])
+    return df["Text"].iloc[0] if not df.empty else None
 
 
 def query_hf_model(text):
@@ -84,16 +101,53 @@ def query_hf_model(text):
         return None
 
 
+def classify_texts(texts, batch_size=HF_BATCH):
+    """Klasyfikuje opisy trendów w paczkach; zwraca listę odpowiedzi (None przy błędzie)."""
+    results = []
+    for i in range(0, len(texts), batch_size):
+        batch = texts[i:i + batch_size]
+        out = query_hf_model(batch)
+        if isinstance(out, list) and len(out) == len(batch):
+            results.extend(out)
+        else:
+            if out is not None:
+                print(f"Nieoczekiwany rozmiar odpowiedzi dla paczki {i // batch_size + 1}.")
+            results.extend([None] * len(batch))
+        time.sleep(0.25)
+    return results
+
+
+def _best_label(pred):
+    inner = pred[0] if (len(pred) > 0 and isinstance(pred[0], list)) else pred
+    valid_entries = [x for x in inner if isinstance(x, dict) and "label" in x]
+    if not valid_entries:
+        return None
+    entry = max(valid_entries, key=lambda x: x.get("score", 0.0))
+    return entry.get("label", "").lower(), float(entry.get("score", 0.0))
+
+
+def _append_log(df, log_path):
+    """Dopisuje wiersze do logu CSV bez wczytywania całego pliku."""
+    if os.path.exists(log_path) and os.path.getsize(log_path) > 0:
+        with open(log_path, encoding="utf-8") as f:
+            header = f.readline().strip().split(",")
+        if header == list(df.columns):
+            df.to_csv(log_path, mode="a", header=False, index=False)
+            return
+        # inny układ kolumn w starym logu — scalamy go jednorazowo
+        df = pd.concat([pd.read_csv(log_path), df], ignore_index=True)
+    df.to_csv(log_path, index=False)
+
+
 def select_top_ai_stocks(tickers, n=10, log_path="ai_predictions.csv"):
     results = []
     all_predictions = []
 
-    for t in tickers:
-        text = summarize_stock_trend(t)
-        if not text:
-            continue
+    trends = summarize_trends(tickers)
+    preds = classify_texts(trends["Text"].tolist())
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        pred = query_hf_model(text)
+    for t, pred in zip(trends["Ticker"], preds):
         if not pred:
             continue
 
@@ -101,13 +155,10 @@ def select_top_ai_stocks(tickers, n=10, log_path="ai_predictions.csv"):
 
         try:
             if isinstance(pred, list):
-                inner = pred[0] if (len(pred) > 0 and isinstance(pred[0], list)) else pred
-                valid_entries = [x for x in inner if isinstance(x, dict) and "label" in x]
-                if not valid_entries:
+                best = _best_label(pred)
+                if best is None:
                     continue
-                entry = max(valid_entries, key=lambda x: x.get("score", 0.0))
-                label = entry.get("label", "").lower()
-                score = float(entry.get("score", 0.0))
+                label, score = best
             else:
                 print(f"Nieoczekiwany format odpowiedzi dla {t}: {type(pred)}")
                 continue
@@ -116,7 +167,7 @@ def select_top_ai_stocks(tickers, n=10, log_path="ai_predictions.csv"):
             continue
 
         all_predictions.append({
-            "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "Timestamp": timestamp,
             "Ticker": t,
             "Label": label,
             "Confidence": score
@@ -125,14 +176,8 @@ def select_top_ai_stocks(tickers, n=10, log_path="ai_predictions.csv"):
         if "positive" in label:
             results.append({"Ticker": t, "Label": label, "Confidence": score})
 
-        time.sleep(0.4)
-
     if all_predictions:
-        log_df = pd.DataFrame(all_predictions)
-        if os.path.exists(log_path):
-            old = pd.read_csv(log_path)
-            log_df = pd.concat([old, log_df], ignore_index=True)
-        log_df.to_csv(log_path, index=False)
+        _append_log(pd.DataFrame(all_predictions), log_path)
         print(f"💾 Zapisano log predykcji: {log_path}")
 
     if not results:
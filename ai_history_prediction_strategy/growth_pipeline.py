@@ -0,0 +1,117 @@
+# growth_pipeline.py
+import heapq
+import queue
+import threading
+import time
+
+from ai_history_prediction_strategy.ai_growth_selector import predict_row, save_predictions
+from data_fetcher import DATA_DIR, _fresh_enough, load_close_series
+from indicator_store import update_indicators
+from market_data import get_history, to_price_csv
+from prediction_store import STORE_FILE
+
+# Potok producent/konsument: pobieranie cen w paczkach i dopasowanie modeli na bieżąco,
+# zamiast czekać na komplet danych przed pierwszą prognozą.
+CHUNK_SIZE = 10  # tickery w jednym zbiorczym pobraniu
+QUEUE_SIZE = 20  # ograniczona kolejka — pobieranie czeka, gdy modele nie nadążają
+FIT_WORKERS = 2
+_DONE = object()
+
+
+def _produce(tickers, work, period, max_age_hours, chunk_size, n_workers, stats):
+    """Aktualne pliki trafiają do kolejki od razu, pozostałe paczkami zaraz po pobraniu."""
+    try:
+        stale = []
+        for t in tickers:
+            if _fresh_enough(DATA_DIR / f"{t}.csv", max_age_hours):
+                work.put(t)
+            else:
+                stale.append(t)
+
+        if stale:
+            print(f"Pobieram dane dla {len(stale)} spółek paczkami po {chunk_size} (period={period})...")
+        fetched = []
+        for i in range(0, len(stale), chunk_size):
+            chunk = stale[i:i + chunk_size]
+            history = get_history(chunk, period=period, interval="1d")
+            for t in chunk:
+                if t not in history:
+                    print(f"⚠️ Błąd pobierania {t}: brak danych")
+                    continue
+                to_price_csv(history[t], t, DATA_DIR / f"{t}.csv")
+                fetched.append(t)
+                work.put(t)
+        stats["fetched"] = len(fetched)
+        if fetched:
+            update_indicators(fetched, price_dir=DATA_DIR)
+    except Exception as e:
+        print(f"⚠️ Błąd pobierania danych w potoku: {e}")
+    finally:
+        for _ in range(n_workers):
+            work.put(_DONE)
+
+
+def _consume(work, window, on_result, stats, lock):
+    while True:
+        t = work.get()
+        if t is _DONE:
+            return
+        try:
+            s = load_close_series(t)
+            row = predict_row(t, s, window) if len(s) >= window + 2 else None
+        except Exception as e:
+            print(f"⚠️ Błąd prognozy {t}: {e}")
+            row = None
+        if row is None:
+            continue
+        with lock:
+            if stats["first_result"] is None:
+                stats["first_result"] = time.perf_counter() - stats["start"]
+            on_result(row)
+
+
+def analyze_growth_streaming(tickers, window=31, period="6mo", top_n=None, max_age_hours=24,
+                             chunk_size=CHUNK_SIZE, queue_size=QUEUE_SIZE, workers=FIT_WORKERS,
+                             store_path=STORE_FILE):
+    """
+    To samo co analyze_growth, ale prognozy liczone są w trakcie pobierania danych.
+    top_n — bieżący ranking najlepszych spółek utrzymywany w kopcu w miarę napływu wyników.
+    """
+    work = queue.Queue(maxsize=queue_size)
+    lock = threading.Lock()
+    stats = {"start": time.perf_counter(), "first_result": None, "fetched": 0}
+    results, best = [], []
+
+    def on_result(row):
+        results.append(row)
+        if top_n:
+            item = (row["PredictedGrowth"], row["Ticker"])
+            if len(best) < top_n:
+                heapq.heappush(best, item)
+            elif item > best[0]:
+                heapq.heapreplace(best, item)
+
+    producer = threading.Thread(
+        target=_produce, name="growth-producer",
+        args=(tickers, work, period, max_age_hours, chunk_size, workers, stats),
+    )
+    consumers = [
+        threading.Thread(target=_consume, name=f"growth-fit-{i}", args=(work, window, on_result, stats, lock))
+        for i in range(workers)
+    ]
+    producer.start()
+    for c in consumers:
+        c.start()
+    producer.join()
+    for c in consumers:
+        c.join()
+
+    total = time.perf_counter() - stats["start"]
+    first = stats["first_result"]
+    print(f"Potok prognoz: {len(results)} spółek (pobrano {stats['fetched']}), "
+          f"pierwszy wynik po {first:.2f} s, całość {total:.2f} s."
+          if first is not None else f"Potok prognoz: brak wyników po {total:.2f} s.")
+    if top_n and best:
+        print("Najlepsze prognozy: " + ", ".join(f"{t} ({g:+.2%})" for g, t in sorted(best, reverse=True)))
+
+    return save_predictions(results, store_path)
@@ -0,0 +1,154 @@
+# window_sweep.py
+import os
+import time
+from functools import partial
+import numpy as np
+import pandas as pd
+
+from data_fetcher import DATA_DIR, load_close_matrix
+from shared_prices import map_tickers, publish_prices
+
+WINDOWS = range(5, 61)
+TEST_DAYS = 20  # ostatnie dni historii oceniane walk-forward
+TOP_N = 10
+RIDGE = 1e-9  # minimalna regularyzacja dla niemal osobliwych macierzy Grama (okna dłuższe niż historia)
+SWEEP_FILE = os.path.join("results", "window_sweep.csv")
+WORKERS = os.cpu_count()  # procesy przeglądu; macierz cen trafia do nich przez pamięć współdzieloną
+
+
+def _lagged(x, max_window):
+    """Wiersz r: [1, x[r-1], ..., x[r-W]] (opóźnienia sprzed początku serii = 0)."""
+    Z = np.zeros((len(x), max_window + 1))
+    Z[:, 0] = 1.0
+    for k in range(1, max_window + 1):
+        Z[k:, k] = x[:-k]
+    return Z
+
+
+def walk_forward_predictions(x, windows, test_days=TEST_DAYS):
+    """
+    Prognozy x[t] dla ostatnich test_days punktów i każdego okna — ta sama regresja co
+    predict_next_price (OLS na oknie cen), ale macierze Grama wszystkich okien są
+    podblokami wspólnych sum prefiksowych, więc nic nie jest liczone od nowa.
+    """
+    x = np.asarray(x, dtype=float)
+    n = len(x)
+    windows = list(windows)
+    # przekształcenie afiniczne nie zmienia prognoz OLS z wyrazem wolnym, poprawia uwarunkowanie
+    m, s = x.mean(), x.std() or 1.0
+    xs = (x - m) / s
+
+    Z = _lagged(xs, max(windows))
+    G = np.cumsum(Z[:, :, None] * Z[:, None, :], axis=0)  # G[i] = sum_{r<=i} z_r z_r'
+    c = np.cumsum(Z * xs[:, None], axis=0)                  # c[i] = sum_{r<=i} z_r x_r
+
+    t_eval = np.arange(max(n - test_days, 1), n)
+    preds = np.full((len(windows), len(t_eval)), np.nan)
+    for j, w in enumerate(windows):
+        ok = t_eval >= w + 2  # jak w predict_next_price: co najmniej window + 2 punkty historii
+        ts = t_eval[ok]
+        if len(ts) == 0:
+            continue
+        k = w + 1
+        # wiersze treningowe r = w .. t-1
+        A = G[ts - 1, :k, :k] - G[w - 1, :k, :k]
+        b = c[ts - 1, :k] - c[w - 1, :k]
+        d = np.arange(1, k)
+        A[:, d, d] += RIDGE * np.trace(A, axis1=1, axis2=2)[:, None]
+        beta = np.linalg.solve(A, b[..., None])[..., 0]
+        preds[j, ok] = np.einsum("ij,ij->i", Z[ts, :k], beta) * s + m
+    return t_eval, preds
+
+
+def _ticker_predictions(ticker, s, windows, test_days):
+    """Prognozy walk-forward jednej spółki we wszystkich oknach (None przy zbyt krótkiej historii)."""
+    s = s.dropna()
+    if len(s) < min(windows) + 3:
+        return None
+    x = s.to_numpy(dtype=float)
+    t_eval, preds = walk_forward_predictions(x, windows, test_days)
+    return pd.DataFrame({
+        "Window": np.repeat(windows, len(t_eval)),
+        "Date": np.tile(s.index[t_eval], len(windows)),
+        "Ticker": ticker,
+        "Pred": preds.ravel(),
+        "Prev": np.tile(x[t_eval - 1], len(windows)),
+        "Actual": np.tile(x[t_eval], len(windows)),
+    })
+
+
+def _shared_predictions(windows, test_days, prices, ticker):
+    """Wersja dla procesu roboczego: kolumna cen z pamięci współdzielonej, bez czytania CSV."""
+    return _ticker_predictions(ticker, pd.Series(prices.column(ticker), index=prices.dates), windows, test_days)
+
+
+def sweep_windows(tickers=None, windows=WINDOWS, test_days=TEST_DAYS, top_n=TOP_N, closes=None,
+                  workers=None) -> pd.DataFrame:
+    """
+    Błąd poza próbą i trafność wyboru TOP N dla każdego okna, po wszystkich tickerach.
+    workers > 1 — spółki liczone w puli procesów nad macierzą cen w pamięci współdzielonej.
+    """
+    windows = list(windows)
+    if closes is None and tickers is None:
+        tickers = sorted(p.stem for p in DATA_DIR.glob("*.csv"))
+
+    if closes is None and workers and workers > 1:
+        with publish_prices(tickers, fields=("Close",)) as prices:
+            results = map_tickers(partial(_shared_predictions, windows, test_days), prices, workers=workers)
+        parts = [results[t] for t in prices.tickers if results[t] is not None]
+    else:
+        if closes is None:
+            closes = load_close_matrix(tickers)
+        parts = [_ticker_predictions(t, closes[t], windows, test_days) for t in closes.columns]
+        parts = [p for p in parts if p is not None]
+
+    if not parts:
+        return pd.DataFrame()
+    df = pd.concat(parts, ignore_index=True).dropna(subset=["Pred"])
+    df["PredGrowth"] = df["Pred"] / df["Prev"] - 1
+    df["RealGrowth"] = df["Actual"] / df["Prev"] - 1
+    df["RelErr"] = df["Pred"] / df["Actual"] - 1
+
+    report = df.groupby("Window").agg(
+        Predictions=("RelErr", "size"),
+        MAPE=("RelErr", lambda e: e.abs().mean() * 100),
+        RMSE=("RelErr", lambda e: np.sqrt((e ** 2).mean()) * 100),
+    )
+    df["SameSign"] = np.sign(df["PredGrowth"]) == np.sign(df["RealGrowth"])
+    report["DirectionHit"] = df.groupby("Window")["SameSign"].mean() * 100
+
+    # wybór jak select_top_n: TOP N wg prognozowanego wzrostu w każdym dniu
+    rank = df.groupby(["Window", "Date"])["PredGrowth"].rank(ascending=False, method="first")
+    top = df[rank <= top_n]
+    report["TopNHitRate"] = top.groupby("Window")["RealGrowth"].apply(lambda r: (r > 0).mean() * 100)
+    report["TopNReturn"] = top.groupby("Window")["RealGrowth"].mean() * 100
+
+    report = report.rename(columns={
+        "MAPE": "MAPE(%)", "RMSE": "RMSE(%)", "DirectionHit": "DirectionHit(%)",
+        "TopNHitRate": "TopNHitRate(%)", "TopNReturn": "TopNReturn(%)",
+    })
+    return report.reset_index()
+
+
+def run_sweep(windows=WINDOWS, test_days=TEST_DAYS, top_n=TOP_N, save_path=SWEEP_FILE, workers=WORKERS):
+    start = time.time()
+    report = sweep_windows(windows=windows, test_days=test_days, top_n=top_n, workers=workers)
+    if report.empty:
+        print("Brak danych cenowych do przeglądu okien.")
+        return report
+
+    os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    report.to_csv(save_path, index=False)
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+    best_err = report.loc[report["MAPE(%)"].idxmin()]
+    best_hit = report.loc[report["TopNHitRate(%)"].idxmax()]
+    print(f"\nNajmniejszy błąd: okno {int(best_err['Window'])} (MAPE {best_err['MAPE(%)']:.3f}%)")
+    print(f"Najlepszy wybór TOP {top_n}: okno {int(best_hit['Window'])} "
+          f"(trafność {best_hit['TopNHitRate(%)']:.1f}%, śr. zwrot {best_hit['TopNReturn(%)']:+.3f}%)")
+    print(f"Przegląd zakończony w {time.time() - start:.2f} s. Zapisano {save_path}")
+    return report
+
+
+if __name__ == "__main__":
+    run_sweep()
@@ -1,15 +1,28 @@
 # ai_news_sentiment_strategy_optimized.py
 import os
 import time
-import html
 import random
 import requests
 import pandas as pd
+import xml.etree.ElementTree as ET
+from email.utils import parsedate_to_datetime
 from urllib.parse import quote_plus
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
+import http_cache
 from data_fetcher import load_close_series
+from prediction_store import save_run
+from ai_news_prediction_strategy.news_matcher import load_matcher
+from ai_news_prediction_strategy.news_planner import held_tickers, last_scored, plan_inference
+from ai_news_prediction_strategy.news_sentiment_state import (
+    HALF_LIFE_DAYS,
+    build_sentiment_state,
+    load_sentiment_state,
+    read_sentiment,
+    save_sentiment_state,
+    update_sentiment_state,
+)
 
 # --- KONFIGURACJA ---
 load_dotenv()
@@ -24,6 +37,19 @@ USER_AGENT = (
 RESULTS_DIR = "results"
 NEWS_LOG_FILE = os.path.join(RESULTS_DIR, "ai_news_predictions.csv")
 CACHE_FILE = os.path.join(RESULTS_DIR, "news_cache.csv")
+CACHE_COLUMNS = ["Ticker", "Title", "Sentiment", "Timestamp", "Published"]
+CHECKPOINT_FILE = os.path.join(RESULTS_DIR, "news_checkpoint.csv")
+CHECKPOINT_COLUMNS = ["Timestamp", "Ticker", "NewsCount", "MeanSentiment", "LastClose", "PredictedGrowth"]
+CHECKPOINT_EVERY = 10  # tickerów między zapisami postępu
+CHECKPOINT_MAX_AGE_HOURS = 24  # starszego punktu kontrolnego nie wznawiamy
+RSS_CHUNK_SIZE = 8192
+# tryb "market": kilka szerokich kanałów zamiast zapytania per ticker
+NEWS_MODE = os.getenv("NEWS_MODE", "ticker")
+MARKET_QUERIES = [
+    "stock market", "nasdaq stocks", "tech stocks", "semiconductor stocks", "software stocks",
+    "biotech stocks", "retail stocks", "energy stocks", "earnings report", "analyst upgrade downgrade",
+]
+MARKET_TOPIC_URL = "https://news.google.com/rss/headlines/section/topic/BUSINESS?hl=en-US&gl=US&ceid=US:en"
 
 HF_API_TOKEN = os.getenv("HF_API_TOKEN")
 
@@ -50,51 +76,147 @@ def _google_news_rss_url(query: str, days: int = 7, lang: str = "en-US", region:
 
 def _load_news_cache():
     if os.path.exists(CACHE_FILE):
-        return pd.read_csv(CACHE_FILE)
-    return pd.DataFrame(columns=["Ticker", "Title", "Sentiment", "Timestamp"])
+        return pd.read_csv(CACHE_FILE).reindex(columns=CACHE_COLUMNS)
+    return pd.DataFrame(columns=CACHE_COLUMNS)
 
 
 def _save_news_cache(df_cache):
     df_cache.to_csv(CACHE_FILE, index=False)
 
 
+def _load_checkpoint(tickers):
+    """Wiersze tickerów przetworzonych w przerwanym przebiegu (pusta lista, gdy brak/nieaktualny)."""
+    if not os.path.exists(CHECKPOINT_FILE):
+        return []
+    if time.time() - os.path.getmtime(CHECKPOINT_FILE) > CHECKPOINT_MAX_AGE_HOURS * 3600:
+        print("Punkt kontrolny jest nieaktualny — analiza od początku.")
+        return []
+    df = pd.read_csv(CHECKPOINT_FILE).reindex(columns=CHECKPOINT_COLUMNS)
+    return df[df["Ticker"].isin(tickers)].to_dict("records")
+
+
+def _save_checkpoint(rows, cache_df, state, half_life_days):
+    """Zapis postępu: wyniki tickerów, nowe wpisy cache newsów i stan sentymentu."""
+    tmp = CHECKPOINT_FILE + ".tmp"
+    pd.DataFrame(rows, columns=CHECKPOINT_COLUMNS).to_csv(tmp, index=False)
+    os.replace(tmp, CHECKPOINT_FILE)
+    _save_news_cache(cache_df)
+    save_sentiment_state(state, half_life_days)
+
+
+def _clear_checkpoint():
+    if os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+
+
+def _parse_pub_date(value):
+    """Zamienia pubDate z RSS na datetime w UTC (None, gdy brak/niepoprawna)."""
+    if not value:
+        return None
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _format_published(dt):
+    return dt.strftime("%Y-%m-%d %H:%M:%S") if dt is not None else None
+
+
+def _iter_rss_items(chunks):
+    """Przyrostowo parsuje elementy <item> z kolejnych kawałków odpowiedzi RSS."""
+    parser = ET.XMLPullParser(events=("end",))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            if elem.tag != "item":
+                continue
+            source = elem.find("source")
+            yield {
+                "title": (elem.findtext("title") or "").strip(),
+                "link": (elem.findtext("link") or "").strip(),
+                "source": (source.text or "").strip() if source is not None else "",
+                "published": _parse_pub_date(elem.findtext("pubDate")),
+            }
+            elem.clear()
+
+
+def _fetch_feed(url, cutoff, max_articles=None):
+    """Elementy kanału RSS nowsze niż cutoff, bez powtórzonych tytułów; odpowiedź przez cache HTTP."""
+    items = []
+    seen = set()
+    resp = None
+    try:
+        # cache HTTP: w ciągu TTL bez sieci, potem rewalidacja; przy pobraniu parsujemy w trakcie odczytu
+        resp = http_cache.get(url, headers={"User-Agent": USER_AGENT}, timeout=15, stream=True)
+        for item in _iter_rss_items(resp.iter_content(chunk_size=RSS_CHUNK_SIZE)):
+            if not item["title"]:
+                continue
+            if item["published"] is not None and item["published"] < cutoff:
+                continue
+            key = item["title"].lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            items.append(item)
+            # przerywamy parsowanie, gdy mamy komplet artykułów
+            if max_articles is not None and len(items) >= max_articles:
+                break
+    except (requests.RequestException, ET.ParseError):
+        return items
+    finally:
+        if resp is not None:
+            resp.close()  # po przerwanym parsowaniu reszta treści trafia do cache (bez parsowania)
+
+    return items
+
+
 def fetch_news_for_ticker(ticker: str, days: int = 7, max_articles: int = 12):
-    """Pobiera nagłówki newsów z Google News RSS."""
+    """Newsy z Google News RSS (title, link, source, published); odpowiedź przez cache HTTP."""
     q = f"{ticker} stock"
     url = _google_news_rss_url(q, days=days)
-    try:
-        resp = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=15)
-        resp.raise_for_status()
-    except requests.RequestException:
-        return []
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    return _fetch_feed(url, cutoff, max_articles)
+
+
+def _headline(item):
+    """Tytuł bez dopisku ' - Źródło' dodawanego przez Google News (nazwa serwisu to nie spółka)."""
+    title, source = item["title"], item["source"]
+    if source and title.endswith(f" - {source}"):
+        return title[:-len(source) - 3]
+    return title
+
+
+def fetch_market_news(tickers, days: int = 7, max_articles: int = 12, queries=None, matcher=None):
+    """
+    Newsy z kilku szerokich kanałów rynkowych przypisane do każdej wymienionej spółki
+    (automat Aho-Corasick po nazwach, aliasach i tickerach) — {ticker: najnowsze nagłówki}.
+    """
+    matcher = matcher or load_matcher()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    urls = [_google_news_rss_url(q, days=days) for q in (queries or MARKET_QUERIES)] + [MARKET_TOPIC_URL]
 
-    titles = []
-    text = resp.text
-    start = 0
-    while True:
-        i = text.find("<title>", start)
-        if i == -1:
-            break
-        j = text.find("</title>", i + 7)
-        if j == -1:
-            break
-        title = html.unescape(text[i + 7:j]).strip()
-        titles.append(title)
-        start = j + 8
-
-    if titles:
-        titles = titles[1:]  # pomiń tytuł feedu
-
-    uniq = []
+    news = {t: [] for t in tickers}
     seen = set()
-    for t in titles:
-        key = t.lower()
-        if key not in seen:
+    for url in urls:
+        for item in _fetch_feed(url, cutoff):
+            key = item["title"].lower()
+            if key in seen:
+                continue
             seen.add(key)
-            uniq.append(t)
-        if len(uniq) >= max_articles:
-            break
-    return uniq
+            for t in matcher.match(_headline(item)):
+                if t in news:
+                    news[t].append(item)
+
+    newest = datetime.max.replace(tzinfo=timezone.utc)
+    for t, items in news.items():
+        news[t] = sorted(items, key=lambda it: it["published"] or newest, reverse=True)[:max_articles]
+    print(f"📰 {len(urls)} kanałów rynkowych: {len(seen)} nagłówków, "
+          f"{sum(1 for v in news.values() if v)}/{len(tickers)} spółek z newsami.")
+    return news
 
 
 def _hf_inference_sentiment(texts, hf_token: str):
@@ -141,104 +263,144 @@ def _score_from_probs(probs_list):
     return p_pos - p_neg
 
 
-def analyze_news_sentiment(tickers, days: int = 7, max_articles: int = 12, save_log: bool = True, max_total_news: int = 1100):
-    """Analiza sentymentu newsów dla listy tickerów (z cacheowaniem)."""
-    _ensure_results_dir()
-    cache_df = _load_news_cache()
-
-    rows = []
-    total_articles = 0
-    print(f"🚀 Start analizy newsów ({len(tickers)} spółek, {days} dni)\n")
-
-    for idx, t in enumerate(tickers, start=1):
-        print(f"🔍 [{idx}/{len(tickers)}] {t} ...", end=" ")
-
-        titles = fetch_news_for_ticker(t, days=days, max_articles=max_articles)
-        if not titles:
-            print("brak newsów.")
-            last_series = load_close_series(t)
-            last = float(last_series.iloc[-1]) if len(last_series) else float("nan")
-            rows.append({
-                "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "Ticker": t,
-                "NewsCount": 0,
-                "MeanSentiment": 0.0,
-                "LastClose": last,
-                "PredictedGrowth": 0.0
-            })
-            continue
-
-        cached_titles = set(cache_df.loc[cache_df["Ticker"] == t, "Title"].str.lower().tolist())
-        new_titles = [x for x in titles if x.lower() not in cached_titles]
-
-        # jeśli wszystko w cache
-        if not new_titles:
-            cached_sent = cache_df.loc[cache_df["Ticker"] == t, "Sentiment"]
-            mean_sent = float(cached_sent.mean()) if not cached_sent.empty else 0.0
-            predicted_growth = max(0.05, mean_sent * 1.5)
-            last_series = load_close_series(t)
-            last = float(last_series.iloc[-1]) if len(last_series) else float("nan")
-            print(f"{len(titles)} newsów (cache) | sentyment={mean_sent:+.3f} | prognoza={predicted_growth:.3f}")
-            rows.append({
-                "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "Ticker": t,
-                "NewsCount": len(titles),
-                "MeanSentiment": mean_sent,
-                "LastClose": last,
-                "PredictedGrowth": predicted_growth
-            })
-            continue
-
-        # analiza nowych tytułów
-        preds = _hf_inference_sentiment(new_titles, HF_API_TOKEN)
-        per_article = []
-        for p in preds:
-            inner = p[0] if (isinstance(p, list) and len(p) > 0 and isinstance(p[0], list)) else p
-            if isinstance(inner, list):
-                score = _score_from_probs(inner)
-            elif isinstance(inner, dict):
-                score = _score_from_probs([inner])
-            else:
-                score = 0.0
-            per_article.append(score)
-
-        # zapis do cache
-        for title, score in zip(new_titles, per_article):
-            cache_df.loc[len(cache_df)] = {
-                "Ticker": t,
-                "Title": title,
-                "Sentiment": score,
-                "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-
-        mean_sent = float(pd.Series(per_article).mean()) if per_article else 0.0
+def _scores_from_predictions(preds):
+    scores = []
+    for p in preds:
+        inner = p[0] if (isinstance(p, list) and len(p) > 0 and isinstance(p[0], list)) else p
+        if isinstance(inner, list):
+            score = _score_from_probs(inner)
+        elif isinstance(inner, dict):
+            score = _score_from_probs([inner])
+        else:
+            score = 0.0
+        scores.append(score)
+    return scores
+
+
+def _news_row(ticker, news_count, state):
+    last_series = load_close_series(ticker)
+    last = float(last_series.iloc[-1]) if len(last_series) else float("nan")
+    if news_count == 0:
+        mean_sent, predicted_growth = 0.0, 0.0
+    else:
+        mean_sent = read_sentiment(state, ticker)
         predicted_growth = max(0.05, mean_sent * 1.5)
-        last_series = load_close_series(t)
-        last = float(last_series.iloc[-1]) if len(last_series) else float("nan")
+    return {
+        "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "Ticker": ticker,
+        "NewsCount": news_count,
+        "MeanSentiment": mean_sent,
+        "LastClose": last,
+        "PredictedGrowth": predicted_growth
+    }
 
-        print(f"{len(titles)} newsów ({len(new_titles)} nowych) | sentyment={mean_sent:+.3f} | prognoza={predicted_growth:.3f}")
 
-        rows.append({
-            "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "Ticker": t,
-            "NewsCount": len(titles),
-            "MeanSentiment": mean_sent,
-            "LastClose": last,
-            "PredictedGrowth": predicted_growth
-        })
+def analyze_news_sentiment(tickers, days: int = 7, max_articles: int = 12, save_log: bool = True, max_total_news: int = 1100,
+                           half_life_days: float = HALF_LIFE_DAYS, resume: bool = False, held=None,
+                           mode: str = None):
+    """
+    Analiza sentymentu newsów dla listy tickerów (z cacheowaniem i wygaszanym stanem sentymentu).
+    Najpierw pobierane są nagłówki wszystkich spółek (tanio, przez cache HTTP; mode="market" —
+    kilka kanałów rynkowych zamiast zapytania per ticker, domyślnie NEWS_MODE), potem budżet
+    max_total_news nagłówków do inferencji jest dzielony wg priorytetu (news_planner): liczba
+    nowych nagłówków, czas od ostatniej oceny i obecność w portfelu (held, domyślnie portfele NEWS).
+    Spółki poza budżetem dostają sentyment ze stanu, a ich nowe nagłówki czekają na kolejny przebieg.
+    Postęp jest zapisywany co CHECKPOINT_EVERY spółek; resume=True pomija spółki w pełni ocenione
+    w punkcie kontrolnym, a log i magazyn prognoz są wtedy zapisywane dopiero, gdy nic nie czeka.
+    Każdy nagłówek jest oceniany raz, także gdy dotyczy kilku spółek (wynik z cache jest używany ponownie).
+    """
+    _ensure_results_dir()
+    cache_df = _load_news_cache()
+    state = load_sentiment_state(half_life_days)
+    if state is None:
+        state = build_sentiment_state(cache_df, half_life_days)
+
+    rows = {r["Ticker"]: r for r in _load_checkpoint(tickers)} if resume else {}
+    if rows:
+        print(f"♻️ Wznawiam analizę: {len(rows)}/{len(tickers)} spółek z punktu kontrolnego.")
+    todo = [t for t in dict.fromkeys(tickers) if t not in rows]
+    print(f"🚀 Start analizy newsów ({len(tickers)} spółek, {days} dni)\n")
 
-        total_articles += len(new_titles)
-        if total_articles > max_total_news:
-            print("⚠️ Osiągnięto limit analizy newsów – przerywam, by oszczędzić tokeny.")
-            break
+    # 1) nagłówki wszystkich spółek — bez inferencji
+    news, new_items = {}, {}
+    cached_titles = cache_df.groupby("Ticker")["Title"].agg(lambda s: set(s.astype(str).str.lower())).to_dict()
+    # ocena nagłówka nie zależy od spółki — raz oceniony tytuł nie trafia ponownie do modelu
+    title_scores = dict(zip(cache_df["Title"].astype(str).str.lower(), cache_df["Sentiment"]))
+    if (mode or NEWS_MODE) == "market":
+        news = fetch_market_news(todo, days=days, max_articles=max_articles)
+    for idx, t in enumerate(todo, start=1):
+        if t not in news:
+            print(f"🔍 [{idx}/{len(todo)}] {t} ...", end=" ")
+            news[t] = fetch_news_for_ticker(t, days=days, max_articles=max_articles)
+            print(f"{len(news[t])} newsów")
+        known = cached_titles.get(t, set())
+        # najnowsze najpierw — przy częściowym przydziale oceniamy świeże nagłówki
+        new_items[t] = sorted(
+            (it for it in news[t] if it["title"].lower() not in known),
+            key=lambda it: it["published"] or datetime.max.replace(tzinfo=timezone.utc), reverse=True
+        )
+
+    # 2) przydział budżetu inferencji (tylko nagłówki jeszcze nieocenione)
+    plan = plan_inference(
+        {t: sum(it["title"].lower() not in title_scores for it in new_items[t]) for t in todo}, last_scored(cache_df),
+        held_tickers() if held is None else set(held), max_total_news
+    )
+    deferred = set(plan.loc[plan["Allocated"] < plan["NewCount"], "Ticker"])
+    if deferred:
+        print(f"\n⚠️ Budżet {max_total_news} nagłówków — {len(deferred)} spółek z nowymi newsami poczeka na kolejny przebieg.")
 
-        time.sleep(0.15 + random.random() * 0.1)
+    # 3) inferencja w kolejności priorytetu
+    total_articles = 0
+    for idx, p in enumerate(plan.itertuples(index=False), start=1):
+        t = p.Ticker
+        if idx % CHECKPOINT_EVERY == 0:
+            _save_checkpoint([r for k, r in rows.items() if k not in deferred], cache_df, state, half_life_days)
+
+        fresh = [it for it in new_items[t] if it["title"].lower() not in title_scores]
+        if len(fresh) <= p.Allocated:
+            deferred.discard(t)  # nagłówki ocenione już przy innej spółce
+        to_score = list(dict.fromkeys(it["title"] for it in fresh[:p.Allocated]))
+        if to_score:
+            scores = _scores_from_predictions(_hf_inference_sentiment(to_score, HF_API_TOKEN))
+            title_scores.update(zip((x.lower() for x in to_score), scores))
+            total_articles += len(to_score)
+
+        batch = [it for it in new_items[t] if it["title"].lower() in title_scores]
+        if batch:
+            now = datetime.now()
+            for item in batch:
+                score = title_scores[item["title"].lower()]
+                update_sentiment_state(state, t, score, item["published"] or now.astimezone(timezone.utc), half_life_days)
+                cache_df.loc[len(cache_df)] = {
+                    "Ticker": t,
+                    "Title": item["title"],
+                    "Sentiment": score,
+                    "Timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    "Published": _format_published(item["published"])
+                }
+
+        rows[t] = _news_row(t, len(news[t]), state)
+        if news[t]:
+            source = f"{len(to_score)} ocenionych, {len(batch) - len(to_score)} z cache" if batch else "cache"
+            print(f"{t}: {len(news[t])} newsów ({source}) | priorytet={p.Priority:.2f} | "
+                  f"sentyment={rows[t]['MeanSentiment']:+.3f} | prognoza={rows[t]['PredictedGrowth']:.3f}")
+        if to_score:
+            time.sleep(0.15 + random.random() * 0.1)
+
+    df = pd.DataFrame([rows[t] for t in dict.fromkeys(tickers) if t in rows], columns=CHECKPOINT_COLUMNS)
+    if resume and deferred:
+        _save_checkpoint([r for k, r in rows.items() if k not in deferred], cache_df, state, half_life_days)
+        print(f"⏸️ {len(deferred)} spółek czeka na ocenę nowych newsów — kolejne wywołanie z resume=True dokończy analizę.")
+        return df.sort_values(["PredictedGrowth", "NewsCount"], ascending=[False, False]).reset_index(drop=True)
 
     _save_news_cache(cache_df)
-    df = pd.DataFrame(rows)
+    save_sentiment_state(state, half_life_days)
+    _clear_checkpoint()
 
     if save_log:
         df.to_csv(NEWS_LOG_FILE, index=False)
+        if not df.empty:
+            save_run("NEWS", df)
         print(f"\n💾 Zapisano log analizy: {NEWS_LOG_FILE}")
 
     print(f"\n📊 Podsumowanie: {total_articles} nowych newsów przetworzonych, {len(cache_df)} w cache.\n")
@@ -252,3 +414,12 @@ def select_top_by_news(df_news: pd.DataFrame, n: int = 10):
     if df_news.empty:
         return pd.DataFrame(columns=["Ticker", "LastClose", "PredictedGrowth"])
     return df_news.head(n)[["Ticker", "LastClose", "PredictedGrowth"]].copy()
+
+
+if __name__ == "__main__":
+    # wywołanie z crona: kolejne uruchomienia dokańczają analizę przerwaną limitem newsów
+    from generator import get_nasdaq100_tickers
+    analyze_news_sentiment(
+        get_nasdaq100_tickers()["Ticker"].tolist(), days=7, max_articles=20,
+        max_total_news=int(os.getenv("NEWS_MAX_TOTAL", "1100")), resume=True
+    )
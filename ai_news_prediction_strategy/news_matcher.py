@@ -0,0 +1,153 @@
+# news_matcher.py
+import os
+import re
+from collections import deque
+import pandas as pd
+
+COMPANIES_FILE = "nasdaq100_companies.csv"
+
+# dopiski z API NASDAQ po nazwie spółki (wszystko od pierwszego dopasowania jest odcinane)
+_LISTING_SUFFIX = re.compile(
+    r"\s+(common stock|common shares|capital stock|class [a-z]\b|series [a-z]\b|ordinary shares|"
+    r"american depositary|new york registry|subordinate voting).*$",
+    re.IGNORECASE,
+)
+LEGAL_FORMS = {"inc", "incorporated", "corporation", "corp", "company", "co", "plc", "n v", "ltd", "de", "the"}
+
+# nazwy zwyczajowe; puste — nazwa z listy jest zbyt ogólna (dopasowanie tylko po tickerze lub aliasach)
+ALIASES = {
+    "AMZN": ["amazon", "aws"],
+    "GOOGL": ["google", "youtube"],
+    "GOOG": ["google", "youtube"],
+    "META": ["meta", "facebook", "instagram", "whatsapp"],
+    "NVDA": ["nvidia"],
+    "AMD": ["amd"],
+    "MSTR": ["microstrategy"],
+    "ASML": ["asml"],
+    "CRWD": ["crowdstrike"],
+    "PYPL": ["paypal"],
+    "PLTR": ["palantir"],
+    "MU": ["micron"],
+    "MRVL": ["marvell"],
+    "CTSH": ["cognizant"],
+    "COST": ["costco"],
+    "CSCO": ["cisco"],
+    "HON": ["honeywell"],
+    "MAR": ["marriott"],
+    "MDLZ": ["mondelez"],
+    "GILD": ["gilead"],
+    "REGN": ["regeneron"],
+    "TTWO": ["take two", "rockstar games"],
+    "TMUS": ["t mobile"],
+    "WBD": ["warner bros", "hbo"],
+    "KHC": ["kraft heinz"],
+    "KDP": ["keurig"],
+    "LULU": ["lululemon"],
+    "MELI": ["mercadolibre", "mercado libre"],
+    "PDD": ["temu", "pinduoduo"],
+    "BKNG": ["booking com"],
+    "ORLY": ["o reilly auto parts"],
+    "QCOM": ["qualcomm"],
+    "MNST": ["monster energy"],
+    "PEP": ["pepsi", "pepsico"],
+    "GEHC": ["ge healthcare"],
+    "TSLA": ["tesla"],
+}
+AMBIGUOUS_NAMES = {"strategy", "arm", "vertex", "intuit", "axon", "linde"}  # tylko z aliasem/tickerem
+# tickery będące zwykłymi słowami pisanymi wersalikami w nagłówkach
+TICKER_STOPWORDS = {"ON", "TEAM", "FAST", "NOW", "IT", "ALL", "A", "ARE", "CAN"}
+
+
+def normalize(text, lower=True):
+    """Litery i cyfry rozdzielone pojedynczą spacją, ze spacją na brzegach (granice słów)."""
+    text = text.lower() if lower else text
+    return " " + " ".join(re.findall(r"[^\W_]+", text)) + " "
+
+
+def company_name(raw):
+    """'Apple Inc. Common Stock' -> 'apple'; 'Costco Wholesale Corporation' -> 'costco wholesale'."""
+    words = normalize(_LISTING_SUFFIX.sub("", str(raw))).split()
+    while words:
+        if " ".join(words[-2:]) in LEGAL_FORMS:
+            del words[-2:]
+        elif words[-1] in LEGAL_FORMS:
+            words.pop()
+        else:
+            break
+    if words and words[0] == "the":
+        words.pop(0)
+    return " ".join(words)
+
+
+class AhoCorasick:
+    """Automat Aho-Corasick: wszystkie wystąpienia wszystkich wzorców w jednym przejściu po tekście."""
+
+    def __init__(self, patterns: dict):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for pattern, values in patterns.items():
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append((pattern, frozenset(values)))
+
+        # przejścia awaryjne wszerz (stany z głębokości 1 wracają do korzenia)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0) if state else 0
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def search(self, text):
+        """(wzorzec, wartości) dla każdego wystąpienia w tekście."""
+        state = 0
+        for ch in text:
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            yield from self.out[state]
+
+
+class NewsMatcher:
+    """Mapuje nagłówek na tickery: nazwy spółek i aliasy (bez wielkości liter) oraz symbole (wersalikami)."""
+
+    def __init__(self, companies: pd.DataFrame, aliases=ALIASES):
+        names, symbols = {}, {}
+        for ticker, raw in zip(companies["Ticker"], companies["Company"]):
+            name = company_name(raw)
+            keys = list(aliases.get(ticker, []))
+            if name and name not in AMBIGUOUS_NAMES:
+                keys.append(name)
+            for key in keys:
+                names.setdefault(normalize(key), set()).add(ticker)
+            if ticker not in TICKER_STOPWORDS:
+                symbols.setdefault(f" {ticker} ", set()).add(ticker)
+        self.names = AhoCorasick(names)
+        self.symbols = AhoCorasick(symbols)
+
+    def match(self, title) -> set:
+        tickers = set()
+        for _, values in self.names.search(normalize(title)):
+            tickers |= values
+        for _, values in self.symbols.search(normalize(title, lower=False)):
+            tickers |= values
+        return tickers
+
+
+def load_matcher(path=COMPANIES_FILE) -> NewsMatcher:
+    if not os.path.exists(path):
+        path = os.path.join("data", COMPANIES_FILE)
+    return NewsMatcher(pd.read_csv(path))
@@ -0,0 +1,69 @@
+# news_planner.py
+import math
+import os
+from datetime import datetime
+import pandas as pd
+
+PORTFOLIO_DIR = os.path.join("results", "portfolios")
+
+# wartość oceny spółki: nowe nagłówki (malejący przyrost), czas od ostatniej oceny, obecność w portfelu
+NEW_WEIGHT = 1.0
+STALENESS_WEIGHT = 0.5  # na dobę od ostatniej oceny
+STALENESS_CAP_DAYS = 7
+HELD_WEIGHT = 2.0
+MIN_PER_TICKER = 3  # pierwsza runda: po kilka nagłówków dla jak największej liczby spółek
+
+PLAN_COLUMNS = ["Ticker", "NewCount", "AgeDays", "Held", "Priority", "Allocated"]
+
+
+def held_tickers(strategy="NEWS", portfolio_dir=PORTFOLIO_DIR) -> set:
+    """Tickery w bieżących portfelach strategii (wszystkie taktyki)."""
+    held = set()
+    if not os.path.isdir(portfolio_dir):
+        return held
+    for fname in os.listdir(portfolio_dir):
+        if fname.startswith(f"{strategy}_") and fname.endswith(".csv"):
+            try:
+                held.update(pd.read_csv(os.path.join(portfolio_dir, fname))["Ticker"].dropna())
+            except Exception:
+                continue
+    return held
+
+
+def last_scored(cache_df: pd.DataFrame) -> dict:
+    """Czas ostatniej oceny nagłówka per ticker (z cache newsów)."""
+    if cache_df.empty:
+        return {}
+    ts = pd.to_datetime(cache_df["Timestamp"], errors="coerce")
+    return ts.groupby(cache_df["Ticker"]).max().dropna().to_dict()
+
+
+def plan_inference(new_counts: dict, scored_at: dict, held: set, budget: int, now=None) -> pd.DataFrame:
+    """
+    Przydział budżetu inferencji (liczba nagłówków) w kolejności wartości oczekiwanej.
+    Najpierw każda spółka z nowymi nagłówkami dostaje do MIN_PER_TICKER, potem reszta
+    budżetu dopełnia spółki w tej samej kolejności — wynik nie zależy od kolejności listy.
+    """
+    now = now or datetime.now()
+    rows = []
+    for t, n in new_counts.items():
+        last = scored_at.get(t)
+        age = STALENESS_CAP_DAYS if last is None else min((now - last).total_seconds() / 86400, STALENESS_CAP_DAYS)
+        is_held = t in held
+        priority = NEW_WEIGHT * math.log1p(n) + STALENESS_WEIGHT * max(age, 0.0) + HELD_WEIGHT * is_held
+        rows.append([t, n, age, is_held, priority if n > 0 else 0.0, 0])
+    plan = pd.DataFrame(rows, columns=PLAN_COLUMNS)
+    if plan.empty:
+        return plan
+    plan = plan.sort_values(["Priority", "Ticker"], ascending=[False, True]).reset_index(drop=True)
+
+    remaining = max(int(budget), 0)
+    for cap in (MIN_PER_TICKER, None):
+        for i, n in enumerate(plan["NewCount"]):
+            if remaining <= 0:
+                break
+            want = n if cap is None else min(n, cap)
+            take = min(max(want - plan.at[i, "Allocated"], 0), remaining)
+            plan.at[i, "Allocated"] += take
+            remaining -= take
+    return plan
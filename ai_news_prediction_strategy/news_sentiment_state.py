@@ -0,0 +1,89 @@
+# news_sentiment_state.py
+import os
+import pandas as pd
+from datetime import datetime, timezone
+
+RESULTS_DIR = "results"
+STATE_FILE = os.path.join(RESULTS_DIR, "news_sentiment_state.csv")
+STATE_COLUMNS = ["Ticker", "DecayedSum", "DecayedWeight", "LastUpdate", "HalfLifeDays"]
+HALF_LIFE_DAYS = 3.0
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _to_epoch(value):
+    """Timestamp (datetime / tekst w UTC) → sekundy epoki."""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return datetime.strptime(str(value), TS_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+
+
+def _from_epoch(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime(TS_FORMAT)
+
+
+def load_sentiment_state(half_life_days: float = HALF_LIFE_DAYS, path: str = STATE_FILE):
+    """Wczytuje stan sentymentu {ticker: (suma, waga, ts)}; None gdy brak lub inny half-life."""
+    if not os.path.exists(path):
+        return None
+    df = pd.read_csv(path)
+    if df.empty:
+        return {}
+    if not (df["HalfLifeDays"] == half_life_days).all():
+        return None
+    return {
+        row.Ticker: (float(row.DecayedSum), float(row.DecayedWeight), _to_epoch(row.LastUpdate))
+        for row in df.itertuples(index=False)
+    }
+
+
+def save_sentiment_state(state, half_life_days: float = HALF_LIFE_DAYS, path: str = STATE_FILE):
+    rows = [
+        {
+            "Ticker": t,
+            "DecayedSum": s,
+            "DecayedWeight": w,
+            "LastUpdate": _from_epoch(ts),
+            "HalfLifeDays": half_life_days,
+        }
+        for t, (s, w, ts) in sorted(state.items())
+    ]
+    pd.DataFrame(rows, columns=STATE_COLUMNS).to_csv(path, index=False)
+
+
+def update_sentiment_state(state, ticker, score, when, half_life_days: float = HALF_LIFE_DAYS):
+    """Dokłada jeden nagłówek do stanu tickera w O(1) (wykładnicze wygaszanie)."""
+    ts = _to_epoch(when)
+    s, w, last = state.get(ticker, (0.0, 0.0, ts))
+    age_days = (ts - last) / 86400.0
+
+    if age_days >= 0:
+        decay = 0.5 ** (age_days / half_life_days)
+        state[ticker] = (s * decay + score, w * decay + 1.0, ts)
+    else:
+        # nagłówek starszy niż stan — dokładamy go z odpowiednio mniejszą wagą
+        k = 0.5 ** (-age_days / half_life_days)
+        state[ticker] = (s + k * score, w + k, last)
+
+
+def read_sentiment(state, ticker, default: float = 0.0):
+    """Średni sentyment ważony świeżością nagłówków."""
+    s, w, _ = state.get(ticker, (0.0, 0.0, 0.0))
+    return s / w if w > 0 else default
+
+
+def build_sentiment_state(cache_df: pd.DataFrame, half_life_days: float = HALF_LIFE_DAYS):
+    """Odtwarza stan z cache nagłówków (jednorazowo, gdy brak pliku stanu)."""
+    state = {}
+    if cache_df.empty:
+        return state
+
+    df = cache_df.dropna(subset=["Ticker", "Sentiment"]).copy()
+    when = df["Published"] if "Published" in df.columns else pd.Series(index=df.index, dtype=object)
+    df["When"] = when.fillna(df["Timestamp"])
+    df = df.dropna(subset=["When"]).sort_values("When")
+
+    for row in df.itertuples(index=False):
+        update_sentiment_state(state, row.Ticker, float(row.Sentiment), row.When, half_life_days)
+    return state
@@ -3,6 +3,8 @@ import pandas as pd
 import plotly.express as px
 import os
 
+from portfolio_ledger import export_portfolio, list_ledgers
+
 st.set_page_config(page_title="📊 AI Portfolio Dashboard", layout="wide")
 st.title("AI Stock Strategy Dashboard")
 
@@ -10,6 +12,8 @@ RESULTS_DIR = "results"
 PORTFOLIO_DIR = os.path.join(RESULTS_DIR, "portfolios")
 DATA_DIR = "data"
 HISTORY_FILE = os.path.join(RESULTS_DIR, "portfolio_history.csv")
+RISK_FILE = os.path.join(RESULTS_DIR, "portfolio_risk.csv")
+ACCURACY_FILE = os.path.join(RESULTS_DIR, "prediction_accuracy.csv")
 COMPANIES_FILE = os.path.join(DATA_DIR, "nasdaq100_companies.csv")
 
 if os.path.exists(COMPANIES_FILE):
@@ -42,8 +46,15 @@ selected_label = st.sidebar.selectbox("Wybierz portfel:", list(portfolio_labels.
 selected_file = portfolio_labels[selected_label]
 path = os.path.join(PORTFOLIO_DIR, selected_file)
 
+as_of = None
+if selected_file in list_ledgers() and st.sidebar.checkbox("Stan historyczny (z księgi)"):
+    as_of = st.sidebar.date_input("Stan na dzień:")
+
 if os.path.exists(path):
-    df = pd.read_csv(path)
+    if as_of is not None:
+        df = export_portfolio(selected_file, f"{as_of} 23:59:59")
+    else:
+        df = pd.read_csv(path)
     df = df.merge(companies, on="Ticker", how="left")
 
     df["Label"] = df.apply(
@@ -133,3 +144,55 @@ if os.path.exists(HISTORY_FILE):
         )
 else:
     st.info("Brak historii. Uruchom `portfolio_evaluator.py`, by zebrać dane.")
+
+st.markdown("---")
+st.subheader("Ryzyko portfeli")
+
+if os.path.exists(RISK_FILE):
+    risk = pd.read_csv(RISK_FILE)
+    st.dataframe(
+        risk.set_index("Portfolio").reindex(columns=[
+            "Strategy", "Tactic", "Days", "Volatility(%)", "Sharpe", "Sortino",
+            "Beta", "Drawdown(%)", "MaxDrawdown(%)", "Volatility63(%)", "Sharpe63"
+        ])
+        .sort_values("Sharpe", ascending=False)
+        .style.format({
+            "Volatility(%)": "{:.2f}%",
+            "Sharpe": "{:.2f}",
+            "Volatility63(%)": "{:.2f}%",
+            "Sharpe63": "{:.2f}",
+            "Sortino": "{:.2f}",
+            "Beta": "{:.2f}",
+            "Drawdown(%)": "{:+.2f}%",
+            "MaxDrawdown(%)": "{:+.2f}%"
+        }, na_rep="—")
+    )
+else:
+    st.info("Brak metryk ryzyka. Uruchom `portfolio_risk.py` lub `update_portfolio_history.py`.")
+
+st.markdown("---")
+st.subheader("Trafność prognoz")
+
+if os.path.exists(ACCURACY_FILE):
+    acc = pd.read_csv(ACCURACY_FILE)
+    fig_acc = px.line(
+        acc,
+        x="Date",
+        y="RollingHitRate(%)",
+        color="Strategy",
+        title="Kroczący odsetek trafionych kierunków (%)"
+    )
+    st.plotly_chart(fig_acc, use_container_width=True)
+
+    st.dataframe(
+        acc.groupby("Strategy").tail(1).set_index("Strategy")[[
+            "Date", "RollingHitRate(%)", "RollingMAE(%)", "RollingRankIC"
+        ]]
+        .style.format({
+            "RollingHitRate(%)": "{:.1f}%",
+            "RollingMAE(%)": "{:.2f}%",
+            "RollingRankIC": "{:+.3f}"
+        }, na_rep="—")
+    )
+else:
+    st.info("Brak rozliczonych prognoz. Uruchom `prediction_accuracy.py` lub `update_portfolio_history.py`.")
@@ -1,11 +1,19 @@
 # data_fetcher.py
 import time
+from datetime import datetime, timedelta
 from pathlib import Path
 import pandas as pd
-import yfinance as yf
+
+from indicator_store import update_indicators
+from market_data import BAR_COLUMNS, get_history, to_price_csv
+from trading_calendar import MARKET_TZ, previous_trading_day, session_bounds, to_market_time
 
 DATA_DIR = Path("data/prices")
 DATA_DIR.mkdir(parents=True, exist_ok=True)
+# słupki śróddzienne: data/intraday/<interwał>/<ticker>/<RRRR-MM-DD>.csv.gz (czas giełdy)
+INTRADAY_DIR = Path("data/intraday")
+# interwał -> najdłuższy okres, jaki yfinance zwraca dla tego interwału
+INTRADAY_INTERVALS = {"1m": "5d", "5m": "1mo", "1h": "6mo"}
 
 def _fresh_enough(path: Path, max_age_hours: int) -> bool:
     if not path.exists():
@@ -26,23 +34,147 @@ def fetch_price_history(tickers, period="6mo", overwrite=False, max_age_hours=24
         return
 
     print(f"Pobieram dane dla {len(to_fetch)} spółek (period={period})...")
+    history = get_history(to_fetch, period=period, interval="1d")
     for i, t in enumerate(to_fetch, start=1):
-        try:
-            df = yf.download(t, period=period, interval="1d", auto_adjust=True, progress=False)
-            if not df.empty:
-                df.to_csv(DATA_DIR / f"{t}.csv")
-                print(f"  [{i}/{len(to_fetch)}] ✅ {t}")
-        except Exception as e:
-            print(f"⚠️ Błąd pobierania {t}: {e}")
-        time.sleep(0.2)
+        if t not in history:
+            print(f"⚠️ Błąd pobierania {t}: brak danych")
+            continue
+        to_price_csv(history[t], t, DATA_DIR / f"{t}.csv")
+        print(f"  [{i}/{len(to_fetch)}] ✅ {t}")
     print("Pobieranie danych zakończone.")
+    # wskaźniki techniczne: tylko słupki dopisane w tym pobraniu
+    update_indicators([t for t in to_fetch if t in history], price_dir=DATA_DIR)
 
 
-DATA_DIR = Path("data/prices")
+def _partition_path(ticker, interval, day) -> Path:
+    return INTRADAY_DIR / interval / ticker / f"{day:%Y-%m-%d}.csv.gz"
+
+
+def _read_partition(path: Path, columns=None) -> pd.DataFrame:
+    usecols = None if columns is None else ["Datetime", *columns]
+    df = pd.read_csv(path, index_col="Datetime", usecols=usecols, compression="gzip")
+    df.index = pd.to_datetime(df.index, format="ISO8601")
+    return df
+
+
+def save_intraday(ticker, bars: pd.DataFrame, interval) -> int:
+    """Zapisuje słupki w partycjach dziennych (scalając z już zapisanymi); zwraca liczbę dni."""
+    bars = bars.reindex(columns=BAR_COLUMNS).dropna(subset=["Close"])
+    if bars.empty:
+        return 0
+    idx = pd.DatetimeIndex(bars.index)
+    bars.index = idx.tz_convert(MARKET_TZ).tz_localize(None) if idx.tz is not None else idx
+    days = 0
+    for day, part in bars.groupby(bars.index.normalize()):
+        path = _partition_path(ticker, interval, day)
+        if path.exists():
+            # dzień pobrany ponownie w trakcie sesji — dokładamy nowsze słupki
+            old = _read_partition(path)
+            part = pd.concat([old[~old.index.isin(part.index)], part]).sort_index()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        part.rename_axis("Datetime").to_csv(path, compression="gzip")
+        days += 1
+    return days
+
+
+def fetch_intraday_history(tickers, interval="5m", period=None):
+    """Pobiera słupki śróddzienne (1m/5m/1h) i zapisuje je w skompresowanych partycjach dziennych."""
+    if interval not in INTRADAY_INTERVALS:
+        raise ValueError(f"Nieobsługiwany interwał śróddzienny: {interval}")
+    period = period or INTRADAY_INTERVALS[interval]
+    print(f"Pobieram słupki {interval} dla {len(tickers)} spółek (period={period})...")
+    history = get_history(tickers, period=period, interval=interval)
+    for i, t in enumerate(tickers, start=1):
+        if t not in history:
+            print(f"⚠️ Błąd pobierania {t} ({interval}): brak danych")
+            continue
+        days = save_intraday(t, history[t], interval)
+        print(f"  [{i}/{len(tickers)}] ✅ {t} ({days} dni)")
+
+
+def intraday_days(ticker, interval="5m") -> list:
+    """Dni z zapisanymi słupkami (z nazw partycji, bez czytania plików)."""
+    folder = INTRADAY_DIR / interval / ticker
+    if not folder.exists():
+        return []
+    return sorted(pd.Timestamp(p.name[:10]) for p in folder.glob("*.csv.gz"))
+
+
+def iter_intraday(ticker, start=None, end=None, interval="5m", columns=None):
+    """
+    Kolejne dni (dzień, słupki) z przedziału [start, end] — w pamięci jest naraz jedna
+    partycja, więc przegląd miesięcy słupków minutowych wielu tickerów ma stały koszt pamięci.
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+    for day in intraday_days(ticker, interval):
+        if (start is not None and day < start.normalize()) or (end is not None and day > end):
+            continue
+        df = _read_partition(_partition_path(ticker, interval, day), columns)
+        if start is not None and start > day:
+            df = df[df.index >= start]
+        if end is not None and end < day + pd.Timedelta(days=1):
+            df = df[df.index <= end]
+        if not df.empty:
+            yield day, df
+
+
+def load_intraday(ticker, start=None, end=None, interval="5m", columns=None) -> pd.DataFrame:
+    """Słupki śróddzienne z przedziału (czytane są tylko partycje z tego zakresu)."""
+    parts = [df for _, df in iter_intraday(ticker, start, end, interval, columns)]
+    if not parts:
+        return pd.DataFrame(columns=columns or BAR_COLUMNS, dtype=float)
+    return pd.concat(parts)
+
+
+def daily_from_intraday(ticker, interval="5m", start=None, end=None) -> pd.DataFrame:
+    """Dzienne OHLCV złożone ze słupków śróddziennych (dzień w toku = stan na ostatni słupek)."""
+    rows = {}
+    for day, df in iter_intraday(ticker, start, end, interval):
+        rows[day] = {
+            "Close": df["Close"].iloc[-1], "High": df["High"].max(), "Low": df["Low"].min(),
+            "Open": df["Open"].iloc[0], "Volume": df["Volume"].sum(),
+        }
+    return pd.DataFrame.from_dict(rows, orient="index", columns=BAR_COLUMNS).rename_axis("Date")
+
+
+def last_completed_session(ts=None):
+    """Dzień ostatniej zakończonej sesji (dzisiejsza liczy się dopiero po zamknięciu)."""
+    now = to_market_time(ts)
+    bounds = session_bounds(now.date())
+    return now.date() if bounds is not None and now >= bounds[1] else previous_trading_day(now.date())
+
 
-def load_close_series(ticker):
+def _intraday_closes_after(ticker, last_date=None, ts=None) -> pd.Series:
+    """Zamknięcia dzienne ze słupków śróddziennych dla zakończonych sesji nowszych niż plik dzienny."""
+    start = last_date + pd.Timedelta(days=1) if last_date is not None else None
+    end = datetime.combine(last_completed_session(ts), datetime.min.time()) + timedelta(days=1, microseconds=-1)
+    for interval in INTRADAY_INTERVALS:
+        daily = daily_from_intraday(ticker, interval, start=start, end=end)
+        if not daily.empty:
+            return daily["Close"]
+    return pd.Series(dtype=float)
+
+
+def _with_intraday(ticker, s, dates):
+    """Dokleja do serii dziennej zakończone sesje dostępne tylko w słupkach śróddziennych."""
+    last = pd.to_datetime(dates, errors="coerce", format="ISO8601").max()
+    extra = _intraday_closes_after(ticker, None if pd.isna(last) else last)
+    if extra.empty:
+        return s
+    return pd.concat([s, extra], ignore_index=True)
+
+
+def load_close_series(ticker, intraday=False):
+    """
+    Zamknięcia dzienne z pliku cen. intraday=True — uzupełnione o zakończone sesje
+    złożone ze słupków śróddziennych (dzień w toku nigdy nie jest doklejany).
+    """
     path = DATA_DIR / f"{ticker}.csv"
     if not path.exists():
+        s = _intraday_closes_after(ticker) if intraday else pd.Series(dtype=float)
+        if len(s) > 0:
+            return s.reset_index(drop=True)
         print(f"Brak danych dla {ticker}")
         return pd.Series(dtype=float)
 
@@ -51,7 +183,7 @@ def load_close_series(ticker):
         if "Close" in df.columns:
             s = pd.to_numeric(df["Close"], errors="coerce").dropna()
             if len(s) > 0:
-                return s
+                return _with_intraday(ticker, s, df.iloc[s.index, 0]) if intraday else s
     except Exception:
         pass
 
@@ -61,9 +193,68 @@ def load_close_series(ticker):
             df = df.rename(columns={"Price": "Date"})
             s = pd.to_numeric(df["Close"], errors="coerce").dropna()
             if len(s) > 0:
-                return s
+                return _with_intraday(ticker, s, df.iloc[s.index, 0]) if intraday else s
     except Exception as e:
         print(f"Nie udało się odczytać {ticker}: {e}")
 
     print(f"Nie udało się znaleźć danych Close dla {ticker}")
-    return pd.Series(dtype=float)
\ No newline at end of file
+    return pd.Series(dtype=float)
+
+
+def _read_dated_column(path: Path, column: str) -> pd.Series:
+    """Czyta kolumnę z pliku cen jako serię indeksowaną datą (obsługuje nagłówek yfinance)."""
+    df = pd.read_csv(path, index_col=0)
+    if column not in df.columns:
+        return pd.Series(dtype=float)
+    s = pd.to_numeric(df[column], errors="coerce")
+    s.index = pd.to_datetime(df.index, errors="coerce", format="ISO8601")
+    return s[s.index.notna()].dropna()
+
+
+def load_close_matrix(tickers, data_dir=None) -> pd.DataFrame:
+    """Macierz cen zamknięcia (data × ticker) dla wszystkich dostępnych tickerów."""
+    data_dir = Path(data_dir) if data_dir is not None else DATA_DIR
+    cols = {}
+    for t in tickers:
+        path = data_dir / f"{t}.csv"
+        if not path.exists():
+            continue
+        try:
+            s = _read_dated_column(path, "Close")
+        except Exception as e:
+            print(f"Nie udało się odczytać {t}: {e}")
+            continue
+        if len(s) > 0:
+            cols[t] = s[~s.index.duplicated(keep="last")]
+
+    if not cols:
+        return pd.DataFrame(dtype=float)
+    return pd.DataFrame(cols).sort_index().rename_axis("Date")
+
+
+def load_price_matrices(tickers, columns=("Close", "Volume"), data_dir=None) -> dict:
+    """Macierze (data × ticker) kilku kolumn naraz — każdy plik cen jest czytany raz."""
+    data_dir = Path(data_dir) if data_dir is not None else DATA_DIR
+    frames = {}
+    for t in tickers:
+        path = data_dir / f"{t}.csv"
+        if not path.exists():
+            continue
+        try:
+            df = pd.read_csv(path, index_col=0)
+        except Exception as e:
+            print(f"Nie udało się odczytać {t}: {e}")
+            continue
+        df.index = pd.to_datetime(df.index, errors="coerce", format="ISO8601")
+        df = df[df.index.notna()].reindex(columns=list(columns)).apply(pd.to_numeric, errors="coerce")
+        df = df.dropna(subset=[columns[0]])
+        if len(df) > 0:
+            frames[t] = df[~df.index.duplicated(keep="last")]
+
+    if not frames:
+        return {c: pd.DataFrame(dtype=float) for c in columns}
+    dates = pd.DatetimeIndex(sorted(set().union(*(df.index for df in frames.values()))), name="Date")
+    return {
+        c: pd.DataFrame({t: df[c] for t, df in frames.items()}).reindex(dates).rename_axis("Date")
+        for c in columns
+    }
@@ -1,12 +1,16 @@
 import os
+import time
 import requests
 import pandas as pd
 
+import http_cache
+
 CACHE_FILE = "nasdaq100_companies.csv"
+CACHE_TTL_HOURS = 24  # skład indeksu sprawdzany raz na dobę (warunkowy GET)
 
 
-def get_nasdaq100_tickers(cache_path: str = CACHE_FILE) -> pd.DataFrame:
-    if os.path.exists(cache_path):
+def get_nasdaq100_tickers(cache_path: str = CACHE_FILE, max_age_hours: float = CACHE_TTL_HOURS) -> pd.DataFrame:
+    if os.path.exists(cache_path) and time.time() - os.path.getmtime(cache_path) < max_age_hours * 3600:
         try:
             df = pd.read_csv(cache_path)
             if "Ticker" in df.columns and len(df) >= 80:
@@ -29,10 +33,11 @@ def get_nasdaq100_tickers(cache_path: str = CACHE_FILE) -> pd.DataFrame:
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+        response = http_cache.get(url, headers=headers, timeout=15, ttl=max_age_hours * 3600)
         payload = response.json()
-    except requests.exceptions.RequestException as e:
+        if response.from_cache:
+            print("💾 Lista NASDAQ bez zmian (cache HTTP).")
+    except (requests.exceptions.RequestException, ValueError) as e:
         print(f"Błąd połączenia z API NASDAQ: {e}")
         if os.path.exists(cache_path):
             print("💾 Używam starszego cache.")
@@ -0,0 +1,247 @@
+# http_cache.py
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import formatdate
+from urllib.parse import urlparse
+import pandas as pd
+import requests
+
+import monitoring
+
+RESULTS_DIR = "results"
+CACHE_DIR = os.path.join(RESULTS_DIR, "http_cache")
+INDEX_FILE = os.path.join(CACHE_DIR, "index.csv")
+INDEX_COLUMNS = ["Key", "URL", "ETag", "LastModified", "FetchedAt", "LastAccess", "Size", "Status"]
+MAX_CACHE_BYTES = 50 * 1024 * 1024
+
+# TTL (s) wg fragmentu adresu; w tym czasie odpowiedź jest zwracana bez zapytania do sieci
+TTL_RULES = [
+    ("news.google.com/rss", 3600),
+    ("api.nasdaq.com", 24 * 3600),
+]
+DEFAULT_TTL = 600
+
+_index = None
+_lock = threading.Lock()
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status_code: int
+    content: bytes
+    from_cache: bool  # True — bez pobierania treści (świeży wpis lub 304)
+    stale: bool = False  # True — sieć niedostępna, zwrócono przeterminowany wpis
+
+    def iter_content(self, chunk_size=8192):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def json(self):
+        return json.loads(self.content)
+
+    def close(self):
+        pass
+
+
+class StreamedResponse:
+    """
+    Odpowiedź pobierana z sieci strumieniowo (get(..., stream=True)): czytelnik może przerwać
+    parsowanie w dowolnym momencie, a close() doczytuje resztę treści i zapisuje ją w cache.
+    """
+    from_cache = False
+    stale = False
+
+    def __init__(self, url, resp, key, now, max_bytes):
+        self.url = url
+        self.status_code = resp.status_code
+        self.content = None  # dostępne po close() (lub pełnym odczycie)
+        self._resp = resp
+        self._key = key
+        self._now = now
+        self._max_bytes = max_bytes
+        self._chunks = None
+        self._parts = []
+        self._failed = False
+        self._closed = False
+
+    def _stream(self, chunk_size):
+        if self._chunks is None:
+            self._chunks = self._resp.iter_content(chunk_size=chunk_size)
+        return self._chunks
+
+    def iter_content(self, chunk_size=8192):
+        try:
+            for chunk in self._stream(chunk_size):
+                self._parts.append(chunk)
+                yield chunk
+        except Exception:
+            self._failed = True  # urwana treść nie trafia do cache
+            raise
+        self.close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if not self._failed:
+                self._parts.extend(self._stream(8192))  # reszta treści po przerwanym parsowaniu
+                self.content = b"".join(self._parts)
+                with _lock:
+                    _load_index()
+                    _store(self._key, self.url, self.status_code, self._resp.headers, self.content, self._now)
+                    _evict(self._max_bytes)
+                    _save_index()
+        except requests.RequestException:
+            monitoring.inc("data_source_errors_total", source=urlparse(self.url).netloc)
+        finally:
+            self._resp.close()
+
+
+def ttl_for(url):
+    for fragment, ttl in TTL_RULES:
+        if fragment in url:
+            return ttl
+    return DEFAULT_TTL
+
+
+def _key(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def _body_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.body")
+
+
+def _load_index():
+    global _index
+    if _index is None:
+        _index = {}
+        if os.path.exists(INDEX_FILE):
+            df = pd.read_csv(INDEX_FILE, dtype={"ETag": str, "LastModified": str}).reindex(columns=INDEX_COLUMNS)
+            for row in df.to_dict("records"):
+                if os.path.exists(_body_path(row["Key"])):
+                    _index[row["Key"]] = {k: (None if pd.isna(v) else v) for k, v in row.items()}
+    return _index
+
+
+def _save_index():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = INDEX_FILE + ".tmp"
+    pd.DataFrame(list(_index.values()), columns=INDEX_COLUMNS).to_csv(tmp, index=False)
+    os.replace(tmp, INDEX_FILE)
+
+
+def _evict(max_bytes):
+    """Usuwa najdawniej używane wpisy, aż cache zmieści się w limicie."""
+    total = sum(int(e["Size"]) for e in _index.values())
+    for key, entry in sorted(_index.items(), key=lambda kv: kv[1]["LastAccess"]):
+        if total <= max_bytes:
+            break
+        total -= int(entry["Size"])
+        try:
+            os.remove(_body_path(key))
+        except OSError:
+            pass
+        del _index[key]
+
+
+def _read_body(key):
+    with open(_body_path(key), "rb") as f:
+        return f.read()
+
+
+def _store(key, url, status, headers, content, now):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(_body_path(key), "wb") as f:
+        f.write(content)
+    _index[key] = {
+        "Key": key,
+        "URL": url,
+        "ETag": headers.get("ETag"),
+        # bez Last-Modified walidujemy datą pobrania
+        "LastModified": headers.get("Last-Modified") or formatdate(now, usegmt=True),
+        "FetchedAt": now,
+        "LastAccess": now,
+        "Size": len(content),
+        "Status": status,
+    }
+
+
+def get(url, headers=None, timeout=15, ttl=None, max_bytes=MAX_CACHE_BYTES, stream=False):
+    """
+    GET z cache na dysku: świeży wpis bez sieci, potem rewalidacja ETag/If-Modified-Since.
+    stream=True — przy pobraniu treści zwraca StreamedResponse (odczyt porcjami, można przerwać).
+    """
+    ttl = ttl_for(url) if ttl is None else ttl
+    key = _key(url)
+    now = time.time()
+
+    with _lock:
+        entry = _load_index().get(key)
+        if entry is not None and now - float(entry["FetchedAt"]) < ttl:
+            entry["LastAccess"] = now
+            _save_index()
+            monitoring.inc("cache_requests_total", cache="http", result="hit")
+            return CachedResponse(url, int(entry["Status"]), _read_body(key), from_cache=True)
+
+    headers = dict(headers or {})
+    if entry is not None:
+        if entry.get("ETag"):
+            headers["If-None-Match"] = entry["ETag"]
+        if entry.get("LastModified"):
+            headers["If-Modified-Since"] = entry["LastModified"]
+
+    try:
+        resp = requests.get(url, headers=headers, timeout=timeout, stream=stream)
+        if resp.status_code == 304 and key not in _load_index():
+            # wpis usunięty w międzyczasie — pobieramy pełną odpowiedź
+            resp = requests.get(url, headers={k: v for k, v in headers.items() if not k.startswith("If-")},
+                                timeout=timeout, stream=stream)
+        if resp.status_code != 304:
+            resp.raise_for_status()
+    except requests.RequestException:
+        monitoring.inc("data_source_errors_total", source=urlparse(url).netloc)
+        if entry is None:
+            monitoring.inc("cache_requests_total", cache="http", result="error")
+            raise
+        # stale-if-error: lepsza stara odpowiedź niż żadna
+        monitoring.inc("cache_requests_total", cache="http", result="stale")
+        return CachedResponse(url, int(entry["Status"]), _read_body(key), from_cache=True, stale=True)
+
+    with _lock:
+        _load_index()
+        if resp.status_code == 304:
+            entry = _index[key]
+            entry["FetchedAt"] = entry["LastAccess"] = now
+            if resp.headers.get("ETag"):
+                entry["ETag"] = resp.headers["ETag"]
+            _save_index()
+            monitoring.inc("cache_requests_total", cache="http", result="revalidated")
+            return CachedResponse(url, int(entry["Status"]), _read_body(key), from_cache=True)
+
+        monitoring.inc("cache_requests_total", cache="http", result="miss")
+        if stream:
+            return StreamedResponse(url, resp, key, now, max_bytes)
+        _store(key, url, resp.status_code, resp.headers, resp.content, now)
+        _evict(max_bytes)
+        _save_index()
+        return CachedResponse(url, resp.status_code, resp.content, from_cache=False)
+
+
+def clear():
+    """Usuwa cały cache odpowiedzi."""
+    global _index
+    with _lock:
+        for key in list(_load_index()):
+            try:
+                os.remove(_body_path(key))
+            except OSError:
+                pass
+        _index = {}
+        _save_index()
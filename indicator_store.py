@@ -0,0 +1,231 @@
+# indicator_store.py
+import json
+import math
+import os
+from collections import deque
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+# Wskaźniki techniczne liczone przyrostowo: stan kroczący per ticker jest zapisany na dysku,
+# więc nowa sesja to jeden krok O(1), a nie przeliczenie całej historii z CSV.
+PRICE_DIR = Path("data/prices")
+INDICATOR_DIR = Path("data/indicators")
+STATE_FILE = INDICATOR_DIR / "state.json"
+
+SMA_WINDOW = 20
+EMA_SPANS = (12, 26)
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+VOL_WINDOW = 20
+INDICATORS = ["SMA20", "EMA12", "EMA26", "RSI14", "ATR14", "Vol20"]
+CLOSE_TOLERANCE = 1e-6  # względna różnica ceny, powyżej której historia jest przeliczana od nowa
+
+
+def _new_state():
+    return {
+        "LastDate": None, "Close": None, "Bars": 0, "PriceMtime": None,
+        "Closes": deque(), "CloseSum": 0.0,
+        "Ema": {str(s): None for s in EMA_SPANS},
+        "Gain": 0.0, "Loss": 0.0,  # sumy w rozgrzewce, potem średnie Wildera
+        "Atr": 0.0,
+        "Returns": deque(), "RetSum": 0.0, "RetSq": 0.0,
+    }
+
+
+def _step(st, high, low, close):
+    """Jeden nowy słupek: aktualizuje stan i zwraca wartości wskaźników (NaN w rozgrzewce)."""
+    prev = st["Close"]
+    st["Bars"] += 1
+    n = st["Bars"]
+
+    # SMA — suma krocząca z buforem ostatnich cen
+    closes = st["Closes"]
+    closes.append(close)
+    st["CloseSum"] += close
+    if len(closes) > SMA_WINDOW:
+        st["CloseSum"] -= closes.popleft()
+    sma = st["CloseSum"] / SMA_WINDOW if len(closes) == SMA_WINDOW else math.nan
+
+    # EMA (jak pandas ewm(adjust=False): start od pierwszej ceny)
+    emas = []
+    for span in EMA_SPANS:
+        key = str(span)
+        alpha = 2 / (span + 1)
+        st["Ema"][key] = close if st["Ema"][key] is None else alpha * close + (1 - alpha) * st["Ema"][key]
+        emas.append(st["Ema"][key] if n >= span else math.nan)
+
+    # ATR Wildera: średnia TR z pierwszych ATR_PERIOD słupków, potem wygładzanie
+    tr = high - low if prev is None else max(high - low, abs(high - prev), abs(low - prev))
+    if n <= ATR_PERIOD:
+        st["Atr"] += tr / ATR_PERIOD
+        atr = st["Atr"] if n == ATR_PERIOD else math.nan
+    else:
+        st["Atr"] = (st["Atr"] * (ATR_PERIOD - 1) + tr) / ATR_PERIOD
+        atr = st["Atr"]
+
+    rsi = vol = math.nan
+    if prev is not None:
+        change = close - prev
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        # RSI Wildera: RSI_PERIOD zmian w rozgrzewce (zmian jest o jedną mniej niż słupków)
+        if n - 1 <= RSI_PERIOD:
+            st["Gain"] += gain / RSI_PERIOD
+            st["Loss"] += loss / RSI_PERIOD
+        else:
+            st["Gain"] = (st["Gain"] * (RSI_PERIOD - 1) + gain) / RSI_PERIOD
+            st["Loss"] = (st["Loss"] * (RSI_PERIOD - 1) + loss) / RSI_PERIOD
+        if n - 1 >= RSI_PERIOD:
+            rsi = 100.0 if st["Loss"] == 0 else 100 - 100 / (1 + st["Gain"] / st["Loss"])
+
+        # zmienność — odchylenie dziennych log-zwrotów w oknie VOL_WINDOW
+        r = math.log(close / prev) if prev > 0 and close > 0 else 0.0
+        rets = st["Returns"]
+        rets.append(r)
+        st["RetSum"] += r
+        st["RetSq"] += r * r
+        if len(rets) > VOL_WINDOW:
+            old = rets.popleft()
+            st["RetSum"] -= old
+            st["RetSq"] -= old * old
+        if len(rets) == VOL_WINDOW:
+            var = (st["RetSq"] - st["RetSum"] ** 2 / VOL_WINDOW) / (VOL_WINDOW - 1)
+            vol = math.sqrt(max(var, 0.0))
+
+    st["Close"] = close
+    return [sma, *emas, rsi, atr, vol]
+
+
+def load_state(path: Path = STATE_FILE) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    for st in raw.values():
+        st["Closes"] = deque(st["Closes"])
+        st["Returns"] = deque(st["Returns"])
+    return raw
+
+
+def save_state(state: dict, path: Path = STATE_FILE):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    raw = {t: {**st, "Closes": list(st["Closes"]), "Returns": list(st["Returns"])} for t, st in state.items()}
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(raw, f)
+    os.replace(tmp, path)
+
+
+def _read_bars(path: Path) -> pd.DataFrame:
+    """High/Low/Close z pliku cen (nagłówek yfinance) indeksowane datą."""
+    df = pd.read_csv(path, index_col=0)
+    df.index = pd.to_datetime(df.index, errors="coerce", format="ISO8601")
+    bars = df.reindex(columns=["High", "Low", "Close"]).apply(pd.to_numeric, errors="coerce")
+    bars = bars[bars.index.notna()].dropna(subset=["Close"])
+    bars = bars[~bars.index.duplicated(keep="last")].sort_index()
+    # brak High/Low (np. starsze pliki) — przyjmujemy cenę zamknięcia
+    bars["High"] = bars["High"].fillna(bars["Close"])
+    bars["Low"] = bars["Low"].fillna(bars["Close"])
+    return bars
+
+
+def _indicator_path(ticker, indicator_dir=INDICATOR_DIR):
+    return Path(indicator_dir) / f"{ticker}.csv"
+
+
+def update_ticker(ticker, state: dict, price_dir=PRICE_DIR, indicator_dir=INDICATOR_DIR) -> int:
+    """Dolicza wskaźniki dla słupków nowszych niż zapisany stan; zwraca liczbę nowych wierszy."""
+    path = Path(price_dir) / f"{ticker}.csv"
+    if not path.exists():
+        return 0
+    out_path = _indicator_path(ticker, indicator_dir)
+    st = state.get(ticker)
+    mtime = path.stat().st_mtime
+    if st is not None and st.get("PriceMtime") == mtime and out_path.exists():
+        return 0  # plik cen bez zmian od ostatniej aktualizacji
+    bars = _read_bars(path)
+
+    if st is not None and st["LastDate"] is not None:
+        last = pd.Timestamp(st["LastDate"])
+        known = bars["Close"].get(last)
+        # zmieniona historia (np. korekta o dywidendę) albo luka — przeliczamy od nowa
+        if known is None or abs(known / st["Close"] - 1) > CLOSE_TOLERANCE:
+            st = None
+        else:
+            bars = bars[bars.index > last]
+    if st is None or not out_path.exists():
+        st = _new_state()
+        if out_path.exists():
+            out_path.unlink()
+    st["PriceMtime"] = mtime
+    state[ticker] = st
+    if bars.empty:
+        return 0
+
+    rows = [_step(st, h, l, c) for h, l, c in bars[["High", "Low", "Close"]].itertuples(index=False)]
+    st["LastDate"] = bars.index[-1].strftime("%Y-%m-%d %H:%M:%S")
+
+    new = pd.DataFrame(rows, columns=INDICATORS, index=bars.index.rename("Date"))
+    new.insert(0, "Close", bars["Close"])
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    new.to_csv(out_path, mode="a", header=not out_path.exists())
+    return len(new)
+
+
+def update_indicators(tickers=None, price_dir=PRICE_DIR, indicator_dir=INDICATOR_DIR) -> int:
+    """Aktualizuje magazyn wskaźników dla tickerów (domyślnie wszystkich z katalogu cen)."""
+    price_dir, indicator_dir = Path(price_dir), Path(indicator_dir)
+    if tickers is None:
+        tickers = sorted(p.stem for p in price_dir.glob("*.csv"))
+    state_path = indicator_dir / STATE_FILE.name
+    state = load_state(state_path)
+    added = 0
+    for t in tickers:
+        try:
+            added += update_ticker(t, state, price_dir, indicator_dir)
+        except Exception as e:
+            print(f"Nie udało się zaktualizować wskaźników {t}: {e}")
+    save_state(state, state_path)
+    return added
+
+
+def load_indicators(ticker, columns=None, indicator_dir=INDICATOR_DIR) -> pd.DataFrame:
+    """Wskaźniki jednego tickera indeksowane datą (kolumna Close do wyrównania z cenami)."""
+    path = _indicator_path(ticker, indicator_dir)
+    if not path.exists():
+        return pd.DataFrame(columns=["Close"] + (columns or INDICATORS), dtype=float)
+    df = pd.read_csv(path, index_col=0)
+    df.index = pd.to_datetime(df.index, format="ISO8601")
+    return df[["Close"] + list(columns or INDICATORS)]
+
+
+def indicator_matrix(tickers, name, indicator_dir=INDICATOR_DIR) -> pd.DataFrame:
+    """Jeden wskaźnik dla wielu tickerów (data × ticker), wyrównany jak load_close_matrix."""
+    cols = {}
+    for t in tickers:
+        df = load_indicators(t, [name], indicator_dir)
+        if not df.empty:
+            cols[t] = df[name]
+    if not cols:
+        return pd.DataFrame(dtype=float)
+    return pd.DataFrame(cols).sort_index().rename_axis("Date")
+
+
+def feature_array(ticker, close_series, columns=INDICATORS, indicator_dir=INDICATOR_DIR):
+    """
+    Wskaźniki jako macierz wierszami wyrównana z close_series (np. z load_close_series);
+    None, gdy magazyn nie obejmuje całej serii albo nie jest zaktualizowany do ostatniej ceny.
+    """
+    df = load_indicators(ticker, list(columns), indicator_dir)
+    closes = np.asarray(close_series, dtype=float)
+    if len(df) < len(closes) or len(closes) == 0:
+        return None
+    tail = df.iloc[-len(closes):]
+    if not np.allclose(tail["Close"].to_numpy(dtype=float), closes, rtol=CLOSE_TOLERANCE):
+        return None
+    return tail[list(columns)].to_numpy(dtype=float)
+
+
+if __name__ == "__main__":
+    n = update_indicators()
+    print(f"Dopisano {n} wierszy wskaźników ({INDICATOR_DIR}).")
@@ -1,17 +1,30 @@
+import io
+import multiprocessing
 import os
+import sys
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import redirect_stdout
 
 from generator import get_nasdaq100_tickers
 from data_fetcher import fetch_price_history
 
 from ai_history_prediction_strategy.ai_growth_selector import analyze_growth, select_top_n
+from ai_history_prediction_strategy.growth_pipeline import analyze_growth_streaming
 from ai_news_prediction_strategy.ai_news_sentiment_strategy import analyze_news_sentiment, select_top_by_news
 from portfolio_generator import generate_portfolio
+from portfolio_ledger import record_holdings
 from random_strategy.random_wallet import generate_random_portfolio
+from scheduler_state import mark_rebalanced
 
 TOTAL_INVESTMENT = 10_000
 ALLOW_FRACTIONAL = True
 TOP_N = 10
+WEIGHTING = "growth"  # growth / risk_parity / min_variance / mean_variance
+CONCURRENT = True  # AI w osobnym procesie (CPU), NEWS i RANDOM w wątkach (sieć)
+STREAMING = True  # AI liczy prognozy w potoku (brakujące ceny dopobiera paczkami)
+TACTICS = ["STATIC", "REGULAR", "TRIGGER"]
 RESULTS_DIR = "results"
 PORTFOLIO_DIR = os.path.join(RESULTS_DIR, "portfolios")
 
@@ -21,12 +34,15 @@ def ensure_results_dir():
 
 
 def build_ai_portfolio(tickers):
-    df_predictions = analyze_growth(tickers, window=20)
+    if STREAMING:
+        df_predictions = analyze_growth_streaming(tickers, window=20, top_n=TOP_N)
+    else:
+        df_predictions = analyze_growth(tickers, window=20)
     if df_predictions.empty:
         raise RuntimeError("Brak wyników analizy trendów.")
     top_tickers = select_top_n(df_predictions, n=TOP_N)
     top_df = df_predictions[df_predictions["Ticker"].isin(top_tickers)]
-    portfolio, dust = generate_portfolio(top_df, TOTAL_INVESTMENT, ALLOW_FRACTIONAL)
+    portfolio, dust = generate_portfolio(top_df, TOTAL_INVESTMENT, ALLOW_FRACTIONAL, weighting=WEIGHTING)
     return portfolio, dust
 
 
@@ -45,48 +61,129 @@ def build_news_portfolio(tickers):
     top_news_df = select_top_by_news(df_news, n=TOP_N)
     if top_news_df.empty:
         raise RuntimeError("Brak kandydatów do portfela news.")
-    portfolio, dust = generate_portfolio(top_news_df, TOTAL_INVESTMENT, ALLOW_FRACTIONAL)
+    portfolio, dust = generate_portfolio(top_news_df, TOTAL_INVESTMENT, ALLOW_FRACTIONAL, weighting=WEIGHTING)
     return portfolio, dust
 
 
+STRATEGIES = {
+    "AI": build_ai_portfolio,
+    "NEWS": build_news_portfolio,
+    "RANDOM": build_random_portfolio,
+}
+CPU_BOUND = {"AI"}
+
+
+class _ThreadOutput(io.TextIOBase):
+    """stdout rozdzielany na bufory wątków (wątki bez bufora piszą bezpośrednio)."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buf = getattr(self.local, "buffer", None)
+        return (buf or self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def build_strategy(strat_name, tickers):
+    """Portfele strategii dla wszystkich taktyk; błąd jednej taktyki nie przerywa pozostałych."""
+    build_fn = STRATEGIES[strat_name]
+    results = []
+    for tactic in TACTICS:
+        print("\n" + "=" * 80)
+        print(f"Generuję portfel: Strategia={strat_name}, Taktyka={tactic}")
+        print("=" * 80)
+        try:
+            portfolio, dust = build_fn(tickers)
+            results.append((tactic, portfolio, dust))
+        except Exception as e:
+            print(f"Błąd generowania portfela {strat_name}_{tactic}: {e}")
+    return results
+
+
+def _build_in_process(strat_name, tickers):
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        results = build_strategy(strat_name, tickers)
+    return results, buf.getvalue()
+
+
+def _build_in_thread(out, strat_name, tickers):
+    buf = io.StringIO()
+    out.local.buffer = buf
+    try:
+        results = build_strategy(strat_name, tickers)
+    finally:
+        out.local.buffer = None
+    return results, buf.getvalue()
+
+
+def save_results(strat_name, results):
+    for tactic, portfolio, dust in results:
+        # Zapis portfela do results/portfolios
+        csv_name = f"{strat_name}_{tactic}.csv"
+        path = os.path.join(PORTFOLIO_DIR, csv_name)
+        portfolio.to_csv(path, index=False)
+        record_holdings(csv_name, portfolio)
+        mark_rebalanced(csv_name)
+
+        total_value = portfolio["CurrentValue($)"].sum()
+        print(f"Zapisano {path} | Wartość: ${total_value:,.2f}, Dust: ${dust:,.2f}")
+
+
+def run_sequential(tickers):
+    for strat_name in STRATEGIES:
+        save_results(strat_name, build_strategy(strat_name, tickers))
+
+
+def run_concurrent(tickers):
+    """Strategie równolegle; wyjście i zapis w stałej kolejności AI, NEWS, RANDOM."""
+    out = _ThreadOutput(sys.stdout)
+    futures = {}
+    # proces startujemy przed wątkami (spawn — bez dziedziczenia stanu wątków)
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as procs, \
+            ThreadPoolExecutor(max_workers=len(STRATEGIES)) as threads:
+        for strat_name in STRATEGIES:
+            if strat_name in CPU_BOUND:
+                futures[strat_name] = procs.submit(_build_in_process, strat_name, tickers)
+        sys.stdout = out
+        try:
+            for strat_name in STRATEGIES:
+                if strat_name not in CPU_BOUND:
+                    futures[strat_name] = threads.submit(_build_in_thread, out, strat_name, tickers)
+
+            for strat_name in STRATEGIES:
+                try:
+                    results, log = futures[strat_name].result()
+                except Exception as e:
+                    print(f"\nBłąd strategii {strat_name}: {e}")
+                    continue
+                print(log, end="")
+                save_results(strat_name, results)
+        finally:
+            sys.stdout = out.stream
+
+
 def main():
 
     ensure_results_dir()
 
     companies = get_nasdaq100_tickers()
     tickers = companies["Ticker"].tolist()
+    # ceny odświeżane przed startem strategii — NEWS zapisuje LastClose z plików cen
+    # (punkt odniesienia trafności), a potok AI pomija pliki już aktualne
     fetch_price_history(tickers, period="6mo")
 
-    strategies = {
-        "AI": build_ai_portfolio,
-        "NEWS": build_news_portfolio,
-        "RANDOM": build_random_portfolio,
-    }
-
-    tactics = ["STATIC", "REGULAR", "TRIGGER"]
-
-    for strat_name, build_fn in strategies.items():
-        for tactic in tactics:
-            print("\n" + "=" * 80)
-            print(f"Generuję portfel: Strategia={strat_name}, Taktyka={tactic}")
-            print("=" * 80)
-
-            try:
-                portfolio, dust = build_fn(tickers)
-            except Exception as e:
-                print(f"Błąd generowania portfela {strat_name}_{tactic}: {e}")
-                continue
-
-            # Zapis portfela do results/portfolios
-            csv_name = f"{strat_name}_{tactic}.csv"
-            path = os.path.join(PORTFOLIO_DIR, csv_name)
-            portfolio.to_csv(path, index=False)
-
-            total_value = portfolio["CurrentValue($)"].sum()
-            print(f"Zapisano {path}")
-            print(f"Wartość: ${total_value:,.2f}, Dust: ${dust:,.2f}")
+    start = time.time()
+    if CONCURRENT:
+        run_concurrent(tickers)
+    else:
+        run_sequential(tickers)
 
-    print("\nWszystkie 9 portfeli zostały wygenerowane i zapisane.")
+    print(f"\nPortfele wygenerowane i zapisane w {time.time() - start:.1f} s.")
     print(f"Lokalizacja: {PORTFOLIO_DIR}/")
 
 
@@ -0,0 +1,256 @@
+# market_data.py
+import os
+import random
+import threading
+import time
+from pathlib import Path
+import pandas as pd
+import yfinance as yf
+
+import monitoring
+
+# live — tylko sieć, record — sieć + zapis sesji na dysk, replay — wyłącznie zapisana sesja
+MODE = os.getenv("MARKET_DATA_MODE", "live").lower()
+SESSION = os.getenv("MARKET_DATA_SESSION", "default")
+SESSIONS_DIR = Path("results/market_sessions")
+
+BAR_COLUMNS = ["Close", "High", "Low", "Open", "Volume"]
+PERIODS = ["1d", "5d", "1mo", "3mo", "6mo", "ytd", "1y", "2y", "5y", "10y", "max"]
+CACHE_TTL_SECONDS = 300
+RETRIES = 3
+
+# pamięć podręczna słupków: (ticker, interwał) -> DataFrame indeksowany datą (jeden wiersz na datę)
+_bars = {}
+# zasięg pobrania: (ticker, interwał) -> (najdłuższy pobrany okres, czas pobrania)
+_coverage = {}
+# żądania czekające na pobranie: interwał -> {ticker: okres}
+_pending = {}
+_lock = threading.Lock()
+_fetch_lock = threading.Lock()
+_stats = {"requests": 0, "downloads": 0, "hits": 0}
+
+
+def set_mode(mode, session=None):
+    """Przełącza tryb (live/record/replay) i sesję; czyści pamięć podręczną."""
+    global MODE, SESSION
+    if mode not in ("live", "record", "replay"):
+        raise ValueError(f"Nieznany tryb danych rynkowych: {mode}")
+    MODE = mode
+    if session is not None:
+        SESSION = session
+    clear_cache()
+
+
+def clear_cache():
+    with _lock:
+        _bars.clear()
+        _coverage.clear()
+        _pending.clear()
+        for k in _stats:
+            _stats[k] = 0
+
+
+def stats():
+    """Liczniki: żądania, faktyczne pobrania (batch) i trafienia w cache."""
+    return dict(_stats)
+
+
+def _rank(period):
+    return PERIODS.index(period) if period in PERIODS else len(PERIODS) - 1
+
+
+def _session_path(ticker, interval):
+    return SESSIONS_DIR / SESSION / interval / f"{ticker}.csv"
+
+
+def _covered(ticker, interval, period):
+    cov = _coverage.get((ticker, interval))
+    if cov is None:
+        return False
+    fetched_period, fetched_at = cov
+    if _rank(fetched_period) < _rank(period):
+        return False
+    return MODE == "replay" or time.time() - fetched_at <= CACHE_TTL_SECONDS
+
+
+def _store(ticker, interval, period, bars):
+    """Dokłada słupki do cache (nowsze wartości dla tej samej daty nadpisują starsze)."""
+    key = (ticker, interval)
+    bars = bars.reindex(columns=BAR_COLUMNS).dropna(subset=["Close"])
+    old = _bars.get(key)
+    if old is not None and not old.empty:
+        bars = pd.concat([old[~old.index.isin(bars.index)], bars]).sort_index()
+    _bars[key] = bars
+    prev = _coverage.get(key)
+    if prev is not None and _rank(prev[0]) > _rank(period):
+        period = prev[0]
+    _coverage[key] = (period, time.time())
+
+
+def _split_download(data, tickers):
+    """Rozbija wynik yf.download (wiele tickerów lub jeden) na słupki per ticker."""
+    out = {}
+    if data is None or data.empty:
+        return out
+    if isinstance(data.columns, pd.MultiIndex):
+        level = "Ticker" if "Ticker" in data.columns.names else 1
+        available = set(data.columns.get_level_values(level))
+        for t in tickers:
+            if t in available:
+                out[t] = data.xs(t, axis=1, level=level).dropna(how="all")
+    elif len(tickers) == 1:
+        out[tickers[0]] = data.dropna(how="all")
+    return out
+
+
+def _download_live(tickers, interval, period):
+    data = None
+    for attempt in range(RETRIES):
+        try:
+            data = yf.download(
+                tickers, period=period, interval=interval,
+                progress=False, auto_adjust=True, threads=True
+            )
+            break
+        except Exception as e:
+            monitoring.inc("data_source_errors_total", source="yfinance")
+            print(f"⚠️ Błąd pobierania notowań (próba {attempt + 1}/{RETRIES}): {e}")
+            time.sleep(random.uniform(1.0, 2.0))
+    out = _split_download(data, tickers)
+
+    # pojedyncze tickery, których zabrakło w paczce
+    for t in tickers:
+        if t in out and not out[t].empty:
+            continue
+        try:
+            hist = yf.Ticker(t).history(period=period, interval=interval, auto_adjust=True)
+            if not hist.empty:
+                hist.index = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+                out[t] = hist
+        except Exception:
+            monitoring.inc("data_source_errors_total", source="yfinance")
+            continue
+    return out
+
+
+def _record(ticker, interval, bars):
+    path = _session_path(ticker, interval)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        old = pd.read_csv(path, index_col=0, parse_dates=True)
+        bars = pd.concat([old[~old.index.isin(bars.index)], bars]).sort_index()
+    bars.rename_axis("Date").to_csv(path)
+
+
+def _download_replay(tickers, interval):
+    out = {}
+    for t in tickers:
+        path = _session_path(t, interval)
+        if path.exists():
+            out[t] = pd.read_csv(path, index_col=0, parse_dates=True)
+        else:
+            print(f"Brak {t} ({interval}) w zapisanej sesji {SESSION}.")
+    return out
+
+
+def _download(batch, interval):
+    """Jedno zbiorcze pobranie dla wszystkich oczekujących tickerów danego interwału."""
+    tickers = sorted(batch)
+    period = max(batch.values(), key=_rank)
+    if MODE == "replay":
+        with monitoring.timer("quote_fetch_seconds", source="replay", interval=interval):
+            out = _download_replay(tickers, interval)
+        period = "max"  # sesja wczytana w całości
+    else:
+        with monitoring.timer("quote_fetch_seconds", source="yfinance", interval=interval):
+            out = _download_live(tickers, interval, period)
+        _stats["downloads"] += 1
+        if MODE == "record":
+            for t, bars in out.items():
+                _record(t, interval, bars.reindex(columns=BAR_COLUMNS))
+
+    with _lock:
+        for t in tickers:
+            bars = out.get(t)
+            # brak danych też zapamiętujemy, żeby nie ponawiać żądania w tym przebiegu
+            _store(t, interval, period, bars if bars is not None else pd.DataFrame(columns=BAR_COLUMNS))
+
+
+def _request(tickers, interval, period):
+    """Zgłasza tickery do pobrania; równoległe i powtórzone żądania łączą się w jeden batch."""
+    with _lock:
+        _stats["requests"] += 1
+        need = [t for t in dict.fromkeys(tickers) if not _covered(t, interval, period)]
+        _stats["hits"] += len(set(tickers)) - len(need)
+        monitoring.inc("cache_requests_total", len(set(tickers)) - len(need), cache="market_data", result="hit")
+        monitoring.inc("cache_requests_total", len(need), cache="market_data", result="miss")
+        if not need:
+            return
+        pending = _pending.setdefault(interval, {})
+        for t in need:
+            if t not in pending or _rank(period) > _rank(pending[t]):
+                pending[t] = period
+
+    with _fetch_lock:
+        with _lock:
+            batch = _pending.pop(interval, {})
+            # część tickerów mógł już pobrać wątek, który był przed nami
+            batch = {t: p for t, p in batch.items() if not _covered(t, interval, p)}
+        if batch:
+            _download(batch, interval)
+
+
+def _slice(bars, period, interval="1d"):
+    if bars.empty or period == "max":
+        return bars
+    if period.endswith("d") and period != "ytd":
+        if interval.endswith(("m", "h")):
+            # słupki śróddzienne: ostatnie N dni, a nie N słupków
+            days = bars.index.normalize()
+            return bars[days >= days.unique()[-int(period[:-1]):].min()]
+        return bars.tail(int(period[:-1]))
+    last = bars.index[-1]
+    if period == "ytd":
+        start = pd.Timestamp(year=last.year, month=1, day=1)
+    elif period.endswith("mo"):
+        start = last - pd.DateOffset(months=int(period[:-2]))
+    else:
+        start = last - pd.DateOffset(years=int(period[:-1]))
+    return bars[bars.index > start]
+
+
+def get_history(tickers, period="6mo", interval="1d") -> dict:
+    """Słupki OHLCV per ticker (kolumny jak w yfinance); brak danych = brak klucza."""
+    tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+    _request(tickers, interval, period)
+    with _lock:
+        out = {}
+        for t in tickers:
+            bars = _bars.get((t, interval))
+            if bars is not None and not bars.empty:
+                out[t] = _slice(bars, period, interval).copy()
+        return out
+
+
+def get_latest_prices(tickers, interval="1d") -> pd.Series:
+    """Ostatnie ceny zamknięcia dla tickerów (jedno zbiorcze pobranie dla brakujących)."""
+    tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+    _request(tickers, interval, "1d")
+    with _lock:
+        prices = {}
+        for t in tickers:
+            bars = _bars.get((t, interval))
+            if bars is not None and not bars.empty:
+                prices[t] = float(bars["Close"].iloc[-1])
+    return pd.Series(prices, dtype=float)
+
+
+def to_price_csv(bars: pd.DataFrame, ticker, path):
+    """Zapis słupków w formacie plików data/prices (trzywierszowy nagłówek yfinance)."""
+    df = bars.reindex(columns=BAR_COLUMNS).copy()
+    df.columns = pd.MultiIndex.from_product([BAR_COLUMNS, [ticker]], names=["Price", "Ticker"])
+    df.index.name = "Date"
+    # zapis przez plik tymczasowy — równoległy czytelnik nie trafi na niepełny plik
+    tmp = f"{path}.tmp"
+    df.to_csv(tmp)
+    os.replace(tmp, path)
@@ -0,0 +1,198 @@
+# monitoring.py
+import atexit
+import csv
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Metryki procesów (scheduler, aktualizacja historii) w formacie tekstowym Prometheusa.
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))
+METRICS_DIR = os.path.join("results", "metrics")
+PREFIX = "portfolio_"
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CACHE_HIT_RESULTS = ("hit", "revalidated", "stale")  # odpowiedź obsłużona z cache
+
+HELP = {
+    "quote_fetch_seconds": ("histogram", "Czas zbiorczego pobrania notowań"),
+    "valuation_seconds": ("histogram", "Czas wyceny (i rebalansu) jednego portfela"),
+    "run_seconds": ("histogram", "Czas całego przebiegu procesu"),
+    "data_source_errors_total": ("counter", "Błędy źródeł danych"),
+    "errors_total": ("counter", "Błędy wewnętrzne procesu"),
+    "cache_requests_total": ("counter", "Zapytania do cache wg wyniku"),
+    "cache_hit_ratio": ("gauge", "Udział zapytań obsłużonych z cache"),
+    "runs_total": ("counter", "Przebiegi procesu wg wyniku"),
+    "portfolios": ("gauge", "Liczba portfeli w ostatnim przebiegu"),
+    "last_run_timestamp_seconds": ("gauge", "Czas zakończenia ostatniego przebiegu (unix)"),
+}
+
+_counters = {}
+_gauges = {}
+_histograms = {}  # (nazwa, etykiety) -> [liczniki kubełków, suma, liczba]
+_lock = threading.Lock()
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name, value=1, **labels):
+    if value:
+        with _lock:
+            key = (name, _labels(labels))
+            _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _gauges[(name, _labels(labels))] = value
+
+
+def observe(name, value, **labels):
+    with _lock:
+        h = _histograms.setdefault((name, _labels(labels)), [[0] * len(LATENCY_BUCKETS), 0.0, 0])
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                h[0][i] += 1
+        h[1] += value
+        h[2] += 1
+
+
+@contextmanager
+def timer(name, **labels):
+    """Mierzy czas bloku w histogramie (także gdy blok zakończy się wyjątkiem)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
+
+
+def _fmt_labels(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+
+def _hit_ratios():
+    """Udział trafień wyliczany z liczników cache_requests_total (per cache)."""
+    totals, hits = {}, {}
+    for (name, labels), value in _counters.items():
+        if name != "cache_requests_total":
+            continue
+        d = dict(labels)
+        key = (("cache", d.get("cache", "")),)
+        totals[key] = totals.get(key, 0) + value
+        if d.get("result") in CACHE_HIT_RESULTS:
+            hits[key] = hits.get(key, 0) + value
+    return {("cache_hit_ratio", k): hits.get(k, 0) / t for k, t in totals.items() if t}
+
+
+def render() -> str:
+    """Wszystkie metryki w formacie tekstowym Prometheusa (wersja 0.0.4)."""
+    with _lock:
+        series = {}
+        for (name, labels), value in list(_counters.items()) + list(_gauges.items()) + list(_hit_ratios().items()):
+            series.setdefault(name, []).append((labels, value))
+        hists = {}
+        for (name, labels), h in _histograms.items():
+            hists.setdefault(name, []).append((labels, [list(h[0]), h[1], h[2]]))
+
+    lines = []
+    for name in sorted(set(series) | set(hists)):
+        kind, text = HELP.get(name, ("histogram" if name in hists else "gauge", name))
+        lines.append(f"# HELP {PREFIX}{name} {text}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        for labels, value in sorted(series.get(name, [])):
+            lines.append(f"{PREFIX}{name}{_fmt_labels(labels)} {value:g}")
+        for labels, (buckets, total, count) in sorted(hists.get(name, [])):
+            for bound, n in zip(LATENCY_BUCKETS, buckets):
+                lines.append(f"{PREFIX}{name}_bucket{_fmt_labels(labels, [('le', f'{bound:g}')])} {n}")
+            lines.append(f"{PREFIX}{name}_bucket{_fmt_labels(labels, [('le', '+Inf')])} {count}")
+            lines.append(f"{PREFIX}{name}_sum{_fmt_labels(labels)} {total:g}")
+            lines.append(f"{PREFIX}{name}_count{_fmt_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(process, metrics_dir: str = METRICS_DIR):
+    """Zrzut metryk procesu do pliku (przebiegi jednorazowe, np. z crona — textfile collector)."""
+    os.makedirs(metrics_dir, exist_ok=True)
+    path = os.path.join(metrics_dir, f"{process}.prom")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # bez wpisu na stdout przy każdym odczycie metryk
+
+
+def start_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> ThreadingHTTPServer:
+    """Endpoint /metrics w wątku w tle (lokalnie, tylko do odczytu)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    print(f"📈 Metryki dostępne pod http://{host}:{server.server_port}/metrics")
+    return server
+
+
+class BufferedLog:
+    """
+    Strukturalny log CSV (stałe kolumny) z buforem w pamięci — plik jest otwierany
+    raz na flush_every wpisów / flush_seconds sekund, a nie przy każdym komunikacie.
+    """
+
+    def __init__(self, path, columns, flush_every=100, flush_seconds=5.0):
+        self.path = path
+        self.columns = list(columns)
+        self.flush_every = flush_every
+        self.flush_seconds = flush_seconds
+        self._rows = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        atexit.register(self.flush)
+
+    def write(self, **fields):
+        with self._lock:
+            self._rows.append([fields.get(c, "") for c in self.columns])
+            due = (len(self._rows) >= self.flush_every
+                   or time.monotonic() - self._last_flush >= self.flush_seconds)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+            self._last_flush = time.monotonic()
+            if not rows:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if new:
+                    writer.writerow(self.columns)
+                writer.writerows(rows)
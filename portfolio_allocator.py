@@ -0,0 +1,173 @@
+# portfolio_allocator.py
+import numpy as np
+import pandas as pd
+
+from data_fetcher import load_close_matrix
+
+METHODS = ("equal", "risk_parity", "min_variance", "mean_variance")
+DEFAULT_MAX_WEIGHT = 0.25
+LOOKBACK_DAYS = 126
+RISK_AVERSION = 5.0
+MIN_OBSERVATIONS = 20
+
+
+def ledoit_wolf_covariance(returns: np.ndarray) -> np.ndarray:
+    """Kowariancja ze ściąganiem Ledoita-Wolfa do skalowanej macierzy jednostkowej."""
+    X = np.asarray(returns, dtype=float)
+    X = X - np.nanmean(X, axis=0)
+    X = np.nan_to_num(X)
+    t, n = X.shape
+
+    S = X.T @ X / t
+    mu = np.trace(S) / n
+    F = mu * np.eye(n)
+    d2 = np.sum((S - F) ** 2)
+    if d2 <= 0:
+        return S
+
+    # sum_t ||x_t x_t' - S||^2 = sum_t ||x_t||^4 - T ||S||^2
+    row_norms = np.sum(X * X, axis=1)
+    b_bar2 = (np.sum(row_norms ** 2) - t * np.sum(S * S)) / t ** 2
+    shrink = min(max(b_bar2, 0.0), d2) / d2
+    return shrink * F + (1.0 - shrink) * S
+
+
+def _project_capped_simplex(v, cap):
+    """Rzut na {w : sum(w) = 1, 0 <= w <= cap} — interpolacja między punktami załamania."""
+    bp = np.sort(np.concatenate([v, v - cap]))
+    totals = np.clip(v[None, :] - bp[:, None], 0.0, cap).sum(axis=1)  # malejące w bp
+    k = np.searchsorted(-totals, -1.0, side="right") - 1
+    k = min(max(k, 0), len(bp) - 2)
+    span = totals[k] - totals[k + 1]
+    tau = bp[k] + (totals[k] - 1.0) * (bp[k + 1] - bp[k]) / span if span > 0 else bp[k]
+    return np.clip(v - tau, 0.0, cap)
+
+
+def _effective_cap(n, max_weight):
+    if max_weight is None:
+        return 1.0
+    return max(float(max_weight), 1.0 / n)
+
+
+def _projected_gradient(grad, lipschitz, n, cap, max_iter=2000, tol=1e-9):
+    """FISTA (z restartem) i rzutem na sympleks z limitem wag (long-only)."""
+    w = np.full(n, 1.0 / n)
+    z = w.copy()
+    t = 1.0
+    step = 1.0 / lipschitz
+    for _ in range(max_iter):
+        g = grad(z)
+        w_next = _project_capped_simplex(z - step * g, cap)
+        if np.max(np.abs(w_next - w)) < tol:
+            return w_next
+        if np.dot(g, w_next - w) > 0:
+            # restart przyspieszenia, gdy pęd kieruje pod górę
+            t = 1.0
+        t_next = 0.5 * (1.0 + np.sqrt(1.0 + 4.0 * t * t))
+        z = w_next + ((t - 1.0) / t_next) * (w_next - w)
+        w, t = w_next, t_next
+    return w
+
+
+def min_variance_weights(cov, max_weight=DEFAULT_MAX_WEIGHT):
+    cov = np.asarray(cov, dtype=float)
+    n = cov.shape[0]
+    lipschitz = max(np.linalg.eigvalsh(cov)[-1], 1e-12)
+    return _projected_gradient(lambda w: cov @ w, lipschitz, n, _effective_cap(n, max_weight))
+
+
+def mean_variance_weights(expected_returns, cov, risk_aversion=RISK_AVERSION, max_weight=DEFAULT_MAX_WEIGHT):
+    """Maksymalizuje mu'w - (gamma/2) w'Σw przy long-only i limicie wagi."""
+    mu = np.asarray(expected_returns, dtype=float)
+    cov = np.asarray(cov, dtype=float)
+    n = cov.shape[0]
+    lipschitz = max(risk_aversion * np.linalg.eigvalsh(cov)[-1], 1e-12)
+    return _projected_gradient(lambda w: risk_aversion * (cov @ w) - mu, lipschitz, n, _effective_cap(n, max_weight))
+
+
+def risk_parity_weights(cov, max_weight=DEFAULT_MAX_WEIGHT, max_iter=50, tol=1e-10):
+    """Równy wkład w ryzyko (Newton na wypukłej formule Spinu), potem limit wagi."""
+    cov = np.asarray(cov, dtype=float)
+    n = cov.shape[0]
+    b = np.full(n, 1.0 / n)
+    y = b / np.sqrt(np.maximum(np.diag(cov), 1e-18))
+
+    for _ in range(max_iter):
+        grad = cov @ y - b / y
+        hess = cov + np.diag(b / (y * y))
+        step = np.linalg.solve(hess, grad)
+        # tłumienie kroku, żeby y pozostało dodatnie
+        alpha = 1.0
+        while np.any(y - alpha * step <= 0):
+            alpha *= 0.5
+        y = y - alpha * step
+        if np.max(np.abs(alpha * step) / y) < tol:
+            break
+
+    w = y / y.sum()
+    cap = _effective_cap(n, max_weight)
+    if w.max() > cap:
+        w = _project_capped_simplex(w, cap)
+    return w
+
+
+def _returns_matrix(closes: pd.DataFrame, lookback=LOOKBACK_DAYS):
+    rets = closes.pct_change(fill_method=None).iloc[1:].tail(lookback)
+    valid = rets.notna().sum() >= MIN_OBSERVATIONS
+    return rets.loc[:, valid]
+
+
+def _solve(method, tickers, cov, expected_returns, max_weight, risk_aversion):
+    n = len(tickers)
+    if method == "equal":
+        w = np.full(n, 1.0 / n)
+    elif method == "risk_parity":
+        w = risk_parity_weights(cov, max_weight)
+    elif method == "min_variance":
+        w = min_variance_weights(cov, max_weight)
+    elif method == "mean_variance":
+        if expected_returns is None:
+            raise ValueError("Metoda mean_variance wymaga oczekiwanych stóp zwrotu.")
+        mu = pd.Series(expected_returns).reindex(tickers).fillna(0.0).to_numpy(dtype=float)
+        w = mean_variance_weights(mu, cov, risk_aversion, max_weight)
+    else:
+        raise ValueError(f"Nieznana metoda alokacji: {method}. Dostępne: {', '.join(METHODS)}")
+    return pd.Series(w, index=tickers)
+
+
+def allocate(tickers, method="risk_parity", expected_returns=None, max_weight=DEFAULT_MAX_WEIGHT,
+             risk_aversion=RISK_AVERSION, lookback=LOOKBACK_DAYS, closes=None) -> pd.Series:
+    """Wagi portfela dla tickerów; spółki bez wystarczającej historii dostają wagę 0."""
+    tickers = list(dict.fromkeys(tickers))
+    if closes is None:
+        closes = load_close_matrix(tickers)
+    closes = closes.reindex(columns=tickers)
+    rets = _returns_matrix(closes, lookback)
+    if rets.shape[1] == 0:
+        raise ValueError("Brak historii cen do wyznaczenia kowariancji.")
+
+    cov = ledoit_wolf_covariance(rets.to_numpy())
+    w = _solve(method, list(rets.columns), cov, expected_returns, max_weight, risk_aversion)
+    return w.reindex(tickers).fillna(0.0)
+
+
+def allocate_batch(candidates: dict, method="risk_parity", expected_returns=None, max_weight=DEFAULT_MAX_WEIGHT,
+                   risk_aversion=RISK_AVERSION, lookback=LOOKBACK_DAYS) -> dict:
+    """Alokacja dla wielu strategii naraz — jedna macierz cen i jedna kowariancja dla sumy tickerów."""
+    universe = list(dict.fromkeys(t for tickers in candidates.values() for t in tickers))
+    closes = load_close_matrix(universe).reindex(columns=universe)
+    rets = _returns_matrix(closes, lookback)
+    cov_all = pd.DataFrame(ledoit_wolf_covariance(rets.to_numpy()), index=rets.columns, columns=rets.columns)
+
+    out = {}
+    for name, tickers in candidates.items():
+        tickers = list(dict.fromkeys(tickers))
+        usable = [t for t in tickers if t in cov_all.index]
+        if not usable:
+            out[name] = pd.Series(0.0, index=tickers)
+            continue
+        mu = expected_returns.get(name) if isinstance(expected_returns, dict) else expected_returns
+        cov = cov_all.loc[usable, usable].to_numpy()
+        w = _solve(method, usable, cov, mu, max_weight, risk_aversion)
+        out[name] = w.reindex(tickers).fillna(0.0)
+    return out
@@ -0,0 +1,239 @@
+# portfolio_api.py
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+import numpy as np
+import pandas as pd
+
+from portfolio_risk import HISTORY_FILE, RISK_FILE
+from prediction_accuracy import ACCURACY_FILE
+
+# API tylko do odczytu: odpowiedzi z migawki w pamięci, odświeżanej po zmianie plików.
+API_HOST = os.getenv("PORTFOLIO_API_HOST", "127.0.0.1")
+API_PORT = int(os.getenv("PORTFOLIO_API_PORT", "8765"))
+PORTFOLIO_DIR = os.path.join("results", "portfolios")
+REFRESH_SECONDS = 2.0
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+RESPONSE_CACHE_SIZE = 1024  # gotowe odpowiedzi (treść + ETag) na migawkę
+
+_snapshot = None
+_responses = OrderedDict()
+_lock = threading.Lock()
+
+
+def _records(df: pd.DataFrame) -> list:
+    """Wiersze jako słowniki z None zamiast NaN (poprawny JSON)."""
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _read_csv(path):
+    return pd.read_csv(path) if os.path.exists(path) else pd.DataFrame()
+
+
+def _sources():
+    files = [HISTORY_FILE, RISK_FILE, ACCURACY_FILE]
+    if os.path.isdir(PORTFOLIO_DIR):
+        files += sorted(os.path.join(PORTFOLIO_DIR, f) for f in os.listdir(PORTFOLIO_DIR) if f.endswith(".csv"))
+    return files
+
+
+def source_signature() -> tuple:
+    """(plik, mtime, rozmiar) wszystkich źródeł — zmiana oznacza nową migawkę."""
+    sig = []
+    for path in _sources():
+        try:
+            st = os.stat(path)
+            sig.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            continue
+    return tuple(sig)
+
+
+def build_snapshot() -> dict:
+    """Wczytuje wszystkie źródła raz i przygotowuje struktury pod zapytania."""
+    portfolios, summary = {}, []
+    if os.path.isdir(PORTFOLIO_DIR):
+        for fname in sorted(os.listdir(PORTFOLIO_DIR)):
+            if not fname.endswith(".csv"):
+                continue
+            name = fname[:-4]
+            df = pd.read_csv(os.path.join(PORTFOLIO_DIR, fname))
+            portfolios[name] = _records(df)
+            strategy, _, tactic = name.partition("_")
+            value_col = "NewValue($)" if "NewValue($)" in df.columns else "CurrentValue($)"
+            value = df[value_col].sum() if value_col in df.columns else np.nan
+            start = df["CurrentValue($)"].sum() if "CurrentValue($)" in df.columns else np.nan
+            summary.append({
+                "Portfolio": name, "Strategy": strategy, "Tactic": tactic, "Positions": len(df),
+                "Value($)": float(value), "Change(%)": float((value / start - 1) * 100) if start else None,
+            })
+
+    # historia posortowana po czasie i pogrupowana per portfel — zakresy przez searchsorted
+    history = {}
+    hist = _read_csv(HISTORY_FILE)
+    if not hist.empty:
+        hist["Portfolio"] = hist["Portfolio"].str.replace(r"\.csv$", "", regex=True)
+        hist = hist.sort_values("Timestamp", kind="stable")
+        history[None] = (hist["Timestamp"].to_numpy(dtype=str), _records(hist))
+        for name, part in hist.groupby("Portfolio", sort=False):
+            history[name] = (part["Timestamp"].to_numpy(dtype=str), _records(part))
+
+    risk = _read_csv(RISK_FILE)
+    if not risk.empty and "Portfolio" in risk.columns:
+        risk["Portfolio"] = risk["Portfolio"].str.replace(r"\.csv$", "", regex=True)
+    accuracy = _read_csv(ACCURACY_FILE)
+    if not accuracy.empty:
+        accuracy = accuracy.sort_values("Date").groupby("Strategy").tail(1)
+
+    return {
+        "portfolios": portfolios,
+        "summary": summary,
+        "history": history,
+        "metrics": {"risk": _records(risk), "accuracy": _records(accuracy)},
+        "built_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def refresh(force=False) -> bool:
+    """Podmienia migawkę, jeśli źródła się zmieniły; zwraca True po przebudowie."""
+    global _snapshot
+    sig = source_signature()
+    if not force and _snapshot is not None and _snapshot["signature"] == sig:
+        return False
+    snap = build_snapshot()
+    snap["signature"] = sig
+    with _lock:
+        _snapshot = snap
+        _responses.clear()
+    return True
+
+
+def _watch(interval):
+    """Odświeżanie w tle: nową migawkę budujemy dopiero, gdy pliki przestały się zmieniać (zapis zakończony)."""
+    pending = None
+    while True:
+        time.sleep(interval)
+        try:
+            sig = source_signature()
+            if sig != _snapshot["signature"]:
+                if sig == pending:
+                    refresh()
+                    pending = None
+                else:
+                    pending = sig
+        except Exception as e:
+            print(f"⚠️ Błąd odświeżania migawki API: {e}")
+
+
+def _history_page(snap, name, query):
+    if name not in snap["history"]:
+        return None
+    ts, rows = snap["history"][name]
+    start = query.get("start", [""])[0]
+    end = query.get("end", [""])[0]
+    lo = np.searchsorted(ts, start, side="left") if start else 0
+    # koniec włącznie także jako prefiks (end=2025-10-28 obejmuje cały dzień)
+    hi = np.searchsorted(ts, end + "\x7f", side="right") if end else len(ts)
+    try:
+        limit = min(max(int(query.get("limit", [DEFAULT_LIMIT])[0]), 1), MAX_LIMIT)
+        offset = max(int(query.get("offset", [0])[0]), 0)
+    except ValueError:
+        return None
+    total = max(int(hi - lo), 0)
+    items = rows[lo + offset:min(lo + offset + limit, hi)] if offset < total else []
+    nxt = None
+    if offset + limit < total:
+        params = {k: v[0] for k, v in query.items()}
+        params["offset"] = offset + limit
+        params["limit"] = limit
+        nxt = "?" + urlencode(params)
+    return {"total": total, "offset": offset, "limit": limit, "next": nxt, "items": items}
+
+
+def route(path, query, snap):
+    """Treść odpowiedzi (obiekt JSON) albo None dla nieznanego zasobu."""
+    parts = [p for p in path.split("/") if p]
+    if parts == ["health"]:
+        return {"status": "ok", "snapshot": snap["built_at"]}
+    if parts == ["portfolios"]:
+        return {"items": snap["summary"]}
+    if len(parts) == 2 and parts[0] == "portfolios":
+        holdings = snap["portfolios"].get(parts[1])
+        return None if holdings is None else {"portfolio": parts[1], "items": holdings}
+    if parts == ["history"]:
+        return _history_page(snap, query.get("portfolio", [None])[0], query)
+    if len(parts) == 3 and parts[0] == "portfolios" and parts[2] == "history":
+        return _history_page(snap, parts[1], query)
+    if parts == ["metrics", "latest"]:
+        return snap["metrics"]
+    return None
+
+
+def respond(url):
+    """(status, ETag, treść) dla adresu — gotowe odpowiedzi trzymane w LRU do zmiany migawki."""
+    with _lock:
+        snap = _snapshot
+        cached = _responses.get(url)
+        if cached is not None:
+            _responses.move_to_end(url)
+            return cached
+    parsed = urlparse(url)
+    payload = route(parsed.path, parse_qs(parsed.query), snap)
+    if payload is None:
+        return 404, None, b'{"error": "not found"}'
+    body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+    result = (200, '"' + hashlib.sha1(body).hexdigest()[:20] + '"', body)
+    with _lock:
+        if snap is _snapshot:
+            _responses[url] = result
+            if len(_responses) > RESPONSE_CACHE_SIZE:
+                _responses.popitem(last=False)
+    return result
+
+
+class _ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status, etag, body = respond(self.path)
+        if etag is not None and etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_api(port: int = API_PORT, host: str = API_HOST, refresh_seconds: float = REFRESH_SECONDS) -> ThreadingHTTPServer:
+    refresh(force=True)
+    threading.Thread(target=_watch, args=(refresh_seconds,), daemon=True, name="api-refresh").start()
+    server = ThreadingHTTPServer((host, port), _ApiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="api").start()
+    print(f"🌐 API portfeli: http://{host}:{server.server_port}/portfolios")
+    return server
+
+
+if __name__ == "__main__":
+    srv = start_api()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        srv.shutdown()
@@ -1,9 +1,11 @@
 import numpy as np
-import pandas as pd
-import yfinance as yf
 
+from market_data import get_latest_prices
+from portfolio_allocator import DEFAULT_MAX_WEIGHT, allocate
 
-def generate_portfolio(df_predictions, total_investment=10_000, allow_fractional=True):
+
+def generate_portfolio(df_predictions, total_investment=10_000, allow_fractional=True,
+                       weighting="growth", max_weight=DEFAULT_MAX_WEIGHT):
     df = df_predictions.copy()
     required_cols = {"Ticker", "PredictedGrowth", "LastClose"}
     if not required_cols.issubset(df.columns):
@@ -22,14 +24,21 @@ def generate_portfolio(df_predictions, total_investment=10_000, allow_fractional
     if df.empty:
         raise ValueError("Brak spółek z dodatnim przewidywanym wzrostem.")
 
-    df["Weight"] = df["PredictedGrowth"] / df["PredictedGrowth"].sum()
+    if weighting == "growth":
+        df["Weight"] = df["PredictedGrowth"] / df["PredictedGrowth"].sum()
+    else:
+        weights = allocate(
+            df["Ticker"].tolist(),
+            method=weighting,
+            expected_returns=df.set_index("Ticker")["PredictedGrowth"],
+            max_weight=max_weight
+        )
+        df["Weight"] = df["Ticker"].map(weights).fillna(0.0)
+        df = df[df["Weight"] > 0].copy()
     df["Investment($)"] = df["Weight"] * total_investment
 
     tickers = df["Ticker"].tolist()
-    try:
-        prices = yf.download(tickers, period="1d", progress=False, auto_adjust=True)["Close"].iloc[-1]
-    except Exception:
-        prices = pd.Series(dtype=float)
+    prices = get_latest_prices(tickers)
 
     df["Price"] = [prices.get(t, df.loc[df["Ticker"] == t, "LastClose"].iloc[0]) for t in tickers]
 
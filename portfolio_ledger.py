@@ -0,0 +1,294 @@
+# portfolio_ledger.py
+import io
+import os
+from datetime import datetime
+import pandas as pd
+
+RESULTS_DIR = "results"
+LEDGER_DIR = os.path.join(RESULTS_DIR, "ledger")
+EVENT_COLUMNS = ["Seq", "Timestamp", "Type", "Ticker", "DeltaShares", "Price"]
+SNAPSHOT_COLUMNS = ["Seq", "Timestamp", "Ticker", "Shares", "CostBasis", "LastPrice"]
+PORTFOLIO_COLUMNS = ["Ticker", "Weight", "Investment($)", "Price", "Shares", "CurrentValue($)"]
+SNAPSHOT_EVERY = 50
+EPS = 1e-9
+# indeks snapshotów: rekordy stałej szerokości (bez nagłówka) — bisekcja przez seek, bez czytania całych plików
+INDEX_COLUMNS = ["Seq", "Timestamp", "SnapshotOffset", "SnapshotRows", "EventOffset"]
+_INDEX_FORMAT = "{:012d},{:<19.19},{:015d},{:08d},{:015d}\n"
+_INDEX_WIDTH = 74
+
+_cache = {}
+
+
+def _name(portfolio):
+    return os.path.basename(portfolio).replace(".csv", "")
+
+
+def _paths(portfolio):
+    name = _name(portfolio)
+    return (
+        os.path.join(LEDGER_DIR, f"{name}_events.csv"),
+        os.path.join(LEDGER_DIR, f"{name}_snapshots.csv"),
+        os.path.join(LEDGER_DIR, f"{name}_index.txt"),
+    )
+
+
+def has_ledger(portfolio) -> bool:
+    return os.path.exists(_paths(portfolio)[0])
+
+
+def _read(path, columns):
+    """Czyta plik księgi z pamięci podręcznej (ponowny odczyt tylko po zmianie pliku)."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=columns)
+    mtime = os.path.getmtime(path)
+    cached = _cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    df = pd.read_csv(path)
+    _cache[path] = (mtime, df)
+    return df
+
+
+def _append(path, rows, columns) -> int:
+    """Dopisuje wiersze; zwraca bajt, od którego zaczynają się dopisane wiersze."""
+    os.makedirs(LEDGER_DIR, exist_ok=True)
+    offset = os.path.getsize(path) if os.path.exists(path) else None
+    df = pd.DataFrame(rows, columns=columns)
+    df.to_csv(path, mode="a", header=offset is None, index=False)
+    _cache.pop(path, None)
+    if offset is None:
+        with open(path, "rb") as f:
+            offset = len(f.readline())
+    return offset
+
+
+def _read_rows(path, columns, offset=0, nrows=None, stop=None) -> pd.DataFrame:
+    """
+    Wiersze pliku księgi od bajtu offset (0 — od początku, z pominięciem nagłówka):
+    nrows wierszy albo do bajtu stop (domyślnie do końca pliku).
+    """
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=columns)
+    with open(path, "rb") as f:
+        if offset:
+            f.seek(offset)
+        else:
+            f.readline()
+        if nrows is not None:
+            data = b"".join(f.readline() for _ in range(nrows))
+        else:
+            data = f.read() if stop is None else f.read(max(stop - f.tell(), 0))
+    if not data.strip():
+        return pd.DataFrame(columns=columns)
+    return pd.read_csv(io.BytesIO(data), header=None, names=columns, dtype={"Ticker": str, "Timestamp": str})
+
+
+def _index_entry(f, i):
+    f.seek(i * _INDEX_WIDTH)
+    seq, ts, snap_offset, snap_rows, event_offset = f.read(_INDEX_WIDTH).decode("ascii").rstrip("\n").split(",")
+    return int(seq), ts.rstrip(), int(snap_offset), int(snap_rows), int(event_offset)
+
+
+def _append_index(index_path, seq, timestamp, snap_offset, snap_rows, event_offset):
+    with open(index_path, "ab") as f:
+        f.write(_INDEX_FORMAT.format(seq, timestamp, snap_offset, snap_rows, event_offset).encode("ascii"))
+
+
+def _build_index(portfolio):
+    """Indeks dla księgi zapisanej przed jego wprowadzeniem (jednorazowe przejście po plikach)."""
+    events_path, snaps_path, index_path = _paths(portfolio)
+    marks = []  # (seq, timestamp, offset, rows)
+    with open(snaps_path, "rb") as f:
+        offset = len(f.readline())
+        for line in iter(f.readline, b""):
+            seq, ts = line.decode("utf-8").split(",")[:2]
+            if marks and marks[-1][0] == int(seq):
+                marks[-1][3] += 1
+            else:
+                marks.append([int(seq), ts, offset, 1])
+            offset += len(line)
+    event_offsets = {}
+    if os.path.exists(events_path):
+        with open(events_path, "rb") as f:
+            offset = len(f.readline())
+            pending = [m[0] for m in marks]
+            for line in iter(f.readline, b""):
+                seq = int(line.split(b",", 1)[0])
+                while pending and seq > pending[0]:
+                    event_offsets[pending.pop(0)] = offset
+                offset += len(line)
+            for s in pending:
+                event_offsets[s] = offset
+    tmp = index_path + ".tmp"
+    with open(tmp, "wb") as f:
+        for seq, ts, snap_offset, rows in marks:
+            f.write(_INDEX_FORMAT.format(seq, ts, snap_offset, rows, event_offsets.get(seq, 0)).encode("ascii"))
+    os.replace(tmp, index_path)
+
+
+def _find_snapshot(portfolio, timestamp=None):
+    """
+    Ostatni snapshot nie późniejszy niż timestamp: bisekcja po rekordach indeksu (O(log n) odczytów).
+    Zwraca (wpis indeksu lub None, EventOffset następnego snapshotu lub None) — zdarzenia za tym
+    offsetem są późniejsze niż timestamp, więc replay kończy się na nim.
+    """
+    _, snaps_path, index_path = _paths(portfolio)
+    if not os.path.exists(index_path):
+        if not os.path.exists(snaps_path):
+            return None, None
+        _build_index(portfolio)
+    n = os.path.getsize(index_path) // _INDEX_WIDTH
+    if n == 0:
+        return None, None
+    with open(index_path, "rb") as f:
+        if timestamp is None:
+            return _index_entry(f, n - 1), None
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _index_entry(f, mid)[1] <= timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        entry = _index_entry(f, lo - 1) if lo > 0 else None
+        stop = _index_entry(f, lo)[4] if lo < n else None
+        return entry, stop
+
+
+def load_events(portfolio):
+    return _read(_paths(portfolio)[0], EVENT_COLUMNS)
+
+
+def load_snapshots(portfolio):
+    return _read(_paths(portfolio)[1], SNAPSHOT_COLUMNS)
+
+
+def _apply(positions, ticker, delta, price):
+    shares, cost, last_price = positions.get(ticker, (0.0, 0.0, price))
+    if delta > 0:
+        cost += delta * price
+    elif shares > 0:
+        cost *= max(shares + delta, 0.0) / shares
+    shares += delta
+    if abs(shares) < EPS:
+        positions.pop(ticker, None)
+    else:
+        positions[ticker] = (shares, cost, price if pd.notna(price) else last_price)
+
+
+def _positions_at(portfolio, timestamp=None):
+    """
+    Pozycje na chwilę `timestamp`: snapshot z indeksu (bisekcja) + replay zdarzeń po nim.
+    Czytane są tylko wiersze tego snapshotu i zdarzenia do następnego snapshotu, nie całe pliki.
+    """
+    events_path, snaps_path, _ = _paths(portfolio)
+    positions = {}
+    base_seq, event_offset = 0, 0
+    entry, stop = _find_snapshot(portfolio, timestamp)
+    if entry is not None:
+        base_seq, _, snap_offset, snap_rows, event_offset = entry
+        rows = _read_rows(snaps_path, SNAPSHOT_COLUMNS, snap_offset, snap_rows)
+        positions = {
+            r.Ticker: (float(r.Shares), float(r.CostBasis), float(r.LastPrice))
+            for r in rows[rows["Ticker"].notna()].itertuples(index=False)
+        }
+
+    events = _read_rows(events_path, EVENT_COLUMNS, event_offset, stop=stop)
+    events = events[events["Seq"] > base_seq]
+    last_seq = int(events["Seq"].iloc[-1]) if not events.empty else base_seq
+    if timestamp is not None:
+        events = events[events["Timestamp"] <= timestamp]
+    for r in events.itertuples(index=False):
+        _apply(positions, r.Ticker, float(r.DeltaShares), float(r.Price))
+    return positions, last_seq
+
+
+def holdings_at(portfolio, timestamp=None) -> pd.DataFrame:
+    """Stan portfela (Ticker, Shares, CostBasis, LastPrice) na dany moment (domyślnie bieżący)."""
+    if isinstance(timestamp, datetime):
+        timestamp = timestamp.strftime("%Y-%m-%d %H:%M:%S")
+    positions, _ = _positions_at(portfolio, timestamp)
+    return pd.DataFrame(
+        [(t, s, c, p) for t, (s, c, p) in sorted(positions.items())],
+        columns=["Ticker", "Shares", "CostBasis", "LastPrice"]
+    )
+
+
+def append_events(portfolio, trades: pd.DataFrame, timestamp=None):
+    """Dopisuje transakcje (Ticker, DeltaShares, Price, opcjonalnie Type) na koniec księgi."""
+    trades = trades[trades["DeltaShares"].abs() > EPS]
+    if trades.empty:
+        return 0
+    timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    events_path, snaps_path, index_path = _paths(portfolio)
+
+    positions, last_seq = _positions_at(portfolio)
+    rows = []
+    for i, r in enumerate(trades.itertuples(index=False), start=1):
+        kind = getattr(r, "Type", None) or ("BUY" if r.DeltaShares > 0 else "SELL")
+        rows.append((last_seq + i, timestamp, kind, r.Ticker, float(r.DeltaShares), float(r.Price)))
+        _apply(positions, r.Ticker, float(r.DeltaShares), float(r.Price))
+    _append(events_path, rows, EVENT_COLUMNS)
+
+    new_seq = last_seq + len(rows)
+    if new_seq // SNAPSHOT_EVERY != last_seq // SNAPSHOT_EVERY:
+        _find_snapshot(portfolio)  # indeks starszej księgi budujemy przed dopisaniem nowego wpisu
+        snap = [(new_seq, timestamp, t, s, c, p) for t, (s, c, p) in sorted(positions.items())]
+        # pusty portfel też zapisujemy, żeby snapshot był widoczny w indeksie
+        snap = snap or [(new_seq, timestamp, None, 0.0, 0.0, 0.0)]
+        snap_offset = _append(snaps_path, snap, SNAPSHOT_COLUMNS)
+        _append_index(index_path, new_seq, timestamp, snap_offset, len(snap), os.path.getsize(events_path))
+    return len(rows)
+
+
+def record_holdings(portfolio, holdings: pd.DataFrame, prices=None, timestamp=None):
+    """Zapisuje w księdze różnicę między stanem z księgi a nowymi pozycjami portfela."""
+    current = holdings_at(portfolio)
+    first = current.empty and load_events(portfolio).empty
+
+    new_shares = holdings.groupby("Ticker")["Shares"].sum()
+    old_shares = current.set_index("Ticker")["Shares"] if not current.empty else pd.Series(dtype=float)
+    delta = new_shares.sub(old_shares, fill_value=0.0)
+    delta = delta[delta.abs() > EPS]
+    if delta.empty:
+        return 0
+
+    px = pd.Series(dtype=float)
+    if prices is not None and not first:
+        px = pd.Series(prices, dtype=float)
+    if "Price" in holdings.columns:
+        px = px.combine_first(holdings.groupby("Ticker")["Price"].last())
+    if not current.empty:
+        px = px.combine_first(current.set_index("Ticker")["LastPrice"])
+
+    trades = pd.DataFrame({
+        "Ticker": delta.index,
+        "DeltaShares": delta.to_numpy(),
+        "Price": px.reindex(delta.index).to_numpy(),
+    })
+    if first:
+        trades["Type"] = "INIT"
+    return append_events(portfolio, trades, timestamp)
+
+
+def export_portfolio(portfolio, timestamp=None) -> pd.DataFrame:
+    """Widok portfela z księgi w formacie plików results/portfolios (dla app.py)."""
+    h = holdings_at(portfolio, timestamp)
+    if h.empty:
+        return pd.DataFrame(columns=PORTFOLIO_COLUMNS)
+    value = h["Shares"] * h["LastPrice"]
+    total = value.sum()
+    return pd.DataFrame({
+        "Ticker": h["Ticker"],
+        "Weight": (value / total if total > 0 else 0.0),
+        "Investment($)": h["CostBasis"].round(2),
+        "Price": (h["CostBasis"] / h["Shares"]).round(2),
+        "Shares": h["Shares"],
+        "CurrentValue($)": value.round(2),
+    })[PORTFOLIO_COLUMNS]
+
+
+def list_ledgers():
+    if not os.path.exists(LEDGER_DIR):
+        return []
+    return sorted(f.replace("_events.csv", ".csv") for f in os.listdir(LEDGER_DIR) if f.endswith("_events.csv"))
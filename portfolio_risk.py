@@ -0,0 +1,357 @@
+# portfolio_risk.py
+import hashlib
+import json
+import os
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+
+from data_fetcher import DATA_DIR, load_close_matrix
+
+RESULTS_DIR = "results"
+HISTORY_FILE = os.path.join(RESULTS_DIR, "portfolio_history.csv")
+RISK_STATE_FILE = os.path.join(RESULTS_DIR, "portfolio_risk_state.csv")
+RISK_FILE = os.path.join(RESULTS_DIR, "portfolio_risk.csv")
+MARKET_CACHE_FILE = os.path.join(RESULTS_DIR, "market_returns.json")
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.0  # roczna stopa wolna od ryzyka
+
+# Akumulatory na portfel. Zwrot ostatniego dnia (LastValue / PrevValue) jest "otwarty"
+# do czasu pojawienia się punktu z kolejnego dnia — wtedy trafia do sum.
+_NUM_FIELDS = [
+    "PrevValue", "LastValue", "PeakValue", "MaxDrawdown",
+    "N", "SumR", "SumR2", "SumDown2",
+    "NBeta", "SumRB", "SumM", "SumM2", "SumRM",
+]
+STATE_COLUMNS = ["Portfolio", "LastDate", "LastTimestamp"] + _NUM_FIELDS
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Okna kroczące (w sesjach): sumy okien aktualizowane przyrostowo, a zwrot wypadający
+# z okna odczytywany z bufora cyklicznego ostatnich RING_SIZE zwrotów portfela.
+WINDOWS = (63, 252)
+RING_SIZE = max(WINDOWS)
+_SUM_FIELDS = ["N", "SumR", "SumR2", "SumDown2", "NBeta", "SumRB", "SumM", "SumM2", "SumRM"]
+
+
+def _prices_signature(tickers) -> str:
+    """Skrót (mtime, rozmiar) plików cen — zmiana oznacza nowe notowania."""
+    sig = []
+    for t in tickers:
+        try:
+            st = (DATA_DIR / f"{t}.csv").stat()
+            sig.append((t, st.st_mtime_ns, st.st_size))
+        except OSError:
+            continue
+    return hashlib.sha1(repr(sig).encode("utf-8")).hexdigest()
+
+
+def market_returns(tickers=None, cache_path: str = MARKET_CACHE_FILE) -> pd.Series:
+    """
+    Dzienne stopy zwrotu rynku (równoważony koszyk spółek z data/prices). Wynik jest
+    zapisywany w cache_path i liczony ponownie dopiero po zmianie plików cen.
+    """
+    if tickers is None:
+        tickers = sorted(p.stem for p in DATA_DIR.glob("*.csv"))
+    signature = _prices_signature(tickers)
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("Signature") == signature:
+                return pd.Series({int(k): v for k, v in cached["Returns"].items()}, dtype=float).sort_index()
+        except (OSError, ValueError, KeyError):
+            pass
+
+    closes = load_close_matrix(tickers)
+    if closes.empty:
+        return pd.Series(dtype=float)
+    rets = closes.pct_change(fill_method=None).mean(axis=1).dropna()
+    rets.index = [d.toordinal() for d in rets.index.date]
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        tmp = cache_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"Signature": signature, "Returns": {str(k): float(v) for k, v in rets.items()}}, f)
+        os.replace(tmp, cache_path)
+    return rets
+
+
+def _contrib(r, m, ok):
+    """Wkłady zwrotów do sum (kolumny jak _SUM_FIELDS); ok — zwrot istnieje, m NaN — brak rynku."""
+    r = np.where(ok, r, 0.0)
+    ok_b = ok & np.isfinite(m)
+    m = np.where(ok_b, m, 0.0)
+    rb = np.where(ok_b, r, 0.0)
+    return np.stack([ok.astype(float), r, r * r, np.minimum(r, 0.0) ** 2,
+                     ok_b.astype(float), rb, m, m * m, rb * m], axis=-1)
+
+
+def _push_returns(state, idx, r, m):
+    """Zamknięte zwroty do buforów cyklicznych i sum okien (zwrot sprzed `w` sesji wypada z okna)."""
+    if len(idx) == 0:
+        return
+    pos = state["RingPos"][idx]
+    count = state["RingCount"][idx]
+    new = _contrib(r, m, np.ones(len(idx), dtype=bool))
+    for k, w in enumerate(WINDOWS):
+        slot = (pos - w) % RING_SIZE
+        old = _contrib(state["RingR"][idx, slot], state["RingM"][idx, slot], count >= w)
+        state["WinSums"][idx, k] += new - old
+    state["RingR"][idx, pos] = r
+    state["RingM"][idx, pos] = m
+    state["RingPos"][idx] = (pos + 1) % RING_SIZE
+    state["RingCount"][idx] = np.minimum(count + 1, RING_SIZE)
+
+
+def _empty_state():
+    return {
+        "names": [],
+        "index": {},
+        "LastDate": np.zeros(0, dtype=np.int64),
+        "LastTimestamp": [],
+        **{f: np.zeros(0) for f in _NUM_FIELDS},
+        "RingR": np.zeros((0, RING_SIZE)),
+        "RingM": np.zeros((0, RING_SIZE)),
+        "RingPos": np.zeros(0, dtype=np.int64),
+        "RingCount": np.zeros(0, dtype=np.int64),
+        "WinSums": np.zeros((0, len(WINDOWS), len(_SUM_FIELDS))),
+    }
+
+
+def _grow(state, names):
+    new = [n for n in dict.fromkeys(names) if n not in state["index"]]
+    if not new:
+        return
+    k = len(new)
+    for n in new:
+        state["index"][n] = len(state["names"])
+        state["names"].append(n)
+    state["LastDate"] = np.concatenate([state["LastDate"], np.zeros(k, dtype=np.int64)])
+    state["LastTimestamp"].extend([""] * k)
+    for f in _NUM_FIELDS:
+        init = np.nan if f in ("PrevValue", "LastValue", "PeakValue") else 0.0
+        state[f] = np.concatenate([state[f], np.full(k, init)])
+    for f in ("RingR", "RingM"):
+        state[f] = np.concatenate([state[f], np.full((k, RING_SIZE), np.nan)])
+    for f in ("RingPos", "RingCount"):
+        state[f] = np.concatenate([state[f], np.zeros(k, dtype=np.int64)])
+    state["WinSums"] = np.concatenate([state["WinSums"], np.zeros((k, len(WINDOWS), len(_SUM_FIELDS)))])
+
+
+def _windows_path(path):
+    return os.path.splitext(path)[0] + "_windows.npz"
+
+
+def load_risk_state(path: str = RISK_STATE_FILE):
+    if not os.path.exists(path):
+        return None
+    df = pd.read_csv(path)
+    state = _empty_state()
+    _grow(state, df["Portfolio"].tolist())
+    state["LastDate"] = np.array(
+        [date.fromisoformat(d).toordinal() if isinstance(d, str) else 0 for d in df["LastDate"]],
+        dtype=np.int64,
+    )
+    state["LastTimestamp"] = df["LastTimestamp"].fillna("").astype(str).tolist()
+    for f in _NUM_FIELDS:
+        state[f] = np.array(df[f], dtype=float)
+
+    # bufory okien kroczących; stan bez nich (lub z innymi oknami) jest przeliczany z historii
+    wpath = _windows_path(path)
+    if not os.path.exists(wpath):
+        return None
+    with np.load(wpath, allow_pickle=False) as w:
+        if list(w["Names"]) != state["names"] or tuple(w["Windows"]) != WINDOWS:
+            return None
+        for f in ("RingR", "RingM", "RingPos", "RingCount", "WinSums"):
+            state[f] = w[f].copy()
+    return state
+
+
+def save_risk_state(state, path: str = RISK_STATE_FILE):
+    df = pd.DataFrame({
+        "Portfolio": state["names"],
+        "LastDate": [date.fromordinal(d).isoformat() if d > 0 else None for d in state["LastDate"]],
+        "LastTimestamp": state["LastTimestamp"],
+        **{f: state[f] for f in _NUM_FIELDS},
+    })
+    df[STATE_COLUMNS].to_csv(path, index=False)
+    wpath = _windows_path(path)
+    tmp = wpath + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, Names=np.array(state["names"], dtype=str), Windows=np.array(WINDOWS),
+                 **{k: state[k] for k in ("RingR", "RingM", "RingPos", "RingCount", "WinSums")})
+    os.replace(tmp, wpath)
+
+
+def _apply_points(state, names, values, day, timestamp, mkt):
+    """Dokłada punkty wycen z jednego znacznika czasu (wektorowo po portfelach)."""
+    idx = np.array([state["index"][n] for n in names])
+    v = np.asarray(values, dtype=float)
+
+    last_date = state["LastDate"][idx]
+    prev = state["PrevValue"][idx]
+    last = state["LastValue"][idx]
+    new_day = last_date < day
+
+    # zamknięcie zwrotu poprzedniego dnia
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = last / prev - 1.0
+    fold = new_day & np.isfinite(r)
+    m = np.array([mkt.get(int(d), np.nan) for d in last_date])
+    _push_returns(state, idx[fold], r[fold], m[fold])
+    r = np.where(fold, r, 0.0)
+    fold_b = fold & np.isfinite(m)
+    m = np.where(fold_b, m, 0.0)
+    rb = np.where(fold_b, r, 0.0)
+
+    state["N"][idx] += fold
+    state["SumR"][idx] += r
+    state["SumR2"][idx] += r * r
+    state["SumDown2"][idx] += np.minimum(r, 0.0) ** 2
+    state["NBeta"][idx] += fold_b
+    state["SumRB"][idx] += rb
+    state["SumM"][idx] += m
+    state["SumM2"][idx] += m * m
+    state["SumRM"][idx] += rb * m
+
+    state["PrevValue"][idx] = np.where(new_day, last, prev)
+    state["LastValue"][idx] = v
+    state["LastDate"][idx] = np.where(new_day, day, last_date)
+
+    peak = np.fmax(state["PeakValue"][idx], v)
+    state["PeakValue"][idx] = peak
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = np.where(peak > 0, v / peak - 1.0, 0.0)
+    state["MaxDrawdown"][idx] = np.fmin(state["MaxDrawdown"][idx], dd)
+
+    for i in idx:
+        state["LastTimestamp"][i] = timestamp
+
+
+def update_risk_state(state, points: pd.DataFrame, mkt=None):
+    """Aktualizuje akumulatory nowymi punktami historii (pomija już przetworzone)."""
+    if state is None:
+        state = _empty_state()
+    if points.empty:
+        return state
+    if mkt is None:
+        mkt = market_returns()
+    mkt = dict(mkt.items()) if isinstance(mkt, pd.Series) else mkt
+
+    pts = points[["Timestamp", "Portfolio", "Value($)"]].dropna()
+    _grow(state, pts["Portfolio"].tolist())
+
+    for ts, group in pts.groupby("Timestamp", sort=True):
+        ts = str(ts)
+        fresh = [
+            state["LastTimestamp"][state["index"][p]] < ts
+            for p in group["Portfolio"]
+        ]
+        group = group[fresh].drop_duplicates("Portfolio", keep="last")
+        if group.empty:
+            continue
+        day = datetime.strptime(ts, TS_FORMAT).date().toordinal()
+        _apply_points(state, group["Portfolio"].tolist(), group["Value($)"].to_numpy(), day, ts, mkt)
+
+    return state
+
+
+def _ratios(sums):
+    """Zmienność, Sharpe, Sortino i beta z sum zwrotów (ostatnia oś jak _SUM_FIELDS)."""
+    n, s1, s2, sd2, nb, srb, sm, sm2, srm = np.moveaxis(sums, -1, 0)
+    rf = RISK_FREE_RATE / TRADING_DAYS
+    ann = np.sqrt(TRADING_DAYS)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = s1 / n
+        std = np.sqrt(np.maximum(s2 - n * mean ** 2, 0.0) / (n - 1))
+        downside = np.sqrt(sd2 / n)
+        cov_rm = srm / nb - (srb / nb) * (sm / nb)
+        var_m = sm2 / nb - (sm / nb) ** 2
+        vol = np.where(n > 1, std * ann, np.nan)
+        sharpe = np.where((n > 1) & (std > 0), (mean - rf) / std * ann, np.nan)
+        sortino = np.where(downside > 0, (mean - rf) / downside * ann, np.nan)
+        beta = np.where((nb > 1) & (var_m > 0), cov_rm / var_m, np.nan)
+    return vol, sharpe, sortino, beta
+
+
+def compute_risk_metrics(state, mkt=None) -> pd.DataFrame:
+    """Zmienność, Sharpe, Sortino, beta i obsunięcia dla wszystkich portfeli naraz."""
+    columns = [
+        "Portfolio", "Strategy", "Tactic", "LastDate", "Days", "Value($)",
+        "Volatility(%)", "Sharpe", "Sortino", "Beta", "Drawdown(%)", "MaxDrawdown(%)",
+    ] + [c for w in WINDOWS for c in (f"Volatility{w}(%)", f"Sharpe{w}", f"Sortino{w}", f"Beta{w}")]
+    if state is None or not state["names"]:
+        return pd.DataFrame(columns=columns)
+    if mkt is None:
+        mkt = {}
+    mkt = dict(mkt.items()) if isinstance(mkt, pd.Series) else mkt
+
+    # dokładamy "otwarty" zwrot ostatniego dnia bez modyfikowania stanu
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = state["LastValue"] / state["PrevValue"] - 1.0
+    ok = np.isfinite(r)
+    m = np.array([mkt.get(int(d), np.nan) for d in state["LastDate"]])
+    open_ret = _contrib(r, m, ok)
+
+    total = np.stack([state[f] for f in _SUM_FIELDS], axis=-1) + open_ret
+    n = total[:, 0]
+    vol, sharpe, sortino, beta = _ratios(total)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drawdown = np.where(state["PeakValue"] > 0, state["LastValue"] / state["PeakValue"] - 1.0, 0.0)
+
+    # okna kroczące: otwarty zwrot wypycha najstarszy zwrot pełnego okna
+    rows = np.arange(len(state["names"]))
+    windows = {}
+    for k, w in enumerate(WINDOWS):
+        slot = (state["RingPos"] - w) % RING_SIZE
+        evicted = _contrib(state["RingR"][rows, slot], state["RingM"][rows, slot], ok & (state["RingCount"] >= w))
+        vol_w, sharpe_w, sortino_w, beta_w = _ratios(state["WinSums"][:, k] + open_ret - evicted)
+        windows.update({f"Volatility{w}(%)": vol_w * 100, f"Sharpe{w}": sharpe_w,
+                        f"Sortino{w}": sortino_w, f"Beta{w}": beta_w})
+
+    parts = [n_.replace(".csv", "").split("_") for n_ in state["names"]]
+    return pd.DataFrame({
+        "Portfolio": state["names"],
+        "Strategy": [p[0] if len(p) > 0 else "Unknown" for p in parts],
+        "Tactic": [p[1] if len(p) > 1 else "None" for p in parts],
+        "LastDate": [date.fromordinal(d).isoformat() if d > 0 else None for d in state["LastDate"]],
+        "Days": n.astype(int),
+        "Value($)": state["LastValue"],
+        "Volatility(%)": vol * 100,
+        "Sharpe": sharpe,
+        "Sortino": sortino,
+        "Beta": beta,
+        "Drawdown(%)": drawdown * 100,
+        "MaxDrawdown(%)": state["MaxDrawdown"] * 100,
+        **windows,
+    })[columns]
+
+
+def update_risk_metrics(points: pd.DataFrame = None, history_path: str = HISTORY_FILE,
+                        state_path: str = RISK_STATE_FILE, risk_path: str = RISK_FILE) -> pd.DataFrame:
+    """Dokłada nowe punkty do stanu ryzyka i zapisuje metryki (przy braku stanu — z całej historii)."""
+    mkt = market_returns()
+    state = load_risk_state(state_path)
+    if state is None or points is None:
+        if not os.path.exists(history_path):
+            return pd.DataFrame()
+        state = update_risk_state(None, pd.read_csv(history_path), mkt)
+    else:
+        state = update_risk_state(state, points, mkt)
+
+    save_risk_state(state, state_path)
+    metrics = compute_risk_metrics(state, mkt)
+    metrics.to_csv(risk_path, index=False)
+    return metrics
+
+
+def load_risk_metrics(path: str = RISK_FILE) -> pd.DataFrame:
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_csv(path)
+
+
+if __name__ == "__main__":
+    print(update_risk_metrics().to_string(index=False))
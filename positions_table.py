@@ -0,0 +1,137 @@
+# positions_table.py
+import os
+import numpy as np
+import pandas as pd
+
+# Pozycje wszystkich portfeli w jednej tabeli (portfel, ticker, akcje, koszt nabycia).
+# Portfele strategii z results/portfolios są dołączane z plików, pozostałe (np. portfele
+# użytkowników) trzymane są wyłącznie w POSITIONS_FILE.
+RESULTS_DIR = "results"
+PORTFOLIO_DIR = os.path.join(RESULTS_DIR, "portfolios")
+POSITIONS_FILE = os.path.join(RESULTS_DIR, "positions.csv")
+POSITION_VALUES_FILE = os.path.join(RESULTS_DIR, "position_values.csv")
+POSITIONS_HISTORY_FILE = os.path.join(RESULTS_DIR, "positions_history.csv")  # historia portfeli spoza plików
+POSITION_COLUMNS = ["Portfolio", "Ticker", "Shares", "CostBasis"]
+VALUE_COLUMNS = ["Timestamp", "Portfolio", "Positions", "Value($)", "CostBasis($)", "Change($)", "Change(%)",
+                 "MissingQuotes"]
+
+
+class PositionsTable:
+    """
+    Tabela pozycji zakodowana słownikowo: indeks portfela i kod tickera per wiersz.
+    Wiersze tworzą rzadką macierz portfel × ticker (akcje), więc wycena wszystkich
+    portfeli to jeden iloczyn z wektorem notowań (np.bincount po indeksach portfeli).
+    """
+
+    def __init__(self, positions: pd.DataFrame):
+        df = positions.reindex(columns=POSITION_COLUMNS)
+        df = df[df["Portfolio"].notna() & df["Ticker"].notna()]
+        pf_codes, portfolios = pd.factorize(df["Portfolio"].astype(str), sort=True)
+        tk_codes, tickers = pd.factorize(df["Ticker"].astype(str), sort=True)
+        self.portfolio_id = pf_codes.astype(np.int32)
+        self.ticker_id = tk_codes.astype(np.int32)
+        self.portfolios = np.asarray(portfolios, dtype=object)
+        self.tickers = np.asarray(tickers, dtype=object)
+        self.shares = pd.to_numeric(df["Shares"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+        self.cost = pd.to_numeric(df["CostBasis"], errors="coerce").fillna(0.0).to_numpy(dtype=float)
+
+    def __len__(self):
+        return len(self.shares)
+
+    @property
+    def n_portfolios(self) -> int:
+        return len(self.portfolios)
+
+    def quote_vector(self, prices) -> np.ndarray:
+        """Notowania w kolejności słownika tickerów (NaN dla brakujących)."""
+        return pd.Series(prices, dtype=float).reindex(self.tickers).to_numpy(dtype=float)
+
+    def _per_portfolio(self, weights) -> np.ndarray:
+        return np.bincount(self.portfolio_id, weights=weights, minlength=self.n_portfolios)
+
+    def values(self, quotes: np.ndarray) -> np.ndarray:
+        """Wartość każdego portfela: suma akcji × notowanie (brak notowania liczony jako 0)."""
+        return self._per_portfolio(np.nan_to_num(self.shares * quotes[self.ticker_id]))
+
+    def cost_basis(self) -> np.ndarray:
+        return self._per_portfolio(self.cost)
+
+    def valuation(self, prices, timestamp=None) -> pd.DataFrame:
+        """
+        Wycena wszystkich portfeli naraz (kolumny VALUE_COLUMNS). Portfel z brakującym
+        notowaniem dostaje NaN zamiast zaniżonej wartości (MissingQuotes > 0).
+        """
+        quotes = self.quote_vector(prices)
+        missing = self._per_portfolio(np.isnan(quotes[self.ticker_id])).astype(int)
+        value = np.where(missing > 0, np.nan, self.values(quotes))
+        cost = self.cost_basis()
+        change = np.where(cost > 0, value - cost, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change_pct = np.where(cost > 0, change / cost * 100, 0.0)
+        return pd.DataFrame({
+            "Timestamp": timestamp,
+            "Portfolio": self.portfolios,
+            "Positions": np.bincount(self.portfolio_id, minlength=self.n_portfolios),
+            "Value($)": value,
+            "CostBasis($)": cost,
+            "Change($)": change,
+            "Change(%)": change_pct,
+            "MissingQuotes": missing,
+        }, columns=VALUE_COLUMNS)
+
+    def frame(self) -> pd.DataFrame:
+        """Tabela z powrotem w postaci czytelnej (nazwy zamiast kodów)."""
+        return pd.DataFrame({
+            "Portfolio": self.portfolios[self.portfolio_id],
+            "Ticker": self.tickers[self.ticker_id],
+            "Shares": self.shares,
+            "CostBasis": self.cost,
+        })
+
+
+def portfolio_files(portfolio_dir=PORTFOLIO_DIR) -> list:
+    if not portfolio_dir or not os.path.isdir(portfolio_dir):
+        return []
+    return sorted(f for f in os.listdir(portfolio_dir) if f.endswith(".csv"))
+
+
+def _file_positions(portfolio_dir, files) -> pd.DataFrame:
+    parts = []
+    for fname in files:
+        try:
+            df = pd.read_csv(os.path.join(portfolio_dir, fname))
+        except Exception as e:
+            print(f"Błąd wczytywania {fname}: {e}")
+            continue
+        if df.empty or "Ticker" not in df.columns or "Shares" not in df.columns:
+            print(f"Plik {fname} nie zawiera poprawnych danych.")
+            continue
+        cost = df["CurrentValue($)"] if "CurrentValue($)" in df.columns else np.nan
+        parts.append(pd.DataFrame({"Portfolio": fname, "Ticker": df["Ticker"], "Shares": df["Shares"],
+                                   "CostBasis": cost}))
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=POSITION_COLUMNS)
+
+
+def load_positions(path=POSITIONS_FILE, portfolio_dir=PORTFOLIO_DIR) -> PositionsTable:
+    """Tabela z POSITIONS_FILE uzupełniona o portfele z plików (plik portfela ma pierwszeństwo)."""
+    files = portfolio_files(portfolio_dir)
+    parts = [_file_positions(portfolio_dir, files)]
+    if path and os.path.exists(path):
+        table = pd.read_csv(path, dtype={"Portfolio": str, "Ticker": str})
+        parts.append(table[~table["Portfolio"].isin(files)])
+    return PositionsTable(pd.concat(parts, ignore_index=True))
+
+
+def save_positions(positions: pd.DataFrame, path=POSITIONS_FILE):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    positions.reindex(columns=POSITION_COLUMNS).to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def save_position_values(values: pd.DataFrame, path=POSITION_VALUES_FILE):
+    """Ostatnia wycena wszystkich portfeli (plik nadpisywany w każdym przebiegu)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    values.to_csv(tmp, index=False)
+    os.replace(tmp, path)
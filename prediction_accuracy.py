@@ -0,0 +1,192 @@
+# prediction_accuracy.py
+import os
+from contextlib import closing
+import numpy as np
+import pandas as pd
+
+from data_fetcher import load_close_matrix
+from prediction_store import STORE_FILE, connect
+from trading_calendar import last_session_start
+
+RESULTS_DIR = "results"
+ACCURACY_FILE = os.path.join(RESULTS_DIR, "prediction_accuracy.csv")
+ROLLING_DAYS = 20
+MIN_IC_TICKERS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outcomes (
+    run_id           INTEGER NOT NULL,
+    ticker           TEXT NOT NULL,
+    strategy         TEXT NOT NULL,
+    target_date      TEXT NOT NULL,
+    realized_close   REAL,
+    predicted_growth REAL,
+    realized_growth  REAL,
+    PRIMARY KEY (run_id, ticker)
+);
+CREATE INDEX IF NOT EXISTS idx_outcomes_strategy ON outcomes(strategy, target_date);
+CREATE TABLE IF NOT EXISTS run_ic (
+    run_id      INTEGER PRIMARY KEY,
+    strategy    TEXT NOT NULL,
+    target_date TEXT NOT NULL,
+    n           INTEGER NOT NULL,
+    rank_ic     REAL
+);
+"""
+
+_PENDING = """
+SELECT p.run_id AS RunId, p.timestamp AS Timestamp, p.strategy AS Strategy, p.ticker AS Ticker,
+       p.last_close AS LastClose, p.predicted_growth AS PredictedGrowth
+FROM predictions p
+LEFT JOIN outcomes o ON o.run_id = p.run_id AND o.ticker = p.ticker
+WHERE o.run_id IS NULL AND p.last_close IS NOT NULL AND p.predicted_growth IS NOT NULL
+"""
+
+
+def _connect(path):
+    conn = connect(path)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _bar_dates(timestamps: pd.Series) -> pd.Series:
+    """
+    Dzień słupka, z którego pochodzi LastClose: ostatnia sesja rozpoczęta przed przebiegiem
+    (przebieg o 03:00 w dniu D prognozuje z zamknięcia D-1, więc celem jest zamknięcie D).
+    """
+    anchors = {ts: pd.Timestamp(last_session_start(ts.to_pydatetime()).date()) for ts in timestamps.unique()}
+    return timestamps.map(anchors).astype("datetime64[ns]")
+
+
+def resolve_outcomes(pending: pd.DataFrame, closes: pd.DataFrame) -> pd.DataFrame:
+    """Łączy prognozy z pierwszym zamknięciem po słupku LastClose (merge_asof po wszystkich tickerach naraz)."""
+    if pending.empty or closes.empty:
+        return pd.DataFrame()
+    prices = closes.stack().dropna().reset_index()
+    prices.columns = ["Date", "Ticker", "RealizedClose"]
+    prices["Date"] = prices["Date"].astype("datetime64[ns]")
+    prices = prices.sort_values("Date")
+
+    preds = pending.copy()
+    preds["PredDate"] = _bar_dates(pd.to_datetime(preds["Timestamp"]))
+    preds = preds.sort_values("PredDate")
+    out = pd.merge_asof(
+        preds, prices, left_on="PredDate", right_on="Date", by="Ticker",
+        direction="forward", allow_exact_matches=False
+    ).dropna(subset=["RealizedClose"])
+    out["RealizedGrowth"] = out["RealizedClose"] / out["LastClose"] - 1
+    out["TargetDate"] = out["Date"].dt.strftime("%Y-%m-%d")
+    return out
+
+
+def rank_ic(outcomes: pd.DataFrame) -> pd.DataFrame:
+    """Korelacja rang (Spearman) prognozy i realizacji w każdym przebiegu — wektorowo po przebiegach."""
+    g = outcomes.groupby("RunId")
+    df = pd.DataFrame({
+        "RunId": outcomes["RunId"],
+        "x": g["PredictedGrowth"].rank(),
+        "y": g["RealizedGrowth"].rank(),
+    })
+    df["xy"], df["xx"], df["yy"] = df["x"] * df["y"], df["x"] ** 2, df["y"] ** 2
+    s = df.groupby("RunId").agg(n=("x", "size"), x=("x", "sum"), y=("y", "sum"),
+                                xy=("xy", "sum"), xx=("xx", "sum"), yy=("yy", "sum"))
+    cov = s["xy"] - s["x"] * s["y"] / s["n"]
+    var = (s["xx"] - s["x"] ** 2 / s["n"]) * (s["yy"] - s["y"] ** 2 / s["n"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ic = np.where((s["n"] >= MIN_IC_TICKERS) & (var > 0), cov / np.sqrt(var), np.nan)
+    meta = outcomes.groupby("RunId").agg(Strategy=("Strategy", "first"), TargetDate=("TargetDate", "max"))
+    return meta.assign(N=s["n"], RankIC=ic).reset_index()
+
+
+def update_outcomes(path: str = STORE_FILE, closes: pd.DataFrame = None) -> int:
+    """Rozlicza tylko prognozy, które jeszcze nie mają wyniku, a dla których jest już cena."""
+    if not os.path.exists(path):
+        return 0
+    with closing(_connect(path)) as conn:
+        pending = pd.read_sql_query(_PENDING, conn)
+        if pending.empty:
+            return 0
+        if closes is None:
+            closes = load_close_matrix(sorted(pending["Ticker"].unique()))
+        resolved = resolve_outcomes(pending, closes)
+        if resolved.empty:
+            return 0
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO outcomes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                resolved[["RunId", "Ticker", "Strategy", "TargetDate", "RealizedClose",
+                          "PredictedGrowth", "RealizedGrowth"]].itertuples(index=False, name=None)
+            )
+            # IC przeliczany ze wszystkich rozliczonych pozycji przebiegu (przebieg mógł być rozliczony częściowo)
+            runs = sorted(int(r) for r in resolved["RunId"].unique())
+            ic = rank_ic(pd.read_sql_query(
+                f"""SELECT run_id AS RunId, ticker AS Ticker, strategy AS Strategy, target_date AS TargetDate,
+                           predicted_growth AS PredictedGrowth, realized_growth AS RealizedGrowth
+                    FROM outcomes WHERE run_id IN ({",".join("?" * len(runs))})""", conn, params=runs))
+            conn.executemany(
+                "INSERT OR REPLACE INTO run_ic VALUES (?, ?, ?, ?, ?)",
+                [(int(r), s, d, int(n), None if pd.isna(v) else float(v))
+                 for r, s, d, n, v in ic[["RunId", "Strategy", "TargetDate", "N", "RankIC"]].itertuples(index=False)]
+            )
+    return len(resolved)
+
+
+def accuracy_metrics(path: str = STORE_FILE, rolling_days: int = ROLLING_DAYS) -> pd.DataFrame:
+    """Dzienne i kroczące (rolling_days dni) trafność, MAE i rank-IC dla każdej strategii."""
+    columns = ["Strategy", "Date", "Predictions", "HitRate(%)", "MAE(%)", "RankIC",
+               "RollingHitRate(%)", "RollingMAE(%)", "RollingRankIC"]
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=columns)
+    with closing(_connect(path)) as conn:
+        daily = pd.read_sql_query("""
+            SELECT strategy AS Strategy, target_date AS Date, COUNT(*) AS N,
+                   SUM((predicted_growth > 0) = (realized_growth > 0)) AS Hits,
+                   SUM(ABS(predicted_growth - realized_growth)) AS AbsErr
+            FROM outcomes GROUP BY strategy, target_date
+        """, conn)
+        ic = pd.read_sql_query("""
+            SELECT strategy AS Strategy, target_date AS Date, SUM(rank_ic) AS ICSum, COUNT(rank_ic) AS ICCount
+            FROM run_ic GROUP BY strategy, target_date
+        """, conn)
+    if daily.empty:
+        return pd.DataFrame(columns=columns)
+
+    df = daily.merge(ic, on=["Strategy", "Date"], how="left").fillna({"ICSum": 0.0, "ICCount": 0})
+    df = df.sort_values(["Strategy", "Date"]).reset_index(drop=True)
+    roll = (
+        df.groupby("Strategy")[["N", "Hits", "AbsErr", "ICSum", "ICCount"]]
+        .rolling(rolling_days, min_periods=1).sum()
+        .reset_index(level=0, drop=True)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = pd.DataFrame({
+            "Strategy": df["Strategy"],
+            "Date": df["Date"],
+            "Predictions": df["N"],
+            "HitRate(%)": df["Hits"] / df["N"] * 100,
+            "MAE(%)": df["AbsErr"] / df["N"] * 100,
+            "RankIC": df["ICSum"] / df["ICCount"].replace(0, np.nan),
+            "RollingHitRate(%)": roll["Hits"] / roll["N"] * 100,
+            "RollingMAE(%)": roll["AbsErr"] / roll["N"] * 100,
+            "RollingRankIC": roll["ICSum"] / roll["ICCount"].replace(0, np.nan),
+        })
+    return out[columns]
+
+
+def update_accuracy(path: str = STORE_FILE, out_path: str = ACCURACY_FILE) -> pd.DataFrame:
+    n = update_outcomes(path)
+    metrics = accuracy_metrics(path)
+    if not metrics.empty:
+        metrics.to_csv(out_path, index=False)
+    print(f"Rozliczono {n} nowych prognoz.")
+    return metrics
+
+
+def load_accuracy(path: str = ACCURACY_FILE) -> pd.DataFrame:
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    return pd.read_csv(path)
+
+
+if __name__ == "__main__":
+    print(update_accuracy().groupby("Strategy").tail(1).to_string(index=False))
@@ -0,0 +1,125 @@
+# prediction_store.py
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+import pandas as pd
+
+RESULTS_DIR = "results"
+STORE_FILE = os.path.join(RESULTS_DIR, "predictions.db")
+LEGACY_AI_LOG = "ai_predictions.csv"
+
+PREDICTION_COLUMNS = ["RunId", "Timestamp", "Strategy", "Ticker", "LastClose", "PredictedNextClose", "PredictedGrowth"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id    INTEGER PRIMARY KEY AUTOINCREMENT,
+    strategy  TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS predictions (
+    run_id            INTEGER NOT NULL REFERENCES runs(run_id),
+    timestamp         TEXT NOT NULL,
+    strategy          TEXT NOT NULL,
+    ticker            TEXT NOT NULL,
+    last_close        REAL,
+    predicted_close   REAL,
+    predicted_growth  REAL,
+    PRIMARY KEY (run_id, ticker)
+);
+CREATE INDEX IF NOT EXISTS idx_runs_strategy ON runs(strategy, run_id);
+CREATE INDEX IF NOT EXISTS idx_predictions_ticker ON predictions(ticker, strategy, timestamp);
+"""
+
+_SELECT = """
+SELECT run_id AS RunId, timestamp AS Timestamp, strategy AS Strategy, ticker AS Ticker,
+       last_close AS LastClose, predicted_close AS PredictedNextClose, predicted_growth AS PredictedGrowth
+FROM predictions
+"""
+
+
+def connect(path: str = STORE_FILE) -> sqlite3.Connection:
+    """Połączenie z magazynem prognoz (tworzy schemat przy pierwszym użyciu)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    # WAL: odczyty (dashboard, scheduler) nie blokują zapisu kolejnego przebiegu
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _rows(df, run_id, timestamp, strategy):
+    predicted_close = df["PredictedNextClose"] if "PredictedNextClose" in df.columns else pd.Series(None, index=df.index)
+    return [
+        (run_id, timestamp, strategy, t, _num(lc), _num(pc), _num(g))
+        for t, lc, pc, g in zip(df["Ticker"], df["LastClose"], predicted_close, df["PredictedGrowth"])
+    ]
+
+
+def _num(v):
+    return None if pd.isna(v) else float(v)
+
+
+def save_run(strategy, predictions: pd.DataFrame, timestamp=None, path: str = STORE_FILE) -> int:
+    """Dopisuje prognozy jednego przebiegu strategii; zwraca identyfikator przebiegu."""
+    timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with closing(connect(path)) as conn, conn:
+        run_id = conn.execute(
+            "INSERT INTO runs (strategy, timestamp) VALUES (?, ?)", (strategy, timestamp)
+        ).lastrowid
+        conn.executemany(
+            "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?, ?, ?)",
+            _rows(predictions, run_id, timestamp, strategy)
+        )
+    return run_id
+
+
+def latest_run(strategy, path: str = STORE_FILE) -> pd.DataFrame:
+    """Prognozy z ostatniego przebiegu strategii."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=PREDICTION_COLUMNS)
+    with closing(connect(path)) as conn:
+        return pd.read_sql_query(
+            _SELECT + "WHERE run_id = (SELECT MAX(run_id) FROM runs WHERE strategy = ?)",
+            conn, params=(strategy,)
+        )
+
+
+def ticker_history(ticker, strategy=None, path: str = STORE_FILE) -> pd.DataFrame:
+    """Wszystkie prognozy dla tickera (opcjonalnie jednej strategii), od najstarszej."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=PREDICTION_COLUMNS)
+    query, params = _SELECT + "WHERE ticker = ?", [ticker]
+    if strategy is not None:
+        query += " AND strategy = ?"
+        params.append(strategy)
+    with closing(connect(path)) as conn:
+        return pd.read_sql_query(query + " ORDER BY timestamp, run_id", conn, params=params)
+
+
+def load_predictions(strategy=None, after_run=0, path: str = STORE_FILE) -> pd.DataFrame:
+    """Prognozy z przebiegów o run_id > after_run (np. tylko nowe od ostatniego odczytu)."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=PREDICTION_COLUMNS)
+    query, params = _SELECT + "WHERE run_id > ?", [after_run]
+    if strategy is not None:
+        query += " AND strategy = ?"
+        params.append(strategy)
+    with closing(connect(path)) as conn:
+        return pd.read_sql_query(query + " ORDER BY run_id", conn, params=params)
+
+
+def import_csv_log(csv_path=LEGACY_AI_LOG, strategy="AI", path: str = STORE_FILE) -> int:
+    """Jednorazowy import starego logu CSV (każdy Timestamp = jeden przebieg)."""
+    if not os.path.exists(csv_path):
+        return 0
+    with closing(connect(path)) as conn:
+        if conn.execute("SELECT 1 FROM runs WHERE strategy = ? LIMIT 1", (strategy,)).fetchone():
+            return 0
+    df = pd.read_csv(csv_path)
+    if not {"Timestamp", "Ticker", "LastClose", "PredictedGrowth"}.issubset(df.columns):
+        return 0
+    df = df.dropna(subset=["Ticker", "PredictedGrowth"])
+    for ts, run in df.groupby("Timestamp", sort=True):
+        save_run(strategy, run.drop_duplicates("Ticker", keep="last"), timestamp=str(ts), path=path)
+    return df["Timestamp"].nunique()
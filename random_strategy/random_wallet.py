@@ -1,8 +1,7 @@
-import time
-import random
 import numpy as np
 import pandas as pd
-import yfinance as yf
+
+from market_data import get_latest_prices
 
 
 def generate_random_portfolio(
@@ -28,35 +27,7 @@ def generate_random_portfolio(
         "Investment($)": allocations
     })
 
-    for attempt in range(3):
-        try:
-            data = yf.download(
-                selected,
-                period="1d",
-                progress=False,
-                auto_adjust=True,
-                threads=True
-            )
-
-            if isinstance(data.columns, pd.MultiIndex):
-                prices = data["Close"].iloc[-1]
-            else:
-                prices = data["Close"].iloc[-1]
-            break
-        except Exception as e:
-            time.sleep(random.uniform(1.0, 2.0))
-    else:
-        prices_dict = {}
-        for t in selected:
-            try:
-                info = yf.Ticker(t).history(period="1d", auto_adjust=True)
-                if not info.empty:
-                    prices_dict[t] = info["Close"].iloc[-1]
-            except Exception:
-                continue
-        prices = pd.Series(prices_dict)
-
-    prices = prices.dropna()
+    prices = get_latest_prices(selected).dropna()
     available_tickers = list(prices.index)
     missing = set(selected) - set(available_tickers)
     if missing:
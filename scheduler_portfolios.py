@@ -1,46 +1,112 @@
+import csv
 import os
-import time
 import re
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
+import numpy as np
 import pandas as pd
-import yfinance as yf
+
+import market_data
+import monitoring
+from portfolio_allocator import allocate_batch
+from portfolio_ledger import has_ledger, record_holdings
+from portfolio_risk import load_risk_metrics
+from positions_table import POSITIONS_FILE, load_positions, portfolio_files, save_position_values
+from scheduler_state import load_scheduler_state, mark, save_scheduler_state
+from tactics.rebalance_delta import NO_TRADE_BAND, compute_trades, load_cached_signals, rebalance_delta, \
+    target_weights_from_signals
+from trading_calendar import quotes_may_have_changed, to_market_time, trading_days_between
+from trigger_engine import evaluate_triggers, load_trigger_state, reset_portfolio_state, save_trigger_state
 
 PORTFOLIO_DIR = "results/portfolios"
 LOG_DIR = "results/update_logs"
 os.makedirs(LOG_DIR, exist_ok=True)
 
 LOG_FILE = os.path.join(LOG_DIR, "scheduler_portfolio_log.csv")
+LOG_COLUMNS = ["Timestamp", "Level", "Portfolio", "Message"]
+SCHEDULER_INTERVAL_MINUTES = float(os.getenv("SCHEDULER_INTERVAL_MINUTES", "0"))  # 0 — jeden przebieg
 
-REBALANCE_INTERVAL_DAYS = 2
+REBALANCE_INTERVAL_DAYS = 2  # dni sesyjne
 TRIGGER_DROP_THRESHOLD = 0.05  # 5%
-SLEEP_BETWEEN = 3
+TRIGGER_DRAWDOWN_THRESHOLD = 0.10  # 10% od szczytu wartości portfela
+TRIGGER_TRAILING_STOP = 0.10  # 10% od najwyższej ceny pozycji
+TRIGGER_WEIGHT_DRIFT = 0.05  # 5 p.p. odchylenia od wagi docelowej
+REBALANCE_METHOD = "equal"  # equal / risk_parity / min_variance
+SIGNAL_STRATEGIES = {"AI", "NEWS"}  # rebalans do sygnałów strategii z cache (zamiast REBALANCE_METHOD)
+SIGNAL_TOP_N = 10
+POSITIONS_KEY = os.path.basename(POSITIONS_FILE)  # wpis tabeli pozycji w stanie harmonogramu
+
+
+_LEGACY_ENTRY = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),(.*)$")
+_LEGACY_PORTFOLIO = re.compile(r"\b([A-Z]+_[A-Z]+\.csv)\b")
+
+
+_LEVELS = ("INFO", "WARNING", "ERROR")
+
+
+def _legacy_rows(path):
+    """Wpisy starego logu "czas,komunikat" (komunikat bez cudzysłowów, czasem wielowierszowy)."""
+    rows, out = [], []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            m = _LEGACY_ENTRY.match(line)
+            if m and m.group(2).split(",", 1)[0] in _LEVELS:
+                out.append(next(csv.reader([line])))  # wpis już w nowym formacie
+            elif m:
+                rows.append([m.group(1), m.group(2)])
+            elif rows:
+                rows[-1][1] += " " + line
+    for ts, msg in rows:
+        msg = " ".join(msg.split())
+        level = "ERROR" if "Błąd" in msg else "WARNING" if "⚠️" in msg else "INFO"
+        pf = _LEGACY_PORTFOLIO.search(msg)
+        out.append([ts, level, pf.group(1) if pf else "", msg])
+    return sorted(out, key=lambda r: r[0])
+
+
+def migrate_log(path=LOG_FILE):
+    """Jednorazowo przepisuje stary log (bez nagłówka) do kolumn LOG_COLUMNS w tym samym pliku."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, encoding="utf-8", errors="replace") as f:
+        if f.readline().rstrip("\r\n") == ",".join(LOG_COLUMNS):
+            return
+
+    rows = _legacy_rows(path)
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(LOG_COLUMNS)
+        writer.writerows(rows)
+    os.replace(tmp, path)
+    print(f"📝 Przepisano {len(rows)} wpisów logu harmonogramu do nowych kolumn ({path}).")
+
 
+_log = monitoring.BufferedLog(LOG_FILE, LOG_COLUMNS)
 
-def log(msg: str):
+
+def log(msg: str, level: str = "INFO", portfolio: str = ""):
     ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{ts}] {msg}")
-    with open(LOG_FILE, "a") as f:
-        f.write(f"{ts},{msg}\n")
+    _log.write(Timestamp=ts, Level=level, Portfolio=portfolio, Message=msg.strip())
+    if level == "ERROR":
+        monitoring.inc("errors_total", process="scheduler")
 
 
 def get_latest_prices(tickers):
-    data = yf.download(tickers, period="1d", progress=False, auto_adjust=True)
-    if isinstance(data.columns, pd.MultiIndex):
-        prices = data["Close"].iloc[-1]
-    else:
-        prices = data.iloc[-1]
-    return prices
+    return market_data.get_latest_prices(tickers)
 
 
 def load_portfolio(path):
     try:
         df = pd.read_csv(path)
         if "Ticker" not in df.columns:
-            log(f"Brak kolumny 'Ticker' w {path}. Pomijam.")
+            log(f"Brak kolumny 'Ticker' w {path}. Pomijam.", level="WARNING")
             return None
         return df
     except Exception as e:
-        log(f"Błąd wczytywania {path}: {e}")
+        log(f"Błąd wczytywania {path}: {e}", level="ERROR")
         return None
 
 
@@ -57,27 +123,130 @@ def update_portfolio(df, prices):
 
 
 
-def trigger_rebalance(df):
-    drops = df["Change(%)"] < -TRIGGER_DROP_THRESHOLD * 100
-    if drops.any():
-        log(f"Spadki > {TRIGGER_DROP_THRESHOLD*100:.1f}% — rebalans wykonany.")
-        df["Weight"] = 1 / len(df)
-        total_val = df["NewValue($)"].sum()
-        df["Investment($)"] = df["Weight"] * total_val
-        df["Shares"] = df["Investment($)"] / df["NewPrice"]
+def batch_target_weights(portfolios):
+    """Wagi alokatora dla wszystkich portfeli z rebalansem naraz (jedna macierz cen i kowariancja)."""
+    if REBALANCE_METHOD == "equal":
+        return {}
+    candidates = {fname: df["Ticker"].tolist() for fname, (_, tactic, df) in portfolios.items()
+                  if tactic in ("REGULAR", "TRIGGER")}
+    if not candidates:
+        return {}
+    try:
+        return allocate_batch(candidates, method=REBALANCE_METHOD)
+    except Exception as e:
+        log(f"Alokator {REBALANCE_METHOD} niedostępny ({e}) — używam równych wag.", level="WARNING")
+        return {}
+
+
+def target_weights(df, weights=None):
+    """Docelowe wagi przy rebalansie: z alokatora (batch_target_weights) albo równe."""
+    if weights is None or weights.sum() <= 0:
+        return pd.Series(1 / len(df), index=df.index)
+    return df["Ticker"].map(weights).fillna(0.0)
+
+
+def carry_cost_basis(old, new):
+    """
+    Koszt nabycia pozycji po rebalansie (jak w księdze): dokupione akcje po NewPrice zwiększają
+    koszt, sprzedaż zmniejsza go proporcjonalnie. Price — średnia cena zakupu, CurrentValue($) — koszt.
+    """
+    held = old.set_index("Ticker")
+    old_shares = new["Ticker"].map(held["Shares"]).fillna(0.0)
+    old_cost = new["Ticker"].map(held["Shares"] * held["Price"]).fillna(0.0)
+    delta = new["Shares"] - old_shares
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kept = np.where(old_shares > 0, old_cost * new["Shares"] / old_shares, 0.0)
+        cost = np.where(delta > 0, old_cost + delta * new["NewPrice"], kept)
+        new["Price"] = np.where(new["Shares"] > 0, cost / new["Shares"], new["NewPrice"])
+    new["CurrentValue($)"] = cost
+    new["NewValue($)"] = new["Shares"] * new["NewPrice"]
+    new["Change(%)"] = (new["NewPrice"] / new["Price"] - 1) * 100
+    return new
+
+
+def rebalance_to_targets(df, allocation=None):
+    """Przesuwa tylko pozycje, których waga odbiega od docelowej o więcej niż NO_TRADE_BAND."""
+    old = df[["Ticker", "Shares", "Price"]].copy()
+    weights = target_weights(df, allocation)
+    trades = compute_trades(
+        df[["Ticker", "Shares"]],
+        pd.Series(weights.to_numpy(), index=df["Ticker"]),
+        df.set_index("Ticker")["NewPrice"],
+        no_trade_band=NO_TRADE_BAND
+    ).set_index("Ticker")
+    n_trades = int((trades["Action"] != "HOLD").sum())
+    log(f"Transakcje: {n_trades}/{len(df)} pozycji, obrót ${trades['TradeValue($)'].abs().sum():,.2f}")
+
+    df["Weight"] = weights
+    df["Shares"] = df["Ticker"].map(trades["TargetShares"])
+    df["Investment($)"] = df["Shares"] * df["NewPrice"]
+    return carry_cost_basis(old, df)
+
+
+def evaluate_portfolio_triggers(portfolios, prices, state):
+    """Wszystkie reguły TRIGGER dla wszystkich portfeli w jednym przebiegu."""
+    positions = pd.concat(
+        [df.assign(Portfolio=fname) for fname, (_, _, df) in portfolios.items()],
+        ignore_index=True
+    )
+    risk = load_risk_metrics()
+    seed_peaks = {}
+    if not risk.empty:
+        seed_peaks = (risk["Value($)"] / (1 + risk["Drawdown(%)"] / 100)).set_axis(risk["Portfolio"]).to_dict()
+
+    rules = {
+        "PositionDrop": TRIGGER_DROP_THRESHOLD,
+        "TrailingStop": TRIGGER_TRAILING_STOP,
+        "PortfolioDrawdown": TRIGGER_DRAWDOWN_THRESHOLD,
+        "WeightDrift": TRIGGER_WEIGHT_DRIFT,
+    }
+    pf_flags, _, state = evaluate_triggers(positions, prices, state, rules, seed_peaks=seed_peaks)
+    reasons = {
+        row["Portfolio"]: [r for r in rules if r in pf_flags.columns and row[r]]
+        for _, row in pf_flags.iterrows()
+    }
+    return reasons, state
+
+
+def rebalance_to_signals(df, signals, prices):
+    """
+    Rebalans przyrostowy do sygnałów z cache (TOP N wg prognozy): spółki mogą wejść i wyjść.
+    Transakcje po bieżących cenach zmieniają tylko liczbę akcji; koszt nabycia pozycji
+    nietkniętych zostaje bez zmian (carry_cost_basis).
+    """
+    current = df[["Ticker", "Shares"]].assign(Price=df["NewPrice"])
+    new, _, _ = rebalance_delta(current, signals, prices, top_n=SIGNAL_TOP_N, no_trade_band=NO_TRADE_BAND)
+    new["NewPrice"] = new["Price"]
+    new["Investment($)"] = new["Shares"] * new["NewPrice"]
+    new = carry_cost_basis(df[["Ticker", "Shares", "Price"]], new)
+    return new.reindex(columns=list(dict.fromkeys(list(df.columns) + list(new.columns))))
+
+
+def rebalance(df, signals=None, prices=None, allocation=None):
+    """Rebalans do sygnałów strategii, gdy są w cache; w przeciwnym razie do wag docelowych."""
+    if signals is not None and not signals.empty:
+        try:
+            return rebalance_to_signals(df, signals, prices)
+        except ValueError as e:
+            log(f"Rebalans do sygnałów niemożliwy ({e}) — używam wag {REBALANCE_METHOD}.", level="WARNING")
+    return rebalance_to_targets(df, allocation)
+
+
+def trigger_rebalance(df, reasons, signals=None, prices=None, allocation=None):
+    if reasons:
+        log(f"Wyzwalacze: {', '.join(reasons)} — rebalans wykonany.")
+        df = rebalance(df, signals, prices, allocation)
     return df
 
 
-def regular_rebalance(df, path):
-    """Rebalans co X dni."""
-    mtime = datetime.fromtimestamp(os.path.getmtime(path))
-    if datetime.now() - mtime >= timedelta(days=REBALANCE_INTERVAL_DAYS):
-        log(f"🔄 Minęło {REBALANCE_INTERVAL_DAYS} dni — rebalans wykonany.")
-        total_val = df["NewValue($)"].sum()
-        df["Weight"] = 1 / len(df)
-        df["Investment($)"] = df["Weight"] * total_val
-        df["Shares"] = df["Investment($)"] / df["NewPrice"]
-    return df
+def regular_rebalance(df, last_rebalance, signals=None, prices=None, allocation=None):
+    """Rebalans co X dni sesyjnych od ostatniego rebalansu (ze stanu harmonogramu)."""
+    days = trading_days_between(to_market_time(last_rebalance), to_market_time())
+    if days >= REBALANCE_INTERVAL_DAYS:
+        log(f"🔄 Minęło {days} dni sesyjnych — rebalans wykonany.")
+        return rebalance(df, signals, prices, allocation), True
+    log(f"Od rebalansu minęło {days}/{REBALANCE_INTERVAL_DAYS} dni sesyjnych — bez zmian.")
+    return df, False
 
 
 def static_rebalance(df):
@@ -88,50 +257,150 @@ def static_rebalance(df):
 # === GŁÓWNY SCHEDULER ===
 
 def run_scheduler():
+    migrate_log()
+    start = time.perf_counter()
+    result = "error"
+    try:
+        result = _run_scheduler()
+    except Exception as e:
+        log(f"Przebieg przerwany błędem: {e}", level="ERROR")
+        raise
+    finally:
+        monitoring.inc("runs_total", process="scheduler", result=result)
+        monitoring.observe("run_seconds", time.perf_counter() - start, process="scheduler")
+        monitoring.set_gauge("last_run_timestamp_seconds", time.time(), process="scheduler")
+        _log.flush()
+        monitoring.write_textfile("scheduler")
+
+
+def _run_scheduler():
     log("Start aktualizacji wszystkich portfeli\n")
 
-    files = [f for f in os.listdir(PORTFOLIO_DIR) if f.endswith(".csv")]
-    if not files:
+    files = portfolio_files(PORTFOLIO_DIR)
+    if not files and not os.path.exists(POSITIONS_FILE):
         log("Brak portfeli w katalogu.")
-        return
+        return "empty"
 
+    portfolios = {}
     for fname in files:
-        path = os.path.join(PORTFOLIO_DIR, fname)
         match = re.match(r"([A-Z]+)_([A-Z]+)\.csv", fname)
         if not match:
-            log(f"Nie rozpoznano wzorca nazwy pliku: {fname}")
+            log(f"Nie rozpoznano wzorca nazwy pliku: {fname}", level="WARNING")
             continue
-
-        strategy, tactic = match.groups()
-        log(f"\n Aktualizacja portfela: {fname} | Strategia={strategy}, Taktyka={tactic}")
-
-        df = load_portfolio(path)
+        df = load_portfolio(os.path.join(PORTFOLIO_DIR, fname))
         if df is None or df.empty:
             continue
+        strategy, tactic = match.groups()
+        portfolios[fname] = (strategy, tactic, df)
+
+    # portfele spoza plików (tabela pozycji): jedna wycena dla wszystkich, bez taktyk rebalansu
+    table = load_positions(portfolio_dir=PORTFOLIO_DIR)
+    table_only = [p for p in table.portfolios if p not in portfolios]
+    monitoring.set_gauge("portfolios", len(portfolios) + len(table_only), process="scheduler")
+    if not portfolios and not table_only:
+        return "empty"
+
+    sched_state = load_scheduler_state()
+    for fname in portfolios:
+        if sched_state.get(fname, {}).get("LastRebalance") is None:
+            # brak stanu: jedyną wskazówką jest czas zapisu pliku (np. wygenerowanego przez main)
+            mtime = datetime.fromtimestamp(os.path.getmtime(os.path.join(PORTFOLIO_DIR, fname)))
+            mark(sched_state, fname, mtime, LastRebalance=True)
+
+    # poza sesją (weekend, święto, po zamknięciu) notowania się nie zmienią — bez zapytań sieciowych
+    quote_keys = list(portfolios) + ([POSITIONS_KEY] if table_only else [])
+    if not any(quotes_may_have_changed(sched_state.get(k, {}).get("LastQuote")) for k in quote_keys):
+        log("Rynek zamknięty i brak nowych notowań od ostatniej wyceny — pomijam przebieg.")
+        save_scheduler_state(sched_state)
+        return "skipped"
+
+    # sygnały AI/NEWS z cache (bez przebudowy strategii) dla portfeli z rebalansem
+    signals = {}
+    for strategy, tactic, _ in portfolios.values():
+        if strategy in SIGNAL_STRATEGIES and tactic in ("REGULAR", "TRIGGER") and strategy not in signals:
+            try:
+                signals[strategy] = load_cached_signals(strategy)
+            except Exception as e:
+                log(f"Błąd wczytywania sygnałów {strategy}: {e}", level="WARNING")
+    signal_tickers = {t for s in signals.values() for t in target_weights_from_signals(s, SIGNAL_TOP_N).index}
+
+    # jedno pobranie notowań dla wszystkich portfeli (i kandydatów z sygnałów)
+    all_tickers = sorted({t for _, _, df in portfolios.values() for t in df["Ticker"]}
+                         | set(table.tickers) | signal_tickers)
+    prices = get_latest_prices(all_tickers)
+    quote_time = datetime.now()
+
+    if table_only:
+        with monitoring.timer("valuation_seconds", process="scheduler", tactic="TABLE"):
+            values = table.valuation(prices, quote_time.strftime("%Y-%m-%d %H:%M:%S"))
+            save_position_values(values)
+        others = values[values["Portfolio"].isin(table_only)]
+        log(f"Wyceniono {len(others)} portfeli z tabeli pozycji | Wartość=${others['Value($)'].sum():,.2f}"
+            f" | bez notowań: {int((others['MissingQuotes'] > 0).sum())}")
+        mark(sched_state, POSITIONS_KEY, quote_time, LastValuation=True, LastQuote=True)
+
+    allocations = batch_target_weights(portfolios)
+    trigger_state = load_trigger_state()
+    triggers = {}
+    holdings = {}  # tickery portfeli po rebalansie (przycinanie stanu triggerów)
+    if portfolios:
+        triggers, trigger_state = evaluate_portfolio_triggers(portfolios, prices, trigger_state)
+
+    for fname, (strategy, tactic, df) in portfolios.items():
+        started = time.perf_counter()
+        path = os.path.join(PORTFOLIO_DIR, fname)
+        log(f"\n Aktualizacja portfela: {fname} | Strategia={strategy}, Taktyka={tactic}", portfolio=fname)
+        if not has_ledger(fname):
+            try:
+                # pierwszy zapis do księgi (INIT) po cenach zakupu
+                record_holdings(fname, df)
+            except Exception as e:
+                log(f"Błąd zapisu księgi {fname}: {e}", level="ERROR", portfolio=fname)
 
-        tickers = df["Ticker"].tolist()
-        prices = get_latest_prices(tickers)
         df, total_value = update_portfolio(df, prices)
 
+        rebalanced = False
         if "TRIGGER" in tactic:
-            df = trigger_rebalance(df)
+            reasons = triggers.get(fname, [])
+            df = trigger_rebalance(df, reasons, signals.get(strategy), prices, allocations.get(fname))
+            if reasons:
+                trigger_state = reset_portfolio_state(trigger_state, fname)
+                rebalanced = True
         elif "REGULAR" in tactic:
-            df = regular_rebalance(df, path)
+            df, rebalanced = regular_rebalance(df, sched_state[fname]["LastRebalance"], signals.get(strategy), prices,
+                                               allocations.get(fname))
         elif "STATIC" in tactic:
             df = static_rebalance(df)
         else:
-            log(f"Nieznana taktyka: {tactic}")
+            log(f"Nieznana taktyka: {tactic}", level="WARNING", portfolio=fname)
             continue
 
-        # Zapis
+        # Zapis (księga transakcji + bieżący widok CSV); ręczne zmiany pliku trafiają tu razem z rebalansem
+        try:
+            record_holdings(fname, df, prices=df.set_index("Ticker")["NewPrice"])
+        except Exception as e:
+            log(f"Błąd zapisu księgi {fname}: {e}", level="ERROR", portfolio=fname)
         save_portfolio(df, path)
+        holdings[fname] = df["Ticker"].tolist()
+        mark(sched_state, fname, quote_time, LastValuation=True, LastQuote=True, LastRebalance=rebalanced)
+        monitoring.observe("valuation_seconds", time.perf_counter() - started, process="scheduler", tactic=tactic)
         total_change = (df["NewValue($)"].sum() / df["CurrentValue($)"].sum() - 1) * 100
-        log(f"Zaktualizowano {fname} | Δ {total_change:+.2f}% | Wartość=${total_value:,.2f}\n")
-
-        time.sleep(SLEEP_BETWEEN)
+        log(f"Zaktualizowano {fname} | Δ {total_change:+.2f}% | Wartość=${total_value:,.2f}\n", portfolio=fname)
 
+    save_trigger_state(trigger_state, holdings=holdings)
+    save_scheduler_state(sched_state)
     log("Zakończono harmonogram aktualizacji wszystkich portfeli.\n")
+    return "ok"
 
 
 if __name__ == "__main__":
+    if os.getenv("METRICS_PORT"):
+        monitoring.start_server()
     run_scheduler()
+    # tryb ciągły: kolejne przebiegi co SCHEDULER_INTERVAL_MINUTES (endpoint metryk działa między nimi)
+    while SCHEDULER_INTERVAL_MINUTES > 0:
+        time.sleep(SCHEDULER_INTERVAL_MINUTES * 60)
+        try:
+            run_scheduler()
+        except Exception:
+            pass  # błąd zapisany w logu i metrykach; kolejny przebieg za interwał
@@ -0,0 +1,49 @@
+# scheduler_state.py
+import os
+from datetime import datetime
+import pandas as pd
+
+RESULTS_DIR = "results"
+SCHEDULER_STATE_FILE = os.path.join(RESULTS_DIR, "scheduler_state.csv")
+STATE_COLUMNS = ["Portfolio", "LastRebalance", "LastValuation", "LastQuote"]
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def load_scheduler_state(path: str = SCHEDULER_STATE_FILE) -> dict:
+    """Stan harmonogramu: {portfel: {LastRebalance, LastValuation, LastQuote}} (znaczniki jako datetime)."""
+    if not os.path.exists(path):
+        return {}
+    df = pd.read_csv(path).reindex(columns=STATE_COLUMNS)
+    state = {}
+    for row in df.itertuples(index=False):
+        state[row.Portfolio] = {
+            col: datetime.strptime(val, TS_FORMAT) if isinstance(val, str) else None
+            for col, val in zip(STATE_COLUMNS[1:], row[1:])
+        }
+    return state
+
+
+def save_scheduler_state(state: dict, path: str = SCHEDULER_STATE_FILE):
+    rows = [
+        [name] + [v.strftime(TS_FORMAT) if v is not None else None for v in (entry.get(c) for c in STATE_COLUMNS[1:])]
+        for name, entry in sorted(state.items())
+    ]
+    pd.DataFrame(rows, columns=STATE_COLUMNS).to_csv(path, index=False)
+
+
+def mark(state: dict, portfolio, when=None, **fields):
+    """Ustawia wybrane znaczniki portfela (np. mark(state, f, LastRebalance=True))."""
+    when = when or datetime.now()
+    entry = state.setdefault(portfolio, {c: None for c in STATE_COLUMNS[1:]})
+    for field, on in fields.items():
+        if on:
+            entry[field] = when
+    return state
+
+
+def mark_rebalanced(portfolio, when=None, path: str = SCHEDULER_STATE_FILE):
+    """Zapisuje moment rebalansu/utworzenia portfela poza harmonogramem (main, taktyki)."""
+    state = load_scheduler_state(path)
+    mark(state, os.path.basename(portfolio), when, LastRebalance=True)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    save_scheduler_state(state, path)
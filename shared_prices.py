@@ -0,0 +1,117 @@
+# shared_prices.py
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+from data_fetcher import DATA_DIR, load_price_matrices
+
+# Macierz cen (pole × data × ticker) wczytana raz i udostępniona procesom przez pamięć
+# współdzieloną; procesy robocze dostają widoki NumPy bez kopii i bez ponownego parsowania CSV.
+FIELDS = ("Close", "Volume")
+DTYPE = "float64"
+
+_worker_prices = None  # macierz podłączona w procesie roboczym (map_tickers)
+
+
+class SharedPrices:
+    """Widoki na blok pamięci współdzielonej opisany deskryptorem (nazwa, kształt, typ, tickery, daty)."""
+
+    def __init__(self, shm, descriptor, owner=False):
+        self.shm = shm
+        self.descriptor = descriptor
+        self.owner = owner
+        self.tickers = descriptor["tickers"]
+        self.fields = descriptor["fields"]
+        self.dates = pd.DatetimeIndex(descriptor["dates"], name="Date")
+        self._col = {t: j for j, t in enumerate(self.tickers)}
+        self._data = np.ndarray(tuple(descriptor["shape"]), dtype=descriptor["dtype"], buffer=shm.buf)
+
+    def field(self, name="Close") -> np.ndarray:
+        """Macierz data × ticker jednego pola (widok, bez kopii)."""
+        return self._data[self.fields.index(name)]
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.field("Close")
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.field("Volume")
+
+    def column(self, ticker, field="Close") -> np.ndarray:
+        """Kolumna jednego tickera (widok; NaN w dniach bez notowań)."""
+        return self.field(field)[:, self._col[ticker]]
+
+    def frame(self, field="Close") -> pd.DataFrame:
+        """Pole jako DataFrame (data × ticker) oparty na tym samym buforze."""
+        return pd.DataFrame(self.field(field), index=self.dates, columns=self.tickers, copy=False)
+
+    def close_shm(self):
+        """Odłącza blok (widoki zwrócone wcześniej nie mogą już być używane)."""
+        self._data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close_shm()
+
+
+def publish_prices(tickers=None, fields=FIELDS, data_dir=None) -> SharedPrices:
+    """Buduje macierz z plików cen i kopiuje ją raz do nowego bloku pamięci współdzielonej."""
+    data_dir = data_dir if data_dir is not None else DATA_DIR
+    if tickers is None:
+        tickers = sorted(p[:-4] for p in os.listdir(data_dir) if p.endswith(".csv"))
+    frames = load_price_matrices(tickers, columns=tuple(fields), data_dir=data_dir)
+    first = frames[fields[0]]
+    tickers = list(first.columns)
+    shape = (len(fields), len(first.index), len(tickers))
+
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * np.dtype(DTYPE).itemsize, 1))
+    descriptor = {
+        "name": shm.name,
+        "shape": shape,
+        "dtype": DTYPE,
+        "fields": list(fields),
+        "tickers": tickers,
+        "dates": [d.strftime("%Y-%m-%d %H:%M:%S") for d in first.index],
+    }
+    prices = SharedPrices(shm, descriptor, owner=True)
+    for i, f in enumerate(fields):
+        prices._data[i] = frames[f].reindex(index=first.index, columns=tickers).to_numpy(dtype=DTYPE)
+    return prices
+
+
+def attach(descriptor) -> SharedPrices:
+    """Podłącza istniejący blok (w procesie roboczym); blok usuwa tylko proces, który go utworzył."""
+    if sys.version_info >= (3, 13):
+        shm = shared_memory.SharedMemory(name=descriptor["name"], track=False)
+    else:
+        # procesy puli dzielą resource trackera z procesem głównym — rejestracja nie duplikuje bloku
+        shm = shared_memory.SharedMemory(name=descriptor["name"])
+    return SharedPrices(shm, descriptor)
+
+
+def _init_worker(descriptor):
+    global _worker_prices
+    _worker_prices = attach(descriptor)
+
+
+def _call(func, ticker):
+    return ticker, func(_worker_prices, ticker)
+
+
+def map_tickers(func, prices: SharedPrices, tickers=None, workers=None) -> dict:
+    """
+    func(prices, ticker) dla każdego tickera w puli procesów; każdy proces podłącza
+    macierz raz przy starcie, a do zadań trafia tylko nazwa tickera.
+    """
+    tickers = prices.tickers if tickers is None else tickers
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(prices.descriptor,)) as pool:
+        return dict(pool.map(_call, [func] * len(tickers), tickers, chunksize=max(len(tickers) // 32, 1)))
@@ -0,0 +1,133 @@
+import os
+import numpy as np
+import pandas as pd
+
+from market_data import get_latest_prices
+from prediction_store import latest_run
+
+NEWS_SIGNALS_FILE = os.path.join("results", "ai_news_predictions.csv")
+NO_TRADE_BAND = 0.02  # różnica wag poniżej 2 p.p. — bez transakcji
+PORTFOLIO_COLUMNS = ["Ticker", "Weight", "Investment($)", "Price", "Shares", "CurrentValue($)"]
+
+
+def fetch_latest_prices(tickers):
+    try:
+        return get_latest_prices(list(tickers))
+    except Exception:
+        return pd.Series(dtype=float)
+
+
+def load_cached_signals(strategy):
+    """Ostatnie zapisane sygnały strategii (Ticker, LastClose, PredictedGrowth)."""
+    columns = ["Ticker", "LastClose", "PredictedGrowth"]
+    if strategy.upper() == "AI":
+        # ostatni przebieg z magazynu prognoz
+        df = latest_run("AI")
+    elif strategy.upper() == "NEWS" and os.path.exists(NEWS_SIGNALS_FILE):
+        df = pd.read_csv(NEWS_SIGNALS_FILE)
+    else:
+        return pd.DataFrame(columns=columns)
+
+    if not set(columns).issubset(df.columns):
+        return pd.DataFrame(columns=columns)
+    df = df.dropna(subset=["PredictedGrowth"])
+    return df[columns].drop_duplicates("Ticker", keep="last").reset_index(drop=True)
+
+
+def target_weights_from_signals(signals, top_n=10):
+    """Wagi docelowe: TOP N wg PredictedGrowth, proporcjonalnie do prognozy (jak generate_portfolio)."""
+    df = signals[signals["PredictedGrowth"] > 0]
+    df = df.sort_values("PredictedGrowth", ascending=False).head(top_n)
+    if df.empty:
+        return pd.Series(dtype=float)
+    return pd.Series(
+        (df["PredictedGrowth"] / df["PredictedGrowth"].sum()).to_numpy(),
+        index=df["Ticker"].to_numpy()
+    )
+
+
+def compute_trades(holdings, target_weights, prices, no_trade_band=NO_TRADE_BAND, allow_fractional=True):
+    """Lista transakcji (BUY/SELL/HOLD) prowadząca od obecnych pozycji do wag docelowych."""
+    current = holdings.groupby("Ticker")["Shares"].sum()
+    tickers = list(dict.fromkeys(list(current.index) + list(target_weights.index)))
+
+    px = pd.Series(prices, dtype=float).reindex(tickers).to_numpy()
+    shares = current.reindex(tickers).fillna(0.0).to_numpy(dtype=float)
+    target_w = target_weights.reindex(tickers).fillna(0.0).to_numpy(dtype=float)
+    priced = np.isfinite(px) & (px > 0)
+
+    values = np.where(priced, shares * px, 0.0)
+    total = values.sum()
+    current_w = values / total if total > 0 else np.zeros(len(tickers))
+
+    drift = target_w - current_w
+    # pełne wyjście/wejście zawsze, pozostałe tylko poza pasmem bez transakcji
+    must_trade = ((target_w == 0) & (shares > 0)) | ((target_w > 0) & (shares == 0))
+    trade = priced & (must_trade | (np.abs(drift) > no_trade_band))
+
+    # samofinansowanie: transakcje rozdzielają tylko wartość pozycji, które się zmieniają
+    target_value = target_w * total
+    budget = total - values[~trade].sum()
+    wanted_total = target_value[trade].sum()
+    if wanted_total > 0:
+        target_value = target_value * (budget / wanted_total)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wanted = np.where(priced, target_value / px, shares)
+    if not allow_fractional:
+        wanted = np.floor(wanted)
+    target_shares = np.where(trade, wanted, shares)
+    delta = target_shares - shares
+    # pomijamy "transakcje" poniżej centa wynikające z zaokrągleń
+    dust_trade = np.abs(np.where(priced, delta * px, 0.0)) < 0.01
+    target_shares = np.where(dust_trade, shares, target_shares)
+    delta = np.where(dust_trade, 0.0, delta)
+
+    action = np.where(delta > 0, "BUY", np.where(delta < 0, "SELL", "HOLD"))
+    return pd.DataFrame({
+        "Ticker": tickers,
+        "Price": px,
+        "CurrentWeight": current_w,
+        "TargetWeight": target_w,
+        "CurrentShares": shares,
+        "TargetShares": target_shares,
+        "DeltaShares": delta,
+        "TradeValue($)": np.where(priced, delta * px, 0.0),
+        "Action": action,
+    })
+
+
+def apply_trades(trades):
+    """Portfel po transakcjach w formacie plików z results/portfolios."""
+    df = trades[trades["TargetShares"] > 0].copy()
+    df["Shares"] = df["TargetShares"]
+    df["CurrentValue($)"] = df["Shares"] * df["Price"]
+    total = df["CurrentValue($)"].sum()
+    df["Weight"] = df["CurrentValue($)"] / total if total > 0 else 0.0
+    df["Investment($)"] = df["CurrentValue($)"]
+    return df[PORTFOLIO_COLUMNS].reset_index(drop=True)
+
+
+def rebalance_delta(old_portfolio, signals, prices, top_n=10, no_trade_band=NO_TRADE_BAND, allow_fractional=True):
+    """Rebalans bez przebudowy strategii: sygnały z cache + obecne pozycje → transakcje."""
+    weights = target_weights_from_signals(signals, top_n=top_n)
+    if weights.empty:
+        raise ValueError("Brak dodatnich sygnałów w cache.")
+
+    prices = pd.Series(prices, dtype=float)
+    fallback = signals.set_index("Ticker")["LastClose"]
+    prices = prices.combine_first(fallback)
+    if "Price" in old_portfolio.columns:
+        prices = prices.combine_first(old_portfolio.set_index("Ticker")["Price"])
+
+    trades = compute_trades(old_portfolio, weights, prices, no_trade_band, allow_fractional)
+    portfolio = apply_trades(trades)
+    if not allow_fractional:
+        dust = float(old_portfolio["Shares"].mul(old_portfolio["Ticker"].map(prices)).sum()
+                     - portfolio["CurrentValue($)"].sum())
+    else:
+        dust = 0.0
+
+    n_trades = int((trades["Action"] != "HOLD").sum())
+    print(f"Rebalans przyrostowy: {n_trades} transakcji, obrót ${trades['TradeValue($)'].abs().sum():,.2f}")
+    return portfolio, trades, dust
@@ -2,18 +2,38 @@ import os
 import pandas as pd
 from datetime import datetime
 
+from scheduler_state import load_scheduler_state, mark_rebalanced
+from tactics.rebalance_delta import NO_TRADE_BAND, fetch_latest_prices, rebalance_delta
+from trading_calendar import to_market_time, trading_days_between
+
 def execute_regular(strategy_func, tickers, total_investment, allow_fractional=True,
-                    save_path=None, update_interval_days=2):
+                    save_path=None, update_interval_days=2, signals=None, no_trade_band=NO_TRADE_BAND):
 
     os.makedirs(os.path.dirname(save_path), exist_ok=True)
 
+    name = os.path.basename(save_path)
     if os.path.exists(save_path):
-        last_update = datetime.fromtimestamp(os.path.getmtime(save_path))
-        delta_days = (datetime.now() - last_update).days
+        last_update = load_scheduler_state().get(name, {}).get("LastRebalance")
+        if last_update is None:
+            last_update = datetime.fromtimestamp(os.path.getmtime(save_path))
+        delta_days = trading_days_between(to_market_time(last_update), to_market_time())
         if delta_days < update_interval_days:
-            print(f"Aktualizacja pominięta — minęło tylko {delta_days} dni.")
+            print(f"Aktualizacja pominięta — minęło tylko {delta_days} dni sesyjnych.")
             return pd.read_csv(save_path), 0.0
 
+        if signals is not None and not signals.empty:
+            old_portfolio = pd.read_csv(save_path)
+            wanted = set(old_portfolio["Ticker"]) | set(signals["Ticker"])
+            portfolio, trades, dust = rebalance_delta(
+                old_portfolio, signals, fetch_latest_prices(sorted(wanted)),
+                no_trade_band=no_trade_band, allow_fractional=allow_fractional
+            )
+            portfolio["Timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            portfolio.to_csv(save_path, index=False)
+            mark_rebalanced(name)
+            print(f"Portfel zaktualizowany przyrostowo: {save_path}")
+            return portfolio, dust
+
     portfolio, dust = strategy_func(
         tickers=tickers,
         total_investment=total_investment,
@@ -22,6 +42,7 @@ def execute_regular(strategy_func, tickers, total_investment, allow_fractional=T
 
     portfolio["Timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     portfolio.to_csv(save_path, index=False)
+    mark_rebalanced(name)
     print(f"Portfel zaktualizowany: {save_path}")
 
     return portfolio, dust
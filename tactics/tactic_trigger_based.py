@@ -1,10 +1,12 @@
 import os
-import yfinance as yf
 import pandas as pd
 from datetime import datetime
 
+from market_data import get_latest_prices
+from tactics.rebalance_delta import NO_TRADE_BAND, rebalance_delta
+
 def execute_trigger_based(strategy_func, tickers, total_investment, allow_fractional=True,
-                          save_path=None, drop_threshold=0.05):
+                          save_path=None, drop_threshold=0.05, signals=None, no_trade_band=NO_TRADE_BAND):
 
     print(f"Taktyka: TRIGGER-BASED (aktualizacja przy spadku > {drop_threshold*100:.1f}%)")
 
@@ -14,15 +16,17 @@ def execute_trigger_based(strategy_func, tickers, total_investment, allow_fracti
         old_portfolio = pd.read_csv(save_path)
         tickers_old = old_portfolio["Ticker"].tolist()
         shares = old_portfolio["Shares"].tolist()
+        prices = pd.Series(dtype=float)
 
         try:
-            data = yf.download(tickers_old, period="1d", progress=False, auto_adjust=True)
-            if isinstance(data.columns, pd.MultiIndex):
-                prices = data["Close"].iloc[-1]
-            else:
-                prices = data["Close"].iloc[-1]
-            new_value = sum(prices[t] * s for t, s in zip(tickers_old, shares) if t in prices)
+            prices = get_latest_prices(tickers_old).dropna()
         except Exception:
+            prices = pd.Series(dtype=float)
+        if all(t in prices.index for t in tickers_old):
+            new_value = sum(prices[t] * s for t, s in zip(tickers_old, shares))
+        else:
+            # brak (części) notowań — bez danych nie oceniamy spadku (poprzednia wartość)
+            print("Niepełne notowania — przyjmuję poprzednią wartość portfela.")
             new_value = old_portfolio["CurrentValue($)"].sum()
 
         old_value = old_portfolio["CurrentValue($)"].sum()
@@ -33,6 +37,16 @@ def execute_trigger_based(strategy_func, tickers, total_investment, allow_fracti
         if change > -drop_threshold:
             print("Brak potrzeby aktualizacji — spadek niewielki.")
             return old_portfolio, 0.0
+        elif signals is not None and not signals.empty:
+            print("Wykryto spadek — rebalans przyrostowy z sygnałów w cache.")
+            portfolio, trades, dust = rebalance_delta(
+                old_portfolio, signals, prices,
+                no_trade_band=no_trade_band, allow_fractional=allow_fractional
+            )
+            portfolio["Timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            portfolio.to_csv(save_path, index=False)
+            print(f"Portfel zaktualizowany: {save_path}")
+            return portfolio, dust
         else:
             print("Wykryto spadek — przebudowuję portfel.")
     else:
@@ -0,0 +1,15 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("HF_API_TOKEN", "test-token")  # moduł newsów wymaga tokenu przy imporcie
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Każdy test w osobnym katalogu — względne ścieżki results/ i data/ nie dotykają repozytorium."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_history_prediction_strategy import growth_pipeline as gp
+from ai_history_prediction_strategy.ai_growth_selector import analyze_growth
+from market_data import to_price_csv
+
+TICKERS = [f"T{i:02d}" for i in range(12)]
+
+
+def _bars(seed, n=60):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0.001, 0.02, n))
+    idx = pd.bdate_range("2026-01-01", periods=n)
+    return pd.DataFrame({"Close": close, "High": close, "Low": close, "Open": close, "Volume": 1000}, index=idx)
+
+
+@pytest.fixture
+def downloads(workdir, monkeypatch):
+    """Pobieranie bez sieci: T00–T03 już na dysku, T11 niedostępny w źródle."""
+    gp.DATA_DIR.mkdir(parents=True)
+    for i, t in enumerate(TICKERS[:4]):
+        to_price_csv(_bars(i), t, gp.DATA_DIR / f"{t}.csv")
+    calls = []
+
+    def get_history(tickers, period, interval):
+        calls.append(list(tickers))
+        return {t: _bars(TICKERS.index(t)) for t in tickers if t != "T11"}
+
+    monkeypatch.setattr(gp, "get_history", get_history)
+    return calls
+
+
+def test_streaming_matches_batch_analysis(downloads):
+    streamed = gp.analyze_growth_streaming(TICKERS, window=10, chunk_size=3, workers=2, top_n=3)
+
+    assert downloads == [["T04", "T05", "T06"], ["T07", "T08", "T09"], ["T10", "T11"]]
+    batch = analyze_growth(TICKERS, window=10)
+    key = ["Ticker", "LastClose", "PredictedNextClose", "PredictedGrowth"]
+    pd.testing.assert_frame_equal(
+        streamed[key].sort_values("Ticker").reset_index(drop=True),
+        batch[key].sort_values("Ticker").reset_index(drop=True),
+    )
+    assert "T11" not in set(streamed["Ticker"])
+    assert streamed["PredictedGrowth"].is_monotonic_decreasing
+
+
+def test_download_failure_does_not_hang_consumers(workdir, monkeypatch):
+    gp.DATA_DIR.mkdir(parents=True)
+    to_price_csv(_bars(0), "T00", gp.DATA_DIR / "T00.csv")
+
+    def fail(*args, **kwargs):
+        raise ConnectionError("brak sieci")
+
+    monkeypatch.setattr(gp, "get_history", fail)
+    df = gp.analyze_growth_streaming(["T00", "T01"], window=10, queue_size=1, workers=3)
+    assert df["Ticker"].tolist() == ["T00"]
@@ -0,0 +1,118 @@
+import pytest
+import requests
+
+import http_cache
+
+
+class _Resp:
+    def __init__(self, status_code=200, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.closed = False
+
+    def iter_content(self, chunk_size=8192):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code))
+
+    def close(self):
+        self.closed = True
+
+
+class _Server:
+    """Podstawia requests.get: kolejne odpowiedzi z listy, zapamiętuje nagłówki zapytań."""
+
+    def __init__(self, monkeypatch, *responses):
+        self.responses = list(responses)
+        self.requests = []
+        monkeypatch.setattr(http_cache.requests, "get", self)
+
+    def __call__(self, url, headers=None, timeout=None, stream=False):
+        self.requests.append(headers)
+        resp = self.responses.pop(0)
+        if isinstance(resp, Exception):
+            raise resp
+        return resp
+
+
+@pytest.fixture(autouse=True)
+def fresh_index(monkeypatch):
+    monkeypatch.setattr(http_cache, "_index", None)
+
+
+def test_fresh_entry_served_without_network(monkeypatch):
+    server = _Server(monkeypatch, _Resp(content=b"body", headers={"ETag": '"v1"'}))
+    first = http_cache.get("http://x/a", ttl=60)
+    second = http_cache.get("http://x/a", ttl=60)
+    assert (first.from_cache, second.from_cache) == (False, True)
+    assert second.content == b"body"
+    assert len(server.requests) == 1
+
+
+def test_expired_entry_revalidated_with_etag(monkeypatch):
+    server = _Server(monkeypatch, _Resp(content=b"body", headers={"ETag": '"v1"'}), _Resp(304))
+    http_cache.get("http://x/a", ttl=0)
+    resp = http_cache.get("http://x/a", ttl=0)
+    assert resp.from_cache and resp.content == b"body"
+    assert server.requests[1]["If-None-Match"] == '"v1"'
+    assert "If-Modified-Since" in server.requests[1]
+
+
+def test_stale_if_error(monkeypatch):
+    _Server(monkeypatch, _Resp(content=b"body"), requests.ConnectionError(), requests.ConnectionError())
+    http_cache.get("http://x/a", ttl=0)
+    resp = http_cache.get("http://x/a", ttl=0)
+    assert resp.stale and resp.content == b"body"
+    with pytest.raises(requests.ConnectionError):
+        http_cache.get("http://x/other", ttl=0)
+
+
+def test_least_recently_used_entries_evicted(monkeypatch):
+    _Server(monkeypatch, *[_Resp(content=b"x" * 10) for _ in range(3)])
+    http_cache.get("http://x/a", max_bytes=25)
+    http_cache.get("http://x/b", max_bytes=25)
+    http_cache.get("http://x/a", max_bytes=25)  # trafienie odświeża LastAccess
+    http_cache.get("http://x/c", max_bytes=25)
+    assert sorted(e["URL"] for e in http_cache._index.values()) == ["http://x/a", "http://x/c"]
+
+
+def test_index_survives_restart(monkeypatch):
+    server = _Server(monkeypatch, _Resp(content=b"body"))
+    http_cache.get("http://x/a", ttl=60)
+    monkeypatch.setattr(http_cache, "_index", None)
+    assert http_cache.get("http://x/a", ttl=60).content == b"body"
+    assert len(server.requests) == 1
+
+
+def test_stream_stopped_early_still_caches_full_body(monkeypatch):
+    body = bytes(range(256)) * 100
+    upstream = _Resp(content=body)
+    server = _Server(monkeypatch, upstream)
+
+    resp = http_cache.get("http://x/feed", ttl=60, stream=True)
+    first = next(resp.iter_content(chunk_size=1024))
+    resp.close()
+
+    assert first == body[:1024]
+    assert upstream.closed
+    cached = http_cache.get("http://x/feed", ttl=60)
+    assert cached.from_cache and cached.content == body
+    assert len(server.requests) == 1
+
+
+def test_broken_stream_not_cached(monkeypatch):
+    class _Broken(_Resp):
+        def iter_content(self, chunk_size=8192):
+            yield b"part"
+            raise requests.ConnectionError()
+
+    _Server(monkeypatch, _Broken())
+    resp = http_cache.get("http://x/feed", ttl=60, stream=True)
+    with pytest.raises(requests.ConnectionError):
+        list(resp.iter_content())
+    resp.close()
+    assert http_cache._index == {}
@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import indicator_store as ist
+
+
+def _bars(n=80, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.02, n))
+    idx = pd.bdate_range("2026-01-01", periods=n, name="Date")
+    return pd.DataFrame({"Close": close, "High": close * 1.01, "Low": close * 0.99}, index=idx)
+
+
+def _write_prices(workdir, bars, ticker="AAA", mtime=None):
+    path = workdir / "data" / "prices" / f"{ticker}.csv"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    bars.to_csv(path)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_indicators_match_full_pandas_computation(workdir):
+    bars = _bars()
+    _write_prices(workdir, bars)
+    assert ist.update_indicators() == len(bars)
+
+    df = ist.load_indicators("AAA")
+    close = bars["Close"]
+    pd.testing.assert_series_equal(df["SMA20"], close.rolling(20).mean(), check_names=False, check_freq=False)
+    ema = close.ewm(span=12, adjust=False).mean().where(np.arange(len(close)) >= 11)
+    pd.testing.assert_series_equal(df["EMA12"], ema, check_names=False, check_freq=False)
+    vol = np.log(close).diff().rolling(20).std()
+    pd.testing.assert_series_equal(df["Vol20"], vol, check_names=False, check_freq=False)
+    assert df["RSI14"].first_valid_index() == bars.index[14]
+    assert df["RSI14"].dropna().between(0, 100).all()
+    assert df["ATR14"].first_valid_index() == bars.index[13]
+
+
+def test_incremental_update_equals_full_recompute(workdir):
+    bars = _bars()
+    _write_prices(workdir, bars.iloc[:50], mtime=1_000)
+    ist.update_indicators()
+    _write_prices(workdir, bars, mtime=2_000)
+    assert ist.update_indicators() == 30
+    assert ist.update_indicators() == 0  # plik cen bez zmian
+    incremental = ist.load_indicators("AAA")
+
+    ist.update_indicators(indicator_dir="full")
+    pd.testing.assert_frame_equal(incremental, ist.load_indicators("AAA", indicator_dir="full"))
+
+
+def test_restated_history_is_recomputed(workdir):
+    bars = _bars()
+    _write_prices(workdir, bars.iloc[:50], mtime=1_000)
+    ist.update_indicators()
+    adjusted = bars.copy()
+    adjusted[["Close", "High", "Low"]] *= 0.98  # korekta o dywidendę
+    _write_prices(workdir, adjusted, mtime=2_000)
+
+    assert ist.update_indicators() == len(bars)
+    df = ist.load_indicators("AAA")
+    assert df["Close"].to_numpy() == pytest.approx(adjusted["Close"].to_numpy())
+
+
+def test_feature_array_requires_up_to_date_store(workdir):
+    bars = _bars()
+    _write_prices(workdir, bars)
+    ist.update_indicators()
+    close = bars["Close"].iloc[-30:]
+
+    features = ist.feature_array("AAA", close)
+    assert features.shape == (30, len(ist.INDICATORS))
+    assert ist.feature_array("AAA", pd.concat([close, pd.Series([1.0])])) is None
+    assert ist.feature_array("BBB", close) is None
+
+
+def test_indicator_matrix(workdir):
+    _write_prices(workdir, _bars(), "AAA")
+    _write_prices(workdir, _bars(40, seed=1), "BBB")
+    ist.update_indicators()
+    m = ist.indicator_matrix(["AAA", "BBB", "CCC"], "SMA20")
+    assert list(m.columns) == ["AAA", "BBB"]
+    assert len(m) == 80
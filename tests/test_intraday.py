@@ -0,0 +1,73 @@
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+import data_fetcher as df_
+from trading_calendar import MARKET_TZ
+
+
+def _bars(day, closes, tz=None):
+    """Słupki 5m od otwarcia sesji (09:30 czasu giełdy)."""
+    idx = pd.date_range(f"{day} 09:30", periods=len(closes), freq="5min", tz=MARKET_TZ)
+    if tz is not None:
+        idx = idx.tz_convert(tz)
+    return pd.DataFrame({
+        "Open": closes, "High": [c + 1 for c in closes], "Low": [c - 1 for c in closes],
+        "Close": closes, "Volume": [100] * len(closes),
+    }, index=idx)
+
+
+def test_partitions_in_market_time_and_merged_on_refetch():
+    bars = pd.concat([_bars("2026-01-05", [10, 11]), _bars("2026-01-06", [20, 21])])
+    assert df_.save_intraday("AAA", bars.tz_convert("UTC"), "5m") == 2
+    assert df_.intraday_days("AAA") == [pd.Timestamp("2026-01-05"), pd.Timestamp("2026-01-06")]
+
+    # ponowne pobranie w trakcie sesji: nowszy słupek dołącza do partycji, stary jest nadpisany
+    df_.save_intraday("AAA", _bars("2026-01-06", [22, 23, 24]), "5m")
+    day = df_.load_intraday("AAA", start="2026-01-06")
+    assert day["Close"].tolist() == [22, 23, 24]
+    assert day.index[0] == pd.Timestamp("2026-01-06 09:30")
+
+
+def test_range_reads_only_requested_bars():
+    df_.save_intraday("AAA", pd.concat([_bars("2026-01-05", [10, 11, 12]), _bars("2026-01-06", [20])]), "5m")
+    part = df_.load_intraday("AAA", start="2026-01-05 09:35", end="2026-01-05 09:40", columns=["Close"])
+    assert part["Close"].tolist() == [11, 12]
+    assert list(part.columns) == ["Close"]
+    assert df_.load_intraday("BBB").empty
+
+
+def test_daily_bars_from_intraday():
+    df_.save_intraday("AAA", _bars("2026-01-05", [10, 12, 11]), "5m")
+    daily = df_.daily_from_intraday("AAA")
+    row = daily.loc["2026-01-05"]
+    assert (row["Open"], row["High"], row["Low"], row["Close"], row["Volume"]) == (10, 13, 9, 11, 300)
+
+
+@pytest.mark.parametrize("ts,expected", [
+    (datetime(2026, 1, 6, 15, 59, tzinfo=MARKET_TZ), date(2026, 1, 5)),
+    (datetime(2026, 1, 6, 16, 0, tzinfo=MARKET_TZ), date(2026, 1, 6)),
+    (datetime(2026, 1, 10, 12, 0, tzinfo=MARKET_TZ), date(2026, 1, 9)),
+])
+def test_last_completed_session(ts, expected):
+    assert df_.last_completed_session(ts) == expected
+
+
+def test_session_in_progress_is_not_a_close():
+    df_.save_intraday("AAA", pd.concat([_bars("2026-01-05", [10]), _bars("2026-01-06", [20])]), "5m")
+    during = datetime(2026, 1, 6, 12, 0, tzinfo=MARKET_TZ)
+    after = datetime(2026, 1, 6, 17, 0, tzinfo=MARKET_TZ)
+    assert df_._intraday_closes_after("AAA", ts=during).tolist() == [10]
+    assert df_._intraday_closes_after("AAA", ts=after).tolist() == [10, 20]
+    assert df_._intraday_closes_after("AAA", pd.Timestamp("2026-01-05"), ts=after).tolist() == [20]
+
+
+def test_close_series_uses_intraday_only_on_request():
+    df_.DATA_DIR.mkdir(parents=True)
+    pd.DataFrame({"Close": [1.0, 2.0]}, index=pd.Index(["2026-01-02", "2026-01-05"], name="Date")) \
+        .to_csv(df_.DATA_DIR / "AAA.csv")
+    df_.save_intraday("AAA", pd.concat([_bars("2026-01-05", [9]), _bars("2026-01-06", [3])]), "5m")
+
+    assert df_.load_close_series("AAA").tolist() == [1.0, 2.0]
+    assert df_.load_close_series("AAA", intraday=True).tolist() == [1.0, 2.0, 3.0]
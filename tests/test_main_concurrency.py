@@ -0,0 +1,43 @@
+import io
+import threading
+
+import pandas as pd
+
+import main
+
+
+def test_failing_tactic_does_not_stop_the_others(monkeypatch):
+    calls = []
+
+    def build(tickers):
+        calls.append(len(calls))
+        if len(calls) == 2:
+            raise RuntimeError("boom")
+        return pd.DataFrame({"Ticker": tickers}), 0.0
+
+    monkeypatch.setitem(main.STRATEGIES, "TEST", build)
+    results = main.build_strategy("TEST", ["A"])
+    assert [tactic for tactic, _, _ in results] == [main.TACTICS[0], main.TACTICS[2]]
+
+
+def test_thread_output_keeps_per_thread_logs_separate():
+    out = main._ThreadOutput(io.StringIO())
+    logs = {}
+
+    def worker(name):
+        buf = io.StringIO()
+        out.local.buffer = buf
+        for i in range(50):
+            out.write(f"{name}{i};")
+        logs[name] = buf.getvalue()
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in ("x", "y")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    out.write("main")
+
+    assert logs["x"] == "".join(f"x{i};" for i in range(50))
+    assert logs["y"] == "".join(f"y{i};" for i in range(50))
+    assert out.stream.getvalue() == "main"
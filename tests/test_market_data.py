@@ -0,0 +1,96 @@
+import pandas as pd
+import pytest
+
+import market_data as md
+from data_fetcher import DATA_DIR, load_close_series
+from tactics import tactic_trigger_based as ttb
+
+
+def _bars(closes, start="2026-01-01"):
+    idx = pd.bdate_range(start, periods=len(closes))
+    return pd.DataFrame({"Close": closes, "High": closes, "Low": closes, "Open": closes, "Volume": 1.0}, index=idx)
+
+
+@pytest.fixture
+def fake_yf(monkeypatch):
+    """yf.download zwracający słupki z DATA (jedno wywołanie = jedno pobranie)."""
+    data = {"A": _bars([1.0, 2.0, 3.0]), "B": _bars([10.0, 11.0, 12.0])}
+    calls = []
+
+    def download(tickers, period, interval, **kwargs):
+        calls.append((tuple(tickers), period))
+        present = [t for t in tickers if t in data]
+        return pd.concat({t: data[t] for t in present}, axis=1, names=["Ticker", "Price"]) if present else pd.DataFrame()
+
+    class _Ticker:
+        def __init__(self, t):
+            self.t = t
+
+        def history(self, **kwargs):
+            return data.get(self.t + "_single", pd.DataFrame())
+
+    md.set_mode("live")
+    monkeypatch.setattr(md.yf, "download", download)
+    monkeypatch.setattr(md.yf, "Ticker", _Ticker)
+    yield data, calls
+    md.set_mode("live")
+
+
+def test_repeated_requests_share_one_download(fake_yf):
+    _, calls = fake_yf
+    prices = md.get_latest_prices(["A", "B"])
+    assert prices.to_dict() == {"A": 3.0, "B": 12.0}
+    md.get_latest_prices(["B", "A"])
+    assert len(calls) == 1
+    assert md.stats()["hits"] == 2
+
+
+def test_longer_period_triggers_a_new_download(fake_yf):
+    _, calls = fake_yf
+    md.get_history(["A"], period="5d")
+    md.get_history(["A"], period="1d")
+    md.get_history(["A"], period="1y")
+    assert [p for _, p in calls] == ["5d", "1y"]
+
+
+def test_missing_ticker_falls_back_to_single_history(fake_yf):
+    data, _ = fake_yf
+    data["C_single"] = _bars([7.0])
+    assert md.get_latest_prices(["A", "C", "D"]).to_dict() == {"A": 3.0, "C": 7.0}
+
+
+def test_record_then_replay_without_network(fake_yf, monkeypatch):
+    md.set_mode("record", session="t")
+    md.get_history(["A"], period="5d")
+    md.set_mode("replay", session="t")
+    monkeypatch.setattr(md.yf, "download", lambda *a, **k: pytest.fail("sieć w trybie replay"))
+    assert md.get_history(["A"])["A"]["Close"].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_slice_by_period():
+    bars = _bars(list(range(300)), start="2025-01-01")
+    assert len(md._slice(bars, "5d")) == 5
+    assert md._slice(bars, "1mo").index[0] > bars.index[-1] - pd.DateOffset(months=1)
+    assert md._slice(bars, "ytd").index[0].year == bars.index[-1].year
+
+
+def test_price_csv_roundtrip():
+    DATA_DIR.mkdir(parents=True)
+    md.to_price_csv(_bars([5.0, 6.0]), "A", DATA_DIR / "A.csv")
+    assert load_close_series("A").tolist() == [5.0, 6.0]
+
+
+def test_trigger_tactic_treats_partial_quotes_as_no_change(workdir, monkeypatch):
+    path = workdir / "p" / "P.csv"
+    path.parent.mkdir()
+    pd.DataFrame({"Ticker": ["A", "B"], "Shares": [1.0, 1.0], "CurrentValue($)": [100.0, 100.0]}).to_csv(path)
+    monkeypatch.setattr(ttb, "get_latest_prices", lambda t: pd.Series({"A": 1.0}))
+    rebuilt = []
+
+    def strategy(**kwargs):
+        rebuilt.append(kwargs)
+        return pd.DataFrame({"Ticker": ["X"]}), 0.0
+
+    portfolio, _ = ttb.execute_trigger_based(strategy, ["A", "B"], 200, save_path=str(path))
+    assert not rebuilt
+    assert portfolio["Ticker"].tolist() == ["A", "B"]
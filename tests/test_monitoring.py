@@ -0,0 +1,90 @@
+import csv
+import urllib.request
+
+import pytest
+
+import monitoring
+import scheduler_portfolios as sp
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    monitoring.reset()
+    yield
+    monitoring.reset()
+
+
+def test_render_counters_gauges_and_hit_ratio():
+    monitoring.inc("cache_requests_total", cache="http", result="hit")
+    monitoring.inc("cache_requests_total", cache="http", result="miss")
+    monitoring.inc("cache_requests_total", cache="http", result="stale")
+    monitoring.set_gauge("portfolios", 3)
+    monitoring.inc("errors_total", process='sch"ed')
+
+    text = monitoring.render()
+    assert "# TYPE portfolio_cache_requests_total counter" in text
+    assert 'portfolio_cache_requests_total{cache="http",result="hit"} 1' in text
+    assert 'portfolio_cache_hit_ratio{cache="http"} 0.666667' in text
+    assert "portfolio_portfolios 3" in text
+    assert 'portfolio_errors_total{process="sch\\"ed"} 1' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    monitoring.observe("run_seconds", 0.2)
+    monitoring.observe("run_seconds", 7.0)
+    text = monitoring.render()
+    assert 'portfolio_run_seconds_bucket{le="0.1"} 0' in text
+    assert 'portfolio_run_seconds_bucket{le="0.25"} 1' in text
+    assert 'portfolio_run_seconds_bucket{le="10"} 2' in text
+    assert 'portfolio_run_seconds_bucket{le="+Inf"} 2' in text
+    assert "portfolio_run_seconds_count 2" in text
+
+
+def test_textfile_and_http_endpoint(workdir):
+    monitoring.set_gauge("portfolios", 5)
+    monitoring.write_textfile("scheduler")
+    assert "portfolio_portfolios 5" in (workdir / "results" / "metrics" / "scheduler.prom").read_text()
+
+    server = monitoring.start_server(port=0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as resp:
+            assert "portfolio_portfolios 5" in resp.read().decode()
+    finally:
+        server.shutdown()
+
+
+def test_buffered_log_writes_header_once(workdir):
+    path = workdir / "logs" / "log.csv"
+    log = monitoring.BufferedLog(str(path), ["A", "B"], flush_every=2, flush_seconds=3600)
+    log.write(A=1, B="x")
+    assert not path.exists()
+    log.write(A=2)
+    log.write(B="y,z")
+    log.flush()
+
+    with open(path, newline="") as f:
+        assert list(csv.reader(f)) == [["A", "B"], ["1", "x"], ["2", ""], ["", "y,z"]]
+
+
+def test_migrate_legacy_scheduler_log(workdir):
+    path = workdir / "log.csv"
+    path.write_text(
+        "2026-01-02 10:00:00,⚠️ Brak cen dla AI_EQUAL.csv\n"
+        "2026-01-02 09:00:00,Błąd wyceny RANDOM_RISK.csv: Traceback\n"
+        "  ciąg dalszy\n"
+        "2026-01-02 11:00:00,INFO,,Start\n",
+        encoding="utf-8",
+    )
+    sp.migrate_log(str(path))
+    expected = [
+        sp.LOG_COLUMNS,
+        ["2026-01-02 09:00:00", "ERROR", "RANDOM_RISK.csv", "Błąd wyceny RANDOM_RISK.csv: Traceback ciąg dalszy"],
+        ["2026-01-02 10:00:00", "WARNING", "AI_EQUAL.csv", "⚠️ Brak cen dla AI_EQUAL.csv"],
+        ["2026-01-02 11:00:00", "INFO", "", "Start"],
+    ]
+    with open(path, newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f)) == expected
+
+    sp.migrate_log(str(path))  # ponowne uruchomienie niczego nie zmienia
+    with open(path, newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f)) == expected
@@ -0,0 +1,79 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+from ai_news_prediction_strategy import ai_news_sentiment_strategy as news
+
+TICKERS = ["AAA", "BBB", "CCC", "DDD"]
+
+
+class _Source:
+    """Nagłówki i model sentymentu bez sieci; zapamiętuje pobrania i oceny."""
+
+    def __init__(self, monkeypatch, per_ticker=2, fail_on=None):
+        self.fetched, self.scored = [], []
+        self.per_ticker = per_ticker
+        self.fail_on = fail_on
+        monkeypatch.setattr(news, "fetch_news_for_ticker", self.fetch)
+        monkeypatch.setattr(news, "_hf_inference_sentiment", self.infer)
+        monkeypatch.setattr(news.time, "sleep", lambda s: None)
+
+    def fetch(self, ticker, days=7, max_articles=12):
+        self.fetched.append(ticker)
+        published = datetime(2026, 10, 18, tzinfo=timezone.utc)
+        return [{"title": f"{ticker} headline {i}", "link": "", "source": "", "published": published}
+                for i in range(self.per_ticker)]
+
+    def infer(self, texts, token):
+        if self.fail_on and any(t.startswith(self.fail_on) for t in texts):
+            raise RuntimeError("przerwany przebieg")
+        self.scored.extend(texts)
+        return [[{"label": "positive", "score": 0.6}] for _ in texts]
+
+
+def test_interrupted_run_resumes_from_checkpoint(monkeypatch):
+    monkeypatch.setattr(news, "CHECKPOINT_EVERY", 1)
+    source = _Source(monkeypatch, fail_on="DDD")
+    with pytest.raises(RuntimeError):
+        news.analyze_news_sentiment(TICKERS, held=set(), resume=True)
+    assert os.path.exists(news.CHECKPOINT_FILE)
+
+    source = _Source(monkeypatch)
+    df = news.analyze_news_sentiment(TICKERS, held=set(), resume=True)
+
+    # spółki ocenione przed przerwaniem nie są pobierane ani oceniane ponownie
+    assert source.fetched == ["DDD"]
+    assert source.scored == ["DDD headline 0", "DDD headline 1"]
+    assert sorted(df["Ticker"]) == TICKERS
+    assert not os.path.exists(news.CHECKPOINT_FILE)
+    assert os.path.exists(news.NEWS_LOG_FILE)
+
+
+def test_budget_limited_runs_finish_across_resumes(monkeypatch):
+    source = _Source(monkeypatch, per_ticker=3)
+    runs = 0
+    while True:
+        runs += 1
+        df = news.analyze_news_sentiment(TICKERS, held=set(), resume=True, max_total_news=5)
+        if not os.path.exists(news.CHECKPOINT_FILE):
+            break
+        assert not os.path.exists(news.NEWS_LOG_FILE)  # log dopiero po ocenie wszystkiego
+        assert runs < 5
+
+    assert runs == 3
+    assert sorted(source.scored) == sorted(f"{t} headline {i}" for t in TICKERS for i in range(3))
+    assert sorted(pd.read_csv(news.NEWS_LOG_FILE)["Ticker"]) == TICKERS
+    assert (df["NewsCount"] == 3).all()
+
+
+def test_stale_checkpoint_is_ignored(workdir):
+    os.makedirs(news.RESULTS_DIR)
+    pd.DataFrame([{"Ticker": "AAA"}, {"Ticker": "ZZZ"}], columns=news.CHECKPOINT_COLUMNS) \
+        .to_csv(news.CHECKPOINT_FILE, index=False)
+    assert [r["Ticker"] for r in news._load_checkpoint(["AAA"])] == ["AAA"]
+
+    old = (datetime.now() - timedelta(hours=news.CHECKPOINT_MAX_AGE_HOURS + 1)).timestamp()
+    os.utime(news.CHECKPOINT_FILE, (old, old))
+    assert news._load_checkpoint(["AAA"]) == []
@@ -0,0 +1,57 @@
+import os
+import random
+
+import pandas as pd
+import pytest
+
+from ai_news_prediction_strategy import news_matcher as nm
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_automaton_finds_every_occurrence():
+    rng = random.Random(0)
+    patterns = {"".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) for _ in range(12)}
+    ac = nm.AhoCorasick({p: {p} for p in patterns})
+    for _ in range(50):
+        text = "".join(rng.choice("abc") for _ in range(30))
+        expected = sorted((p, i) for p in patterns for i in range(len(text)) if text.startswith(p, i))
+        found = sorted(p for p, _ in ac.search(text))
+        assert found == [p for p, _ in expected]
+
+
+@pytest.mark.parametrize("raw,name", [
+    ("Apple Inc. Common Stock", "apple"),
+    ("Costco Wholesale Corporation Common Stock", "costco wholesale"),
+    ("Airbnb, Inc. Class A Common Stock", "airbnb"),
+    ("ASML Holding N.V. New York Registry Shares", "asml holding"),
+    ("The Trade Desk, Inc. Class A Common Stock", "trade desk"),
+])
+def test_company_name(raw, name):
+    assert nm.company_name(raw) == name
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return nm.load_matcher(os.path.join(ROOT, nm.COMPANIES_FILE))
+
+
+@pytest.mark.parametrize("title,tickers", [
+    ("Apple unveils new iPhone", {"AAPL"}),
+    ("Nvidia and AMD rally as chip stocks rebound", {"NVDA", "AMD"}),
+    ("Why YouTube ad sales lifted Google", {"GOOGL", "GOOG"}),
+    ("TSLA slides after delivery miss", {"TSLA"}),
+    ("Pineapple prices soar", set()),
+    ("Stocks move ON Fed decision", set()),
+    ("Strategy matters for long-term investors", set()),
+    ("Apple's rival: Microsoft", {"AAPL", "MSFT"}),
+])
+def test_headline_matching(matcher, title, tickers):
+    assert matcher.match(title) == tickers
+
+
+def test_symbols_match_only_in_capitals():
+    m = nm.NewsMatcher(pd.DataFrame({"Ticker": ["MU"], "Company": ["Micron Technology, Inc. Common Stock"]}))
+    assert m.match("MU beats estimates") == {"MU"}
+    assert m.match("mu is a greek letter") == set()
+    assert m.match("Micron Technology guidance") == {"MU"}
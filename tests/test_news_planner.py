@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pandas as pd
+
+from ai_news_prediction_strategy import news_planner as np_
+
+NOW = datetime(2026, 10, 19, 12, 0)
+
+
+def _allocated(plan):
+    return dict(zip(plan["Ticker"], plan["Allocated"]))
+
+
+def test_first_round_spreads_budget_across_tickers():
+    plan = np_.plan_inference({"A": 10, "B": 10, "C": 10}, {}, set(), budget=7, now=NOW)
+    assert sorted(_allocated(plan).values()) == [1, 3, 3]
+    assert plan["Allocated"].sum() == 7
+
+
+def test_leftover_budget_tops_up_in_priority_order():
+    plan = np_.plan_inference({"A": 10, "B": 2}, {}, set(), budget=8, now=NOW)
+    assert _allocated(plan) == {"A": 6, "B": 2}
+
+
+def test_held_and_stale_tickers_go_first():
+    scored = {"A": pd.Timestamp("2026-10-19 11:00"), "B": pd.Timestamp("2026-10-12 12:00"),
+              "C": pd.Timestamp("2026-10-19 11:00")}
+    plan = np_.plan_inference({"A": 5, "B": 5, "C": 5}, scored, {"C"}, budget=6, now=NOW)
+    assert plan["Ticker"].tolist() == ["B", "C", "A"]
+    assert _allocated(plan) == {"B": 3, "C": 3, "A": 0}
+
+
+def test_result_independent_of_input_order():
+    counts = {"A": 4, "B": 4, "C": 4}
+    first = np_.plan_inference(counts, {}, set(), budget=5, now=NOW)
+    second = np_.plan_inference(dict(reversed(counts.items())), {}, set(), budget=5, now=NOW)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_tickers_without_new_headlines_get_nothing():
+    plan = np_.plan_inference({"A": 0, "B": 1}, {}, {"A"}, budget=10, now=NOW)
+    assert _allocated(plan) == {"B": 1, "A": 0}
+    assert np_.plan_inference({}, {}, set(), budget=10).empty
+
+
+def test_held_tickers_and_last_scored(workdir):
+    folder = workdir / np_.PORTFOLIO_DIR
+    folder.mkdir(parents=True)
+    pd.DataFrame({"Ticker": ["AAA", "BBB"]}).to_csv(folder / "NEWS_EQUAL.csv", index=False)
+    pd.DataFrame({"Ticker": ["CCC"]}).to_csv(folder / "AI_EQUAL.csv", index=False)
+    assert np_.held_tickers() == {"AAA", "BBB"}
+
+    cache = pd.DataFrame({"Ticker": ["A", "A", "B"],
+                          "Timestamp": ["2026-10-18 10:00:00", "2026-10-19 10:00:00", "bad"]})
+    assert np_.last_scored(cache) == {"A": pd.Timestamp("2026-10-19 10:00:00")}
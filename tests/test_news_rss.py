@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+
+from ai_news_prediction_strategy import ai_news_sentiment_strategy as news
+
+
+def _feed(items):
+    body = "".join(
+        f"<item><title>{t}</title><link>http://x/{i}</link><pubDate>{d}</pubDate>"
+        f"<source url='http://s'>Src</source></item>"
+        for i, (t, d) in enumerate(items)
+    )
+    return f"<rss><channel><title>f</title>{body}</channel></rss>".encode()
+
+
+NOW = "Mon, 19 Oct 2026 12:00:00 GMT"
+OLD = "Mon, 01 Jan 2024 12:00:00 GMT"
+
+
+def test_items_are_parsed_across_chunk_boundaries():
+    data = _feed([("First", NOW), ("Second", NOW)])
+    chunks = [data[i:i + 7] for i in range(0, len(data), 7)]
+    items = list(news._iter_rss_items(chunks))
+    assert [it["title"] for it in items] == ["First", "Second"]
+    assert items[0]["source"] == "Src"
+    assert items[0]["published"] == datetime(2026, 10, 19, 12, tzinfo=timezone.utc)
+
+
+def test_parse_pub_date_handles_missing_and_invalid():
+    assert news._parse_pub_date(None) is None
+    assert news._parse_pub_date("not a date") is None
+    naive = news._parse_pub_date("Mon, 19 Oct 2026 12:00:00")
+    assert naive.tzinfo == timezone.utc
+
+
+class _Resp:
+    def __init__(self, content):
+        self.content = content
+        self.closed = False
+
+    def iter_content(self, chunk_size=8192):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+def test_fetch_feed_filters_old_duplicate_and_stops_at_limit(monkeypatch):
+    resp = _Resp(_feed([("A", NOW), ("a", NOW), ("Old", OLD), ("B", NOW), ("C", NOW)]))
+    monkeypatch.setattr(news.http_cache, "get", lambda *a, **k: resp)
+    cutoff = datetime(2026, 10, 19, tzinfo=timezone.utc) - timedelta(days=7)
+
+    items = news._fetch_feed("http://feed", cutoff, max_articles=2)
+
+    assert [it["title"] for it in items] == ["A", "B"]
+    assert resp.closed
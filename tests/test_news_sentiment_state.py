@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+from ai_news_prediction_strategy import news_sentiment_state as nss
+
+
+def test_older_headline_weighs_half_after_one_half_life():
+    state = {}
+    nss.update_sentiment_state(state, "AAPL", 1.0, "2026-01-01 00:00:00", half_life_days=2.0)
+    nss.update_sentiment_state(state, "AAPL", -1.0, "2026-01-03 00:00:00", half_life_days=2.0)
+    # waga 0.5 dla pierwszego nagłówka, 1.0 dla drugiego
+    assert nss.read_sentiment(state, "AAPL") == pytest.approx((0.5 - 1.0) / 1.5)
+
+
+def test_out_of_order_headline_matches_in_order_result():
+    a, b = {}, {}
+    nss.update_sentiment_state(a, "T", 0.2, "2026-01-01 00:00:00")
+    nss.update_sentiment_state(a, "T", 0.8, "2026-01-04 00:00:00")
+    nss.update_sentiment_state(b, "T", 0.8, "2026-01-04 00:00:00")
+    nss.update_sentiment_state(b, "T", 0.2, "2026-01-01 00:00:00")
+    assert nss.read_sentiment(a, "T") == pytest.approx(nss.read_sentiment(b, "T"))
+
+
+def test_unknown_ticker_returns_default():
+    assert nss.read_sentiment({}, "X", default=0.3) == 0.3
+
+
+def test_state_roundtrip_and_half_life_mismatch(tmp_path):
+    path = str(tmp_path / "state.csv")
+    state = {}
+    nss.update_sentiment_state(state, "T", 0.5, "2026-01-01 12:00:00")
+    nss.save_sentiment_state(state, 3.0, path)
+
+    loaded = nss.load_sentiment_state(3.0, path)
+    assert loaded["T"] == pytest.approx(state["T"])
+    assert nss.load_sentiment_state(5.0, path) is None
+
+
+def test_build_from_cache_prefers_published_time():
+    cache = pd.DataFrame({
+        "Ticker": ["T", "T"],
+        "Sentiment": [1.0, 0.0],
+        "Timestamp": ["2026-01-10 00:00:00", "2026-01-10 00:00:00"],
+        "Published": ["2026-01-07 00:00:00", None],
+    })
+    state = nss.build_sentiment_state(cache, half_life_days=3.0)
+    assert nss.read_sentiment(state, "T") == pytest.approx(0.5 / 1.5)
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import portfolio_allocator as pa
+
+
+def _bisect_projection(v, cap):
+    """Niezależny rzut na sympleks z limitem: bisekcja po przesunięciu tau."""
+    lo, hi = v.min() - 1.0, v.max()
+    for _ in range(200):
+        tau = (lo + hi) / 2
+        if np.clip(v - tau, 0, cap).sum() > 1:
+            lo = tau
+        else:
+            hi = tau
+    return np.clip(v - (lo + hi) / 2, 0, cap)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("cap", [0.2, 0.35, 1.0])
+def test_capped_simplex_projection(seed, cap):
+    v = np.random.default_rng(seed).normal(0, 1, 8)
+    w = pa._project_capped_simplex(v, cap)
+    assert w.sum() == pytest.approx(1.0)
+    assert w.min() >= 0 and w.max() <= cap + 1e-12
+    np.testing.assert_allclose(w, _bisect_projection(v, cap), atol=1e-9)
+
+
+def _random_cov(n, seed=0):
+    a = np.random.default_rng(seed).normal(0, 0.01, (60, n))
+    return a.T @ a / 60
+
+
+def test_risk_parity_equalizes_risk_contributions():
+    cov = _random_cov(5)
+    w = pa.risk_parity_weights(cov, max_weight=None)
+    contrib = w * (cov @ w)
+    assert w.sum() == pytest.approx(1.0)
+    np.testing.assert_allclose(contrib, contrib.mean(), rtol=1e-6)
+
+
+def test_risk_parity_respects_weight_cap():
+    cov = np.diag([1e-4, 1e-2, 1e-2, 1e-2, 1e-2])  # niska zmienność przyciąga dużą wagę
+    w = pa.risk_parity_weights(cov, max_weight=0.25)
+    assert w.max() <= 0.25 + 1e-9
+    assert w.sum() == pytest.approx(1.0)
+
+
+def test_min_variance_on_diagonal_covariance():
+    var = np.array([1.0, 2.0, 4.0, 8.0])
+    w = pa.min_variance_weights(np.diag(var), max_weight=None)
+    expected = (1 / var) / (1 / var).sum()
+    np.testing.assert_allclose(w, expected, atol=1e-6)
+
+
+def test_min_variance_with_cap_is_feasible():
+    w = pa.min_variance_weights(_random_cov(6, seed=2), max_weight=0.2)
+    assert w.sum() == pytest.approx(1.0)
+    assert w.max() <= 0.2 + 1e-9 and w.min() >= 0
+
+
+def test_effective_cap_never_makes_problem_infeasible():
+    assert pa._effective_cap(3, 0.1) == pytest.approx(1 / 3)
+    assert pa._effective_cap(10, None) == 1.0
+
+
+def test_ledoit_wolf_is_symmetric_and_positive_definite():
+    returns = np.random.default_rng(3).normal(0, 0.01, (25, 10))
+    cov = pa.ledoit_wolf_covariance(returns)
+    np.testing.assert_allclose(cov, cov.T)
+    assert np.linalg.eigvalsh(cov).min() > 0
+
+
+def _closes(tickers, days=80, seed=4):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range("2026-01-01", periods=days)
+    return pd.DataFrame(100 * np.cumprod(1 + rng.normal(0, 0.01, (days, len(tickers))), axis=0),
+                        index=idx, columns=tickers)
+
+
+def test_allocate_gives_zero_weight_without_history():
+    closes = _closes(["A", "B", "C"])
+    closes["NEW"] = np.nan
+    closes.iloc[-5:, 3] = 10.0
+    w = pa.allocate(["A", "B", "C", "NEW"], method="risk_parity", closes=closes)
+    assert w["NEW"] == 0.0
+    assert w.sum() == pytest.approx(1.0)
+
+
+def test_allocate_batch_matches_allocate_for_one_candidate(monkeypatch):
+    closes = _closes(["A", "B", "C", "D"])
+    monkeypatch.setattr(pa, "load_close_matrix", lambda tickers: closes[list(tickers)])
+    batch = pa.allocate_batch({"P": ["A", "B", "C", "D"]}, method="min_variance")
+    single = pa.allocate(["A", "B", "C", "D"], method="min_variance", closes=closes)
+    pd.testing.assert_series_equal(batch["P"], single)
+
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError):
+        pa._solve("magic", ["A"], np.eye(1), None, 0.5, 1.0)
@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+import portfolio_api as api
+
+
+@pytest.fixture(autouse=True)
+def sources(workdir, monkeypatch):
+    monkeypatch.setattr(api, "_snapshot", None)
+    monkeypatch.setattr(api, "_responses", OrderedDict())
+    os.makedirs(api.PORTFOLIO_DIR)
+    pd.DataFrame({"Ticker": ["AAA", "BBB"], "CurrentValue($)": [50.0, 50.0], "NewValue($)": [60.0, None]}) \
+        .to_csv(os.path.join(api.PORTFOLIO_DIR, "AI_EQUAL.csv"), index=False)
+    rows = [(f"2026-01-0{d} 10:00:00", p, 100.0 + d) for d in range(1, 6) for p in ("AI_EQUAL.csv", "NEWS_EQUAL.csv")]
+    pd.DataFrame(rows, columns=["Timestamp", "Portfolio", "Value($)"]).to_csv(api.HISTORY_FILE, index=False)
+    api.refresh(force=True)
+
+
+def _get(url):
+    status, etag, body = api.respond(url)
+    return status, json.loads(body)
+
+
+def test_portfolio_summary_and_holdings():
+    _, summary = _get("/portfolios")
+    assert summary["items"] == [{"Portfolio": "AI_EQUAL", "Strategy": "AI", "Tactic": "EQUAL", "Positions": 2,
+                                 "Value($)": 60.0, "Change(%)": pytest.approx(-40.0)}]
+    _, holdings = _get("/portfolios/AI_EQUAL")
+    assert holdings["items"][1] == {"Ticker": "BBB", "CurrentValue($)": 50.0, "NewValue($)": None}
+    assert api.respond("/portfolios/MISSING")[0] == 404
+
+
+def test_history_range_and_pagination():
+    _, page = _get("/portfolios/AI_EQUAL/history?start=2026-01-02&end=2026-01-04&limit=2")
+    assert page["total"] == 3
+    assert [r["Timestamp"][:10] for r in page["items"]] == ["2026-01-02", "2026-01-03"]
+    _, rest = _get("/portfolios/AI_EQUAL/history" + page["next"])
+    assert [r["Timestamp"][:10] for r in rest["items"]] == ["2026-01-04"]
+    assert rest["next"] is None
+
+    _, everything = _get("/history")
+    assert everything["total"] == 10
+    assert api.respond("/history?limit=abc")[0] == 404
+
+
+def test_snapshot_rebuilt_only_after_source_change():
+    assert not api.refresh()
+    before = api.respond("/portfolios")
+    pd.DataFrame({"Ticker": ["CCC"], "CurrentValue($)": [10.0]}) \
+        .to_csv(os.path.join(api.PORTFOLIO_DIR, "NEWS_EQUAL.csv"), index=False)
+    assert api.refresh()
+    after = api.respond("/portfolios")
+    assert before[1] != after[1]
+    assert len(json.loads(after[2])["items"]) == 2
+
+
+def test_http_etag_revalidation():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), api._ApiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/portfolios"
+    try:
+        with urllib.request.urlopen(url) as resp:
+            etag = resp.headers["ETag"]
+            assert json.loads(resp.read())["items"][0]["Portfolio"] == "AI_EQUAL"
+        with pytest.raises(urllib.error.HTTPError) as err:
+            urllib.request.urlopen(urllib.request.Request(url, headers={"If-None-Match": etag}))
+        assert err.value.code == 304
+    finally:
+        server.shutdown()
@@ -0,0 +1,93 @@
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import portfolio_ledger as pl
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    pl._cache.clear()
+
+
+def _fill(n=260, seed=1):
+    rng = np.random.default_rng(seed)
+    stamps = []
+    for i in range(n):
+        ts = (datetime(2025, 1, 1) + timedelta(hours=i)).strftime("%Y-%m-%d %H:%M:%S")
+        k = int(rng.integers(1, 4))
+        trades = pd.DataFrame({"Ticker": rng.choice(list("ABCDEF"), k, replace=False),
+                               "DeltaShares": rng.normal(0, 5, k).round(2), "Price": rng.uniform(10, 100, k)})
+        pl.append_events("P.csv", trades, ts)
+        stamps.append(ts)
+    return stamps
+
+
+def _full_replay(timestamp):
+    events = pd.read_csv(pl._paths("P.csv")[0], dtype={"Timestamp": str, "Ticker": str})
+    positions = {}
+    for r in events[events["Timestamp"] <= timestamp].itertuples():
+        pl._apply(positions, r.Ticker, float(r.DeltaShares), float(r.Price))
+    return positions
+
+
+def _assert_same(a, b):
+    assert a.keys() == b.keys()
+    for t in a:
+        np.testing.assert_allclose(a[t], b[t])
+
+
+def test_lookups_match_full_replay():
+    stamps = _fill()
+    for ts in ["2024-12-31 00:00:00", stamps[0], stamps[49], stamps[50], stamps[123], stamps[-1]]:
+        _assert_same(pl._positions_at("P.csv", ts)[0], _full_replay(ts))
+
+
+def test_legacy_ledger_gets_an_index_once():
+    stamps = _fill(120)
+    os.remove(pl._paths("P.csv")[2])
+    _assert_same(pl._positions_at("P.csv", stamps[70])[0], _full_replay(stamps[70]))
+    assert os.path.exists(pl._paths("P.csv")[2])
+
+
+def test_historical_lookup_reads_at_most_one_snapshot_interval(monkeypatch):
+    stamps = _fill()
+    read = []
+    original = pl._read_rows
+
+    def spy(path, columns, offset=0, nrows=None, stop=None):
+        rows = original(path, columns, offset, nrows, stop)
+        if path.endswith("_events.csv"):
+            read.append(len(rows))
+        return rows
+
+    monkeypatch.setattr(pl, "_read_rows", spy)
+    pl._positions_at("P.csv", stamps[30])
+    assert read and read[0] <= pl.SNAPSHOT_EVERY + 3
+
+
+def test_record_holdings_writes_init_then_deltas():
+    first = pd.DataFrame({"Ticker": ["A", "B"], "Shares": [10.0, 5.0], "Price": [10.0, 20.0]})
+    assert pl.record_holdings("Q.csv", first, timestamp="2026-01-01 10:00:00") == 2
+    assert set(pl.load_events("Q.csv")["Type"]) == {"INIT"}
+
+    second = pd.DataFrame({"Ticker": ["A", "C"], "Shares": [5.0, 2.0], "Price": [10.0, 50.0]})
+    pl.record_holdings("Q.csv", second, prices={"A": 12.0, "B": 25.0, "C": 50.0}, timestamp="2026-01-02 10:00:00")
+
+    h = pl.holdings_at("Q.csv").set_index("Ticker")
+    assert list(h.index) == ["A", "C"]
+    assert h.loc["A", "CostBasis"] == pytest.approx(50.0)  # sprzedaż połowy — połowa kosztu
+    assert h.loc["A", "LastPrice"] == 12.0
+    assert pl.holdings_at("Q.csv", "2026-01-01 12:00:00").set_index("Ticker").loc["B", "Shares"] == 5.0
+    assert pl.record_holdings("Q.csv", second) == 0  # bez zmian — bez zdarzeń
+
+
+def test_export_portfolio_matches_file_layout():
+    pl.record_holdings("R.csv", pd.DataFrame({"Ticker": ["A"], "Shares": [4.0], "Price": [25.0]}))
+    out = pl.export_portfolio("R.csv")
+    assert list(out.columns) == pl.PORTFOLIO_COLUMNS
+    assert out.iloc[0]["Price"] == 25.0 and out.iloc[0]["Weight"] == 1.0
+    assert pl.list_ledgers() == ["R.csv"]
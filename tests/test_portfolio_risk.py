@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import portfolio_risk as pr
+
+
+def _history(days=300, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2025-01-01", periods=days)
+    mkt = {d.date().toordinal(): rng.normal(0, 0.01) for d in dates}
+    values, rows = {"A.csv": 100.0, "B.csv": 50.0}, []
+    for i, d in enumerate(dates):
+        for hour in (10, 15):  # dwa punkty dziennie — liczy się ostatni z dnia
+            for p in values:
+                if p == "B.csv" and i < 40:
+                    continue
+                values[p] *= 1 + rng.normal(0, 0.01)
+                rows.append((f"{d.date()} {hour}:00:00", p, values[p]))
+    return pd.DataFrame(rows, columns=["Timestamp", "Portfolio", "Value($)"]), pd.Series(mkt)
+
+
+def _daily_returns(history, portfolio):
+    h = history[history["Portfolio"] == portfolio]
+    daily = h.groupby(pd.to_datetime(h["Timestamp"]).dt.date)["Value($)"].last()
+    return daily.pct_change().dropna()
+
+
+def test_rolling_windows_match_direct_computation():
+    history, mkt = _history()
+    metrics = pr.compute_risk_metrics(pr.update_risk_state(None, history, mkt), mkt).set_index("Portfolio")
+
+    for p in ("A.csv", "B.csv"):
+        r = _daily_returns(history, p)
+        for w in pr.WINDOWS:
+            rw = r.iloc[-w:]
+            m = np.array([mkt[d.toordinal()] for d in rw.index])
+            assert metrics.loc[p, f"Volatility{w}(%)"] == pytest.approx(rw.std() * np.sqrt(252) * 100)
+            assert metrics.loc[p, f"Sharpe{w}"] == pytest.approx(rw.mean() / rw.std() * np.sqrt(252))
+            beta = np.cov(rw, m, bias=True)[0, 1] / np.var(m)
+            assert metrics.loc[p, f"Beta{w}"] == pytest.approx(beta)
+        assert metrics.loc[p, "Volatility(%)"] == pytest.approx(r.std() * np.sqrt(252) * 100)
+        assert metrics.loc[p, "Days"] == len(r)
+
+
+def test_incremental_updates_with_reload_match_full_rebuild(tmp_path):
+    history, mkt = _history(days=120, seed=1)
+    path = str(tmp_path / "state.csv")
+    state = None
+    for i, (_, points) in enumerate(history.groupby("Timestamp")):
+        state = pr.update_risk_state(state, points, mkt)
+        if i % 37 == 0:
+            pr.save_risk_state(state, path)
+            state = pr.load_risk_state(path)
+    incremental = pr.compute_risk_metrics(state, mkt)
+    full = pr.compute_risk_metrics(pr.update_risk_state(None, history, mkt), mkt)
+    pd.testing.assert_frame_equal(incremental, full)
+
+
+def test_state_without_window_buffers_forces_rebuild(tmp_path):
+    history, mkt = _history(days=30)
+    path = str(tmp_path / "state.csv")
+    pr.save_risk_state(pr.update_risk_state(None, history, mkt), path)
+    os.remove(str(tmp_path / "state_windows.npz"))
+    assert pr.load_risk_state(path) is None
+
+
+def test_already_processed_points_are_skipped():
+    history, mkt = _history(days=20)
+    state = pr.update_risk_state(None, history, mkt)
+    before = pr.compute_risk_metrics(state, mkt)
+    state = pr.update_risk_state(state, history.tail(5), mkt)
+    pd.testing.assert_frame_equal(before, pr.compute_risk_metrics(state, mkt))
+
+
+def test_market_returns_cache_follows_price_files(workdir):
+    prices = workdir / "data" / "prices"
+    prices.mkdir(parents=True)
+    dates = pd.bdate_range("2026-01-01", periods=4).strftime("%Y-%m-%d")
+    pd.DataFrame({"Date": dates, "Close": [10, 11, 12, 13]}).to_csv(prices / "A.csv", index=False)
+    cache = str(workdir / "mkt.json")
+
+    first = pr.market_returns(cache_path=cache)
+    assert first.iloc[0] == pytest.approx(0.1)
+    assert pr.market_returns(cache_path=cache).equals(first)
+
+    pd.DataFrame({"Date": dates, "Close": [10, 20, 20, 20]}).to_csv(prices / "A.csv", index=False)
+    os.utime(prices / "A.csv", ns=(0, 10 ** 9))  # inna data modyfikacji niezależnie od rozdzielczości zegara
+    assert pr.market_returns(cache_path=cache).iloc[0] == pytest.approx(1.0)
@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import positions_table as pt
+import update_portfolio_history as uph
+
+
+def _positions():
+    return pd.DataFrame({
+        "Portfolio": ["P1", "P1", "P2", "P3", None],
+        "Ticker": ["AAA", "BBB", "AAA", "CCC", "AAA"],
+        "Shares": [1.0, 2.0, 3.0, 1.0, 5.0],
+        "CostBasis": [10.0, 20.0, 60.0, 0.0, 1.0],
+    })
+
+
+def test_valuation_of_all_portfolios_at_once():
+    table = pt.PositionsTable(_positions())
+    assert len(table) == 4
+    values = table.valuation({"AAA": 20.0, "BBB": 10.0, "CCC": 5.0}, "ts").set_index("Portfolio")
+    assert values.loc["P1", "Value($)"] == 40.0
+    assert values.loc["P1", "Change(%)"] == pytest.approx(100 / 3)
+    assert values.loc["P2", "Change($)"] == 0.0
+    assert values.loc["P3", "Change(%)"] == 0.0  # bez kosztu nabycia
+    assert values["Positions"].tolist() == [2, 1, 1]
+
+
+def test_missing_quote_gives_nan_not_a_loss():
+    values = pt.PositionsTable(_positions()).valuation({"AAA": 20.0, "CCC": 5.0}).set_index("Portfolio")
+    assert np.isnan(values.loc["P1", "Value($)"])
+    assert values.loc["P1", "MissingQuotes"] == 1
+    assert values.loc["P2", "Value($)"] == 60.0
+
+
+def test_frame_roundtrip():
+    frame = pt.PositionsTable(_positions()).frame()
+    expected = _positions().dropna().sort_values(["Portfolio", "Ticker"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(frame.sort_values(["Portfolio", "Ticker"]).reset_index(drop=True), expected)
+
+
+def _strategy_portfolio(name, tickers, shares, value):
+    os.makedirs(pt.PORTFOLIO_DIR, exist_ok=True)
+    pd.DataFrame({"Ticker": tickers, "Shares": shares, "CurrentValue($)": value}) \
+        .to_csv(os.path.join(pt.PORTFOLIO_DIR, name), index=False)
+
+
+def test_portfolio_file_takes_precedence_over_table():
+    _strategy_portfolio("AI_EQUAL.csv", ["AAA"], [2.0], [10.0])
+    pt.save_positions(pd.DataFrame({
+        "Portfolio": ["AI_EQUAL.csv", "user_1"], "Ticker": ["ZZZ", "BBB"], "Shares": [9.0, 1.0], "CostBasis": [1.0, 5.0],
+    }))
+    frame = pt.load_positions().frame()
+    assert frame.values.tolist() == [["AI_EQUAL.csv", "AAA", 2.0, 10.0], ["user_1", "BBB", 1.0, 5.0]]
+
+
+def test_history_keeps_table_portfolios_separate(monkeypatch):
+    _strategy_portfolio("AI_EQUAL.csv", ["AAA"], [2.0], [10.0])
+    _strategy_portfolio("NEWS_EQUAL.csv", ["CCC"], [1.0], [10.0])
+    pt.save_positions(pd.DataFrame({"Portfolio": ["user_1"], "Ticker": ["BBB"], "Shares": [1.0], "CostBasis": [5.0]}))
+    monkeypatch.setattr(uph, "get_latest_prices", lambda tickers: {"AAA": 6.0, "BBB": 7.0})
+
+    uph.update_history()
+
+    history = pd.read_csv(uph.HISTORY_FILE)
+    assert history["Portfolio"].tolist() == ["AI_EQUAL.csv"]  # NEWS_EQUAL bez notowania pominięty
+    assert history["Value($)"].tolist() == [12.0]
+    assert pd.read_csv(os.path.join(uph.RESULTS_DIR, "history_AI_EQUAL.csv"))["Value($)"].tolist() == [12.0]
+    others = pd.read_csv(pt.POSITIONS_HISTORY_FILE)
+    assert others["Portfolio"].tolist() == ["user_1"]
+    assert others["Change(%)"].tolist() == [pytest.approx(40.0)]
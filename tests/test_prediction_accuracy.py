@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import prediction_accuracy as pa
+import prediction_store as ps
+
+# sobota w południe: w każdej strefie czasowej ostatnią rozpoczętą sesją jest piątek 9 stycznia
+RUN_TS = "2026-01-10 12:00:00"
+
+
+def _closes(**tickers):
+    idx = pd.to_datetime(["2026-01-08", "2026-01-09", "2026-01-12", "2026-01-13"])
+    return pd.DataFrame(tickers, index=idx)
+
+
+def _run(growth):
+    return pd.DataFrame({
+        "Ticker": list(growth),
+        "LastClose": [100.0] * len(growth),
+        "PredictedGrowth": list(growth.values()),
+    })
+
+
+def test_target_is_first_close_after_last_close_bar():
+    pending = _run({"AAPL": 1.0}).assign(RunId=1, Strategy="AI", Timestamp=RUN_TS)
+    out = pa.resolve_outcomes(pending, _closes(AAPL=[98.0, 100.0, 110.0, 120.0]))
+    assert out["TargetDate"].tolist() == ["2026-01-12"]
+    assert out["RealizedGrowth"].tolist() == [pytest.approx(0.10)]
+
+
+def test_rank_ic_needs_enough_tickers():
+    outcomes = pd.DataFrame({
+        "RunId": [1, 1, 1, 2, 2],
+        "Strategy": "AI",
+        "TargetDate": "2026-01-12",
+        "PredictedGrowth": [1.0, 2.0, 3.0, 1.0, 2.0],
+        "RealizedGrowth": [0.1, 0.2, 0.3, 0.2, 0.1],
+    })
+    ic = pa.rank_ic(outcomes).set_index("RunId")
+    assert ic.loc[1, "RankIC"] == pytest.approx(1.0)
+    assert ic.loc[1, "N"] == 3
+    assert np.isnan(ic.loc[2, "RankIC"])
+
+
+def test_outcomes_resolved_once_and_ic_recomputed_for_late_prices():
+    ps.save_run("AI", _run({"A": 3.0, "B": 2.0, "C": 1.0}), timestamp=RUN_TS)
+
+    closes = _closes(A=[0, 100.0, 103.0, 0], B=[0, 100.0, 102.0, 0], C=[0, 100.0, np.nan, np.nan])
+    assert pa.update_outcomes(closes=closes) == 2
+    assert pa.update_outcomes(closes=closes) == 0
+    # trzeci ticker dostaje cenę później — IC przebiegu liczony z kompletu
+    closes.loc["2026-01-12", "C"] = 101.0
+    assert pa.update_outcomes(closes=closes) == 1
+
+    metrics = pa.accuracy_metrics()
+    row = metrics.iloc[-1]
+    assert row["Predictions"] == 3
+    assert row["HitRate(%)"] == pytest.approx(100.0)
+    assert row["RankIC"] == pytest.approx(1.0)
+
+
+def test_no_store_gives_empty_metrics():
+    assert pa.update_outcomes() == 0
+    assert pa.accuracy_metrics().empty
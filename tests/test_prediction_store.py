@@ -0,0 +1,59 @@
+import pandas as pd
+
+import prediction_store as ps
+
+
+def _run(tickers, growth):
+    return pd.DataFrame({
+        "Ticker": tickers,
+        "LastClose": [100.0] * len(tickers),
+        "PredictedNextClose": [100.0 * (1 + g / 100) for g in growth],
+        "PredictedGrowth": growth,
+    })
+
+
+def test_missing_store_reads_empty():
+    assert ps.latest_run("AI").empty
+    assert list(ps.ticker_history("AAPL").columns) == ps.PREDICTION_COLUMNS
+
+
+def test_latest_run_per_strategy():
+    first = ps.save_run("AI", _run(["AAPL", "MSFT"], [1.0, 2.0]), timestamp="2026-01-02 10:00:00")
+    ps.save_run("News", _run(["AAPL"], [5.0]), timestamp="2026-01-02 11:00:00")
+    second = ps.save_run("AI", _run(["AAPL"], [3.0]), timestamp="2026-01-03 10:00:00")
+    assert second > first
+
+    latest = ps.latest_run("AI")
+    assert latest["RunId"].tolist() == [second]
+    assert latest["PredictedGrowth"].tolist() == [3.0]
+
+
+def test_ticker_history_and_incremental_reads():
+    first = ps.save_run("AI", _run(["AAPL", "MSFT"], [1.0, 2.0]), timestamp="2026-01-02 10:00:00")
+    ps.save_run("News", _run(["AAPL"], [5.0]), timestamp="2026-01-02 11:00:00")
+    ps.save_run("AI", _run(["AAPL"], [3.0]), timestamp="2026-01-03 10:00:00")
+
+    assert ps.ticker_history("AAPL")["PredictedGrowth"].tolist() == [1.0, 5.0, 3.0]
+    assert ps.ticker_history("AAPL", strategy="AI")["PredictedGrowth"].tolist() == [1.0, 3.0]
+    new = ps.load_predictions("AI", after_run=first)
+    assert new["Ticker"].tolist() == ["AAPL"]
+
+
+def test_missing_values_stored_as_null():
+    df = _run(["AAPL"], [1.0]).drop(columns="PredictedNextClose")
+    ps.save_run("AI", df)
+    assert ps.latest_run("AI")["PredictedNextClose"].isna().all()
+
+
+def test_csv_import_is_one_shot():
+    pd.DataFrame({
+        "Timestamp": ["2026-01-02 10:00", "2026-01-02 10:00", "2026-01-03 10:00"],
+        "Ticker": ["AAPL", "MSFT", "AAPL"],
+        "LastClose": [100.0, 200.0, 101.0],
+        "PredictedGrowth": [1.0, 2.0, 3.0],
+    }).to_csv(ps.LEGACY_AI_LOG, index=False)
+
+    assert ps.import_csv_log() == 2
+    assert ps.import_csv_log() == 0
+    assert len(ps.load_predictions("AI")) == 3
+    assert ps.latest_run("AI")["Ticker"].tolist() == ["AAPL"]
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import scheduler_portfolios as sp
+from tactics import rebalance_delta as rd
+
+
+def _holdings(**shares):
+    return pd.DataFrame({"Ticker": list(shares), "Shares": list(shares.values())})
+
+
+def test_positions_inside_band_are_not_traded():
+    trades = rd.compute_trades(_holdings(A=10.0, B=10.0), pd.Series({"A": 0.51, "B": 0.49}),
+                               {"A": 10.0, "B": 10.0}, no_trade_band=0.02).set_index("Ticker")
+    assert (trades["Action"] == "HOLD").all()
+    assert (trades["DeltaShares"] == 0).all()
+
+
+def test_exit_and_entry_are_self_financing():
+    prices = {"A": 10.0, "B": 20.0, "C": 5.0}
+    trades = rd.compute_trades(_holdings(A=10.0, B=5.0), pd.Series({"A": 0.5, "C": 0.5}), prices)
+    t = trades.set_index("Ticker")
+    assert t.loc["B", "Action"] == "SELL" and t.loc["B", "TargetShares"] == 0
+    assert t.loc["C", "Action"] == "BUY"
+    assert trades["TradeValue($)"].sum() == pytest.approx(0.0, abs=1e-9)
+    value = (t["TargetShares"] * pd.Series(prices)).sum()
+    assert value == pytest.approx(200.0)
+
+
+def test_unpriced_position_is_left_alone():
+    trades = rd.compute_trades(_holdings(A=10.0, B=3.0), pd.Series({"A": 1.0}), {"A": 10.0}).set_index("Ticker")
+    assert trades.loc["B", "Action"] == "HOLD"
+    assert trades.loc["B", "TargetShares"] == 3.0
+
+
+def test_whole_shares_only_when_fractional_disabled():
+    trades = rd.compute_trades(_holdings(A=0.0), pd.Series({"A": 1.0}), {"A": 3.0}, allow_fractional=False)
+    assert trades["TargetShares"].iloc[0] == 0.0  # brak wartości portfela — nic do kupienia
+    trades = rd.compute_trades(_holdings(A=10.0, B=0.0), pd.Series({"A": 0.5, "B": 0.5}), {"A": 1.0, "B": 3.0},
+                               allow_fractional=False).set_index("Ticker")
+    assert trades.loc["B", "TargetShares"] == np.floor(trades.loc["B", "TargetShares"])
+
+
+def test_weights_from_signals_keep_top_positive():
+    signals = pd.DataFrame({"Ticker": ["A", "B", "C", "D"], "LastClose": 1.0,
+                            "PredictedGrowth": [0.03, -0.01, 0.01, 0.02]})
+    w = rd.target_weights_from_signals(signals, top_n=2)
+    assert list(w.index) == ["A", "D"]
+    assert w.to_dict() == pytest.approx({"A": 0.6, "D": 0.4})
+
+
+def test_rebalance_delta_without_positive_signals_raises():
+    signals = pd.DataFrame({"Ticker": ["A"], "LastClose": [1.0], "PredictedGrowth": [-0.1]})
+    with pytest.raises(ValueError):
+        rd.rebalance_delta(_holdings(A=1.0), signals, {"A": 1.0})
+
+
+def test_cached_news_signals_drop_missing_growth(workdir):
+    (workdir / "results").mkdir()
+    pd.DataFrame({"Ticker": ["A", "B", "A"], "LastClose": [1, 2, 3],
+                  "PredictedGrowth": [0.1, None, 0.2]}).to_csv(workdir / "results" / "ai_news_predictions.csv")
+    df = rd.load_cached_signals("NEWS")
+    assert df.to_dict("records") == [{"Ticker": "A", "LastClose": 3, "PredictedGrowth": 0.2}]
+
+
+def _portfolio():
+    df = pd.DataFrame({"Ticker": ["A", "B", "C"], "Weight": [0.4, 0.3, 0.3], "Investment($)": [400.0, 300, 300],
+                       "Price": [10.0, 20, 30], "Shares": [40.0, 15, 10], "CurrentValue($)": [400.0, 300, 300]})
+    df, _ = sp.update_portfolio(df, pd.Series({"A": 12.0, "B": 20.0, "C": 27.0}))
+    return df
+
+
+def test_carry_cost_basis_follows_ledger_rules():
+    old = _portfolio()
+    new = old.copy()
+    new["Shares"] = [20.0, 15.0, 12.0]  # sprzedaż połowy A, B bez zmian, dokupienie 2 akcji C
+    out = sp.carry_cost_basis(old[["Ticker", "Shares", "Price"]], new).set_index("Ticker")
+    assert out.loc["A", "CurrentValue($)"] == pytest.approx(200.0)
+    assert out.loc["A", "Price"] == pytest.approx(10.0)
+    assert out.loc["B", "CurrentValue($)"] == pytest.approx(300.0)
+    assert out.loc["C", "CurrentValue($)"] == pytest.approx(300.0 + 2 * 27.0)
+    assert out.loc["C", "Change(%)"] == pytest.approx((27.0 / (354.0 / 12) - 1) * 100)
+
+
+def test_rebalance_to_signals_keeps_value_and_untouched_cost(monkeypatch):
+    monkeypatch.setattr(sp, "log", lambda *a, **k: None)
+    df = _portfolio()
+    prices = pd.Series({"A": 12.0, "B": 20.0, "C": 27.0, "D": 50.0})
+    signals = pd.DataFrame({"Ticker": ["A", "B", "D"], "LastClose": [12.0, 20.0, 50.0],
+                            "PredictedGrowth": [0.30, 0.30, 0.40]})
+
+    new = sp.rebalance_to_signals(df.copy(), signals, prices).set_index("Ticker")
+
+    assert "C" not in new.index
+    assert new["NewValue($)"].sum() == pytest.approx(df["NewValue($)"].sum())
+    assert new.loc["D", "Price"] == pytest.approx(50.0)
+    for t in ("A", "B"):
+        # sprzedaż lub dokupienie — średnia cena zakupu zgodna z kosztem
+        assert new.loc[t, "Price"] * new.loc[t, "Shares"] == pytest.approx(new.loc[t, "CurrentValue($)"])
+    assert new.loc["B", "Change(%)"] == pytest.approx((20.0 / new.loc["B", "Price"] - 1) * 100)
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import shared_prices as sp
+from data_fetcher import load_close_matrix
+from market_data import to_price_csv
+
+
+def _write(ticker, dates, closes):
+    idx = pd.to_datetime(dates)
+    bars = pd.DataFrame({"Close": closes, "High": closes, "Low": closes, "Open": closes, "Volume": 1000.0}, index=idx)
+    to_price_csv(bars, ticker, sp.DATA_DIR / f"{ticker}.csv")
+
+
+@pytest.fixture
+def prices(workdir):
+    sp.DATA_DIR.mkdir(parents=True)
+    _write("AAA", ["2026-01-02", "2026-01-05", "2026-01-06"], [1.0, 2.0, 3.0])
+    _write("BBB", ["2026-01-05", "2026-01-06"], [10.0, 20.0])
+    with sp.publish_prices() as shared:
+        yield shared
+
+
+def _last_close(prices, ticker):
+    col = prices.column(ticker)
+    return float(col[~np.isnan(col)][-1])
+
+
+def test_published_matrix_matches_price_files(prices):
+    assert prices.tickers == ["AAA", "BBB"]
+    pd.testing.assert_frame_equal(prices.frame(), load_close_matrix(["AAA", "BBB"]), check_names=False,
+                                  check_freq=False)
+    assert np.isnan(prices.column("BBB")[0])
+    assert (prices.volume == 1000.0)[1:].all()
+
+
+def test_attached_view_shares_memory(prices):
+    other = sp.attach(prices.descriptor)
+    try:
+        prices.close[0, 0] = 42.0
+        assert other.column("AAA")[0] == 42.0
+        assert list(other.dates) == list(prices.dates)
+    finally:
+        other.close_shm()
+    assert prices.column("AAA")[0] == 42.0  # odłączenie widoku nie usuwa bloku
+
+
+def test_map_tickers_in_process_pool(prices):
+    assert sp.map_tickers(_last_close, prices, workers=2) == {"AAA": 3.0, "BBB": 20.0}
+    assert sp.map_tickers(_last_close, prices, tickers=["BBB"], workers=1) == {"BBB": 20.0}
+
+
+def test_owner_unlinks_block(workdir):
+    sp.DATA_DIR.mkdir(parents=True)
+    _write("AAA", ["2026-01-02"], [1.0])
+    shared = sp.publish_prices(["AAA"])
+    descriptor = shared.descriptor
+    shared.close_shm()
+    with pytest.raises(FileNotFoundError):
+        sp.attach(descriptor)
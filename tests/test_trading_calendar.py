@@ -0,0 +1,56 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import trading_calendar as tc
+
+NY = tc.MARKET_TZ
+
+
+def test_holidays_2026():
+    assert tc.holidays(2026) == {
+        date(2026, 1, 1), date(2026, 1, 19), date(2026, 2, 16), date(2026, 4, 3), date(2026, 5, 25),
+        date(2026, 6, 19), date(2026, 7, 3), date(2026, 9, 7), date(2026, 11, 26), date(2026, 12, 25),
+    }
+
+
+def test_new_year_on_saturday_is_not_observed():
+    assert date(2021, 12, 31) not in tc.holidays(2021) | tc.holidays(2022)
+    assert tc.is_trading_day(date(2021, 12, 31))
+
+
+def test_early_closes_skip_holidays():
+    # 3 lipca 2026 to odebrane Święto Niepodległości
+    assert tc.early_closes(2026) == {date(2026, 11, 27), date(2026, 12, 24)}
+    assert tc.session_bounds(date(2026, 11, 27))[1] == datetime(2026, 11, 27, 13, 0, tzinfo=NY)
+    assert tc.session_bounds(date(2026, 11, 26)) is None
+
+
+@pytest.mark.parametrize("start,end", [
+    (date(2025, 12, 20), date(2026, 1, 20)),
+    (date(2026, 1, 2), date(2026, 1, 3)),
+    (date(2026, 3, 28), date(2026, 7, 10)),
+    (date(2025, 1, 1), date(2026, 12, 31)),
+])
+def test_trading_days_between_matches_daily_count(start, end):
+    expected = sum(tc.is_trading_day(start + timedelta(days=i)) for i in range(1, (end - start).days + 1))
+    assert tc.trading_days_between(start, end) == expected
+    assert tc.trading_days_between(end, start) == 0
+
+
+def test_last_session_start():
+    # przed otwarciem we wtorek → sesja poniedziałkowa; po weekendzie z MLK → piątek
+    assert tc.last_session_start(datetime(2026, 1, 6, 9, 0, tzinfo=NY)) == datetime(2026, 1, 5, 9, 30, tzinfo=NY)
+    assert tc.last_session_start(datetime(2026, 1, 6, 9, 30, tzinfo=NY)) == datetime(2026, 1, 6, 9, 30, tzinfo=NY)
+    assert tc.last_session_start(datetime(2026, 1, 19, 12, 0, tzinfo=NY)) == datetime(2026, 1, 16, 9, 30, tzinfo=NY)
+
+
+def test_quotes_may_have_changed():
+    friday_settled = datetime(2026, 1, 16, 16, 30, tzinfo=NY)
+    sunday = datetime(2026, 1, 18, 12, 0, tzinfo=NY)
+    assert tc.quotes_may_have_changed(None, sunday)
+    assert not tc.quotes_may_have_changed(friday_settled, sunday)
+    assert tc.quotes_may_have_changed(datetime(2026, 1, 16, 16, 5, tzinfo=NY), sunday)
+    # w trakcie sesji notowania zmieniają się zawsze
+    assert tc.quotes_may_have_changed(friday_settled, datetime(2026, 1, 20, 10, 0, tzinfo=NY))
+    assert not tc.quotes_may_have_changed(friday_settled, datetime(2026, 1, 20, 9, 0, tzinfo=NY))
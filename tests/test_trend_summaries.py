@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_history_prediction_strategy import ai_trend_strategy as trend
+
+
+def _write(path, dates, closes):
+    pd.DataFrame({"Date": dates, "Close": closes}).to_csv(path, index=False)
+
+
+def _expected(closes, days):
+    d = min(days, len(closes) - 1)
+    return closes[-1] / closes[-d] - 1
+
+
+def test_vectorized_changes_match_per_ticker_windows(tmp_path, monkeypatch):
+    monkeypatch.setattr(trend, "DATA_DIR", tmp_path)
+    dates = pd.bdate_range("2026-01-01", periods=45).strftime("%Y-%m-%d")
+    rng = np.random.default_rng(0)
+    long = 100 * np.cumprod(1 + rng.normal(0, 0.02, 45))
+    short = 50 * np.cumprod(1 + rng.normal(0, 0.02, 12))
+    _write(tmp_path / "LONG.csv", dates, long)
+    _write(tmp_path / "SHORT.csv", dates[-12:], short)  # krótsza historia, inne daty
+    _write(tmp_path / "TINY.csv", dates[-5:], short[:5])  # poniżej MIN_HISTORY
+
+    df = trend.summarize_trends(["LONG", "SHORT", "TINY"]).set_index("Ticker")
+
+    assert list(df.index) == ["LONG", "SHORT"]
+    assert df.loc["LONG", "Change30"] == pytest.approx(_expected(long, 30))
+    assert df.loc["LONG", "Change7"] == pytest.approx(_expected(long, 7))
+    assert df.loc["SHORT", "Change30"] == pytest.approx(_expected(short, 30))
+    assert df.loc["SHORT", "Change7"] == pytest.approx(_expected(short, 7))
+    assert df.loc["LONG", "Text"].startswith("The stock LONG changed")
+
+
+def test_missing_data_gives_empty_frame(tmp_path, monkeypatch):
+    monkeypatch.setattr(trend, "DATA_DIR", tmp_path)
+    assert trend.summarize_trends(["NONE"]).empty
+    assert trend.summarize_stock_trend("NONE") is None
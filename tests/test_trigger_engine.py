@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import trigger_engine as te
+
+NO_RULES = {"PositionDrop": None, "TrailingStop": None, "PortfolioDrawdown": None, "WeightDrift": None}
+
+
+def _positions():
+    return pd.DataFrame({"Portfolio": ["P", "P", "Q"], "Ticker": ["A", "B", "A"],
+                         "Shares": [10.0, 5.0, 1.0], "Price": [10.0, 20.0, 10.0], "Weight": [0.5, 0.5, 1.0]})
+
+
+def _empty_state():
+    return te.load_trigger_state("missing.csv")
+
+
+def test_high_water_marks_only_rise():
+    _, _, state = te.evaluate_triggers(_positions(), {"A": 12.0, "B": 20.0}, _empty_state(), NO_RULES)
+    _, _, state = te.evaluate_triggers(_positions(), {"A": 11.0, "B": 21.0}, state, NO_RULES)
+    assert state[("P", "A")] == 12.0
+    assert state[("P", "B")] == 21.0
+    assert state[("P", te.PORTFOLIO_KEY)] == pytest.approx(max(10 * 12 + 5 * 20, 10 * 11 + 5 * 21))
+
+
+def test_trailing_stop_and_position_drop():
+    rules = {**NO_RULES, "TrailingStop": 0.10, "PositionDrop": 0.05}
+    _, _, state = te.evaluate_triggers(_positions(), {"A": 15.0, "B": 20.0}, _empty_state(), rules)
+    pf, pos, _ = te.evaluate_triggers(_positions(), {"A": 13.0, "B": 18.0}, state, rules)
+    pos = pos.set_index(["Portfolio", "Ticker"])
+    assert pos.loc[("P", "A"), "TrailingStop"]  # 13 vs szczyt 15
+    assert not pos.loc[("P", "A"), "PositionDrop"]  # wciąż powyżej ceny zakupu
+    assert pos.loc[("P", "B"), "PositionDrop"]  # 18 vs 20
+    assert pf.set_index("Portfolio").loc["P", "Triggered"]
+
+
+def test_missing_quote_keeps_portfolio_peak_and_skips_drawdown():
+    rules = {**NO_RULES, "PortfolioDrawdown": 0.10}
+    state = pd.Series({("P", te.PORTFOLIO_KEY): 1000.0})
+    state.index.names = ["Portfolio", "Ticker"]
+    pf, _, new_state = te.evaluate_triggers(_positions(), {"A": 1.0}, state, rules)
+    pf = pf.set_index("Portfolio")
+    assert not pf.loc["P", "PortfolioDrawdown"]
+    assert new_state[("P", te.PORTFOLIO_KEY)] == 1000.0
+
+
+def test_seed_peaks_trigger_drawdown_on_first_run():
+    rules = {**NO_RULES, "PortfolioDrawdown": 0.10}
+    pf, _, _ = te.evaluate_triggers(_positions(), {"A": 10.0, "B": 20.0}, _empty_state(), rules,
+                                    seed_peaks={"P": 400.0})
+    assert pf.set_index("Portfolio").loc["P", "PortfolioDrawdown"]  # 200 vs 400
+
+
+def test_weight_drift():
+    rules = {**NO_RULES, "WeightDrift": 0.05}
+    pf, _, _ = te.evaluate_triggers(_positions(), {"A": 30.0, "B": 20.0}, _empty_state(), rules)
+    assert pf.set_index("Portfolio").loc["P", "WeightDrift"]  # 300/400 vs 0.5
+
+
+def test_reset_and_prune_keep_portfolio_peaks():
+    _, _, state = te.evaluate_triggers(_positions(), {"A": 12.0, "B": 20.0}, _empty_state(), NO_RULES)
+
+    reset = te.reset_portfolio_state(state, "P")
+    assert set(reset.index) == {("P", te.PORTFOLIO_KEY), ("Q", "A"), ("Q", te.PORTFOLIO_KEY)}
+
+    pruned = te.prune_trigger_state(state, {"P": ["B"]})
+    assert ("P", "A") not in pruned.index
+    assert ("P", "B") in pruned.index and ("Q", "A") in pruned.index
+
+
+def test_save_prunes_sold_tickers_and_roundtrips(tmp_path):
+    path = str(tmp_path / "state.csv")
+    _, _, state = te.evaluate_triggers(_positions(), {"A": 12.0, "B": 20.0}, _empty_state(), NO_RULES)
+    te.save_trigger_state(state, path, holdings={"P": ["A"]})
+    loaded = te.load_trigger_state(path)
+    assert ("P", "B") not in loaded.index
+    assert loaded[("P", "A")] == 12.0
+    assert np.isfinite(loaded[("Q", te.PORTFOLIO_KEY)])
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ai_history_prediction_strategy import window_sweep as ws
+from ai_history_prediction_strategy.ai_price_predictor import predict_next_price
+
+
+def _series(n=80, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.cumprod(1 + rng.normal(0, 0.02, n))
+
+
+def test_walk_forward_matches_refitting_the_model():
+    x = _series()
+    t_eval, preds = ws.walk_forward_predictions(x, [5, 10], test_days=10)
+    for j, w in enumerate([5, 10]):
+        for i, t in enumerate(t_eval):
+            assert preds[j, i] == pytest.approx(predict_next_price(pd.Series(x[:t]), w), rel=1e-6)
+
+
+def test_too_short_history_gives_nan():
+    t_eval, preds = ws.walk_forward_predictions(_series(12), [5, 20], test_days=3)
+    assert np.isfinite(preds[0]).all()
+    assert np.isnan(preds[1]).all()
+
+
+def _closes():
+    idx = pd.bdate_range("2026-01-01", periods=60)
+    return pd.DataFrame({t: _series(60, seed=i) for i, t in enumerate("ABC")}, index=idx)
+
+
+def test_report_has_one_row_per_window():
+    report = ws.sweep_windows(windows=[5, 8], test_days=5, top_n=2, closes=_closes())
+    assert report["Window"].tolist() == [5, 8]
+    assert (report["Predictions"] == 3 * 5).all()
+    assert report["TopNHitRate(%)"].between(0, 100).all()
+
+
+def test_shared_memory_workers_give_the_same_report(workdir):
+    closes = _closes()
+    prices = workdir / "data" / "prices"
+    prices.mkdir(parents=True)
+    for t in closes:
+        closes[[t]].rename(columns={t: "Close"}).rename_axis("Date").to_csv(prices / f"{t}.csv")
+
+    sequential = ws.sweep_windows(tickers=list(closes), windows=[5, 8], test_days=5)
+    pooled = ws.sweep_windows(tickers=list(closes), windows=[5, 8], test_days=5, workers=2)
+    pd.testing.assert_frame_equal(sequential, pooled)
@@ -0,0 +1,154 @@
+# trading_calendar.py
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+# Kalendarz sesji NYSE/NASDAQ liczony lokalnie (bez zapytań sieciowych).
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+EARLY_CLOSE = time(13, 0)
+SETTLE_MINUTES = 15  # po zamknięciu notowania jeszcze się ustalają
+
+
+def _easter(year):
+    """Niedziela Wielkanocna (algorytm gregoriański Meeusa/Jonesa/Butchera)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def _nth_weekday(year, month, weekday, n):
+    """n-ty dzień tygodnia w miesiącu (n=-1 — ostatni)."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(d):
+    """Święto w sobotę → piątek, w niedzielę → poniedziałek."""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=None)
+def holidays(year) -> frozenset:
+    days = {
+        _nth_weekday(year, 1, 0, 3),    # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),    # Washington's Birthday
+        _easter(year) - timedelta(days=2),  # Good Friday
+        _nth_weekday(year, 5, 0, -1),   # Memorial Day
+        _observed(date(year, 7, 4)),    # Independence Day
+        _nth_weekday(year, 9, 0, 1),    # Labor Day
+        _nth_weekday(year, 11, 3, 4),   # Thanksgiving
+        _observed(date(year, 12, 25)),  # Christmas
+    }
+    # Nowy Rok w sobotę nie jest odbierany w piątek 31 grudnia
+    new_year = date(year, 1, 1)
+    if new_year.weekday() != 5:
+        days.add(_observed(new_year))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))  # Juneteenth
+    return frozenset(days)
+
+
+@lru_cache(maxsize=None)
+def early_closes(year) -> frozenset:
+    """Sesje skrócone do 13:00: 3 lipca, dzień po Święcie Dziękczynienia, Wigilia."""
+    days = {
+        date(year, 7, 3),
+        _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+        date(year, 12, 24),
+    }
+    return frozenset(d for d in days if is_trading_day(d))
+
+
+def is_trading_day(d) -> bool:
+    d = d.date() if isinstance(d, datetime) else d
+    return d.weekday() < 5 and d not in holidays(d.year)
+
+
+def previous_trading_day(d) -> date:
+    """Ostatni dzień sesyjny ściśle przed d."""
+    d = (d.date() if isinstance(d, datetime) else d) - timedelta(days=1)
+    while not is_trading_day(d):
+        d -= timedelta(days=1)
+    return d
+
+
+def session_bounds(d):
+    """Początek i koniec sesji danego dnia (czas giełdy) albo None poza dniami sesyjnymi."""
+    if not is_trading_day(d):
+        return None
+    close = EARLY_CLOSE if d in early_closes(d.year) else MARKET_CLOSE
+    return (
+        datetime.combine(d, MARKET_OPEN, tzinfo=MARKET_TZ),
+        datetime.combine(d, close, tzinfo=MARKET_TZ),
+    )
+
+
+def to_market_time(ts=None) -> datetime:
+    """Czas giełdy dla znacznika (naiwne znaczniki traktowane jako czas lokalny)."""
+    ts = datetime.now() if ts is None else ts
+    return ts.astimezone(MARKET_TZ)
+
+
+def last_session_start(ts=None) -> datetime:
+    """Otwarcie ostatniej rozpoczętej sesji — notowania nie zmieniają się przed kolejnym otwarciem."""
+    now = to_market_time(ts)
+    d = now.date()
+    bounds = session_bounds(d)
+    if bounds is None or now < bounds[0]:
+        bounds = session_bounds(previous_trading_day(d))
+    return bounds[0]
+
+
+def market_is_open(ts=None) -> bool:
+    now = to_market_time(ts)
+    bounds = session_bounds(now.date())
+    return bounds is not None and bounds[0] <= now < bounds[1]
+
+
+def quotes_may_have_changed(last_quote, ts=None) -> bool:
+    """Czy od znacznika last_quote mogły pojawić się nowe notowania (sesja w toku lub zamknięta później)."""
+    if last_quote is None:
+        return True
+    last_quote = to_market_time(last_quote)
+    now = to_market_time(ts)
+    if market_is_open(now):
+        return True
+    # rynek zamknięty: nowe ceny tylko, jeśli ostatnia wycena była przed końcem ostatniej sesji
+    start = last_session_start(now)
+    settled = session_bounds(start.date())[1] + timedelta(minutes=SETTLE_MINUTES)
+    return last_quote < settled
+
+
+def trading_days_between(start, end) -> int:
+    """Liczba dni sesyjnych w przedziale (start, end]."""
+    start = start.date() if isinstance(start, datetime) else start
+    end = end.date() if isinstance(end, datetime) else end
+    if end <= start:
+        return 0
+    # pełne tygodnie liczymy arytmetycznie, święta odejmujemy z listy
+    days = (end - start).days
+    weeks, rest = divmod(days, 7)
+    count = weeks * 5
+    for i in range(1, rest + 1):
+        if (start + timedelta(days=i)).weekday() < 5:
+            count += 1
+    for year in range(start.year, end.year + 1):
+        count -= sum(1 for h in holidays(year) if start < h <= end and h.weekday() < 5)
+    return count
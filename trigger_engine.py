@@ -0,0 +1,123 @@
+# trigger_engine.py
+import os
+import numpy as np
+import pandas as pd
+
+RESULTS_DIR = "results"
+TRIGGER_STATE_FILE = os.path.join(RESULTS_DIR, "trigger_state.csv")
+
+# progi reguł (ułamki); None wyłącza regułę
+DEFAULT_RULES = {
+    "PositionDrop": 0.05,       # cena pozycji vs cena zakupu
+    "TrailingStop": 0.10,       # cena pozycji vs jej najwyższa cena od zakupu
+    "PortfolioDrawdown": 0.10,  # wartość portfela vs jej szczyt
+    "WeightDrift": 0.05,        # |waga bieżąca - waga docelowa|
+}
+STATE_COLUMNS = ["Portfolio", "Ticker", "HighWaterMark"]
+PORTFOLIO_KEY = "__PORTFOLIO__"
+
+
+def load_trigger_state(path: str = TRIGGER_STATE_FILE) -> pd.Series:
+    """Znaczniki szczytów (high-water marks) indeksowane (Portfolio, Ticker)."""
+    if not os.path.exists(path):
+        return pd.Series(dtype=float, index=pd.MultiIndex.from_arrays([[], []], names=["Portfolio", "Ticker"]))
+    df = pd.read_csv(path)
+    return df.set_index(["Portfolio", "Ticker"])["HighWaterMark"].astype(float)
+
+
+def prune_trigger_state(state: pd.Series, holdings: dict) -> pd.Series:
+    """
+    Usuwa szczyty pozycji, których portfel już nie trzyma (holdings: portfel -> tickery).
+    Portfele spoza holdings i szczyty całych portfeli zostają bez zmian.
+    """
+    pf = state.index.get_level_values("Portfolio")
+    tk = state.index.get_level_values("Ticker")
+    held = pd.MultiIndex.from_tuples(
+        [(p, t) for p, tickers in holdings.items() for t in tickers], names=["Portfolio", "Ticker"]
+    )
+    stale = pf.isin(list(holdings)) & (tk != PORTFOLIO_KEY) & ~state.index.isin(held)
+    return state[~stale]
+
+
+def save_trigger_state(state: pd.Series, path: str = TRIGGER_STATE_FILE, holdings: dict = None):
+    """Zapis stanu; z holdings — bez szczytów tickerów, które wyszły z portfeli."""
+    if holdings:
+        state = prune_trigger_state(state, holdings)
+    state.rename("HighWaterMark").reset_index()[STATE_COLUMNS].to_csv(path, index=False)
+
+
+def reset_portfolio_state(state: pd.Series, portfolio) -> pd.Series:
+    """Usuwa szczyty pozycji portfela (np. po rebalansie), zostawia szczyt całego portfela."""
+    pf = state.index.get_level_values("Portfolio")
+    tk = state.index.get_level_values("Ticker")
+    return state[~((pf == portfolio) & (tk != PORTFOLIO_KEY))]
+
+
+def evaluate_triggers(positions: pd.DataFrame, quotes, state: pd.Series = None, rules: dict = None,
+                      seed_peaks: dict = None):
+    """
+    Ocena wszystkich reguł dla wszystkich pozycji wszystkich portfeli w jednym przebiegu.
+    positions: Portfolio, Ticker, Shares, Price (cena zakupu), opcjonalnie Weight (docelowa).
+    Zwraca (flagi per portfel, flagi per pozycja, nowy stan).
+    """
+    rules = {**DEFAULT_RULES, **(rules or {})}
+    if state is None:
+        state = load_trigger_state()
+
+    pf_codes, pf_names = pd.factorize(positions["Portfolio"])
+    tk_codes, tk_names = pd.factorize(positions["Ticker"])
+    n_pf = len(pf_names)
+
+    q = pd.Series(quotes, dtype=float).reindex(tk_names).to_numpy()[tk_codes]
+    shares = positions["Shares"].to_numpy(dtype=float)
+    cost = positions["Price"].to_numpy(dtype=float)
+    priced = np.isfinite(q) & (q > 0)
+    px = np.where(priced, q, cost)
+
+    # szczyty pozycji
+    keys = pd.MultiIndex.from_arrays([positions["Portfolio"], positions["Ticker"]])
+    pos_hwm = np.fmax(state.reindex(keys).to_numpy(), np.where(priced, q, np.nan))
+
+    # wartości i szczyty portfeli (bincount = suma po portfelach)
+    values = shares * px
+    pf_value = np.bincount(pf_codes, weights=values, minlength=n_pf)
+    pf_complete = np.bincount(pf_codes, weights=~priced, minlength=n_pf) == 0
+    pf_keys = pd.MultiIndex.from_arrays([pf_names, [PORTFOLIO_KEY] * n_pf])
+    old_pf_hwm = state.reindex(pf_keys).to_numpy()
+    if seed_peaks:
+        old_pf_hwm = np.fmax(old_pf_hwm, pd.Series(seed_peaks, dtype=float).reindex(pf_names).to_numpy())
+    pf_hwm = np.where(pf_complete, np.fmax(old_pf_hwm, pf_value), old_pf_hwm)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        flags = {}
+        if rules["PositionDrop"] is not None:
+            flags["PositionDrop"] = priced & (q / cost - 1 < -rules["PositionDrop"])
+        if rules["TrailingStop"] is not None:
+            flags["TrailingStop"] = priced & (q / pos_hwm - 1 < -rules["TrailingStop"])
+        if rules["WeightDrift"] is not None and "Weight" in positions.columns:
+            current_w = values / pf_value[pf_codes]
+            target_w = positions["Weight"].to_numpy(dtype=float)
+            flags["WeightDrift"] = pf_complete[pf_codes] & (np.abs(current_w - target_w) > rules["WeightDrift"])
+        drawdown = np.where(pf_hwm > 0, pf_value / pf_hwm - 1, 0.0)
+
+    pos_flags = pd.DataFrame({"Portfolio": positions["Portfolio"].to_numpy(), "Ticker": positions["Ticker"].to_numpy()})
+    pf_flags = pd.DataFrame({"Portfolio": pf_names, "Value($)": pf_value, "Drawdown(%)": drawdown * 100})
+    for rule, hit in flags.items():
+        pos_flags[rule] = hit
+        pf_flags[rule] = np.bincount(pf_codes, weights=hit, minlength=n_pf) > 0
+    if rules["PortfolioDrawdown"] is not None:
+        pf_flags["PortfolioDrawdown"] = pf_complete & (drawdown < -rules["PortfolioDrawdown"])
+
+    rule_cols = [c for c in pf_flags.columns if c in DEFAULT_RULES]
+    pf_flags["Triggered"] = pf_flags[rule_cols].any(axis=1)
+
+    # nowy stan: szczyty pozycji i portfeli (poprzednie wpisy innych kluczy zostają)
+    new_state = pd.concat([
+        pd.Series(pos_hwm, index=keys),
+        pd.Series(pf_hwm, index=pf_keys),
+    ]).dropna()
+    new_state = new_state[~new_state.index.duplicated(keep="first")]
+    state = pd.concat([new_state, state[~state.index.isin(new_state.index)]])
+    state.index.names = ["Portfolio", "Ticker"]
+
+    return pf_flags, pos_flags, state
@@ -1,9 +1,14 @@
 import os
 import time
-import yfinance as yf
 import pandas as pd
 from datetime import datetime
 
+import monitoring
+from market_data import get_latest_prices
+from portfolio_risk import update_risk_metrics
+from positions_table import POSITIONS_FILE, POSITIONS_HISTORY_FILE, load_positions, portfolio_files
+from prediction_accuracy import update_accuracy
+
 PORTFOLIO_DIR = "results/portfolios"
 RESULTS_DIR = "results"
 HISTORY_FILE = os.path.join(RESULTS_DIR, "portfolio_history.csv")
@@ -12,81 +17,69 @@ def log(msg):
     ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{ts}] {msg}")
 
-def get_portfolio_value(path):
-    if not os.path.exists(path):
-        log(f"⚠️ Brak pliku: {path}")
-        return None, None, None
-
-    df = pd.read_csv(path)
-    if df.empty or "Ticker" not in df.columns or "Shares" not in df.columns:
-        log(f"Plik {path} nie zawiera poprawnych danych.")
-        return None, None, None
-
-    tickers = df["Ticker"].tolist()
-    shares = df["Shares"].tolist()
-    prices_now = None
-
+def update_history():
+    start = time.perf_counter()
     try:
-        data = yf.download(tickers, period="1d", progress=False, auto_adjust=True)
-        if isinstance(data.columns, pd.MultiIndex):
-            prices_now = data["Close"].iloc[-1]
-        else:
-            prices_now = data.iloc[-1]
-    except Exception as e:
-        log(f"Błąd pobierania cen: {e}")
-        return None, None, None
-
-    if prices_now is None or len(prices_now) == 0:
-        log(f"Brak danych cenowych dla {path}")
-        return None, None, None
-
-    current_value = sum(prices_now.get(t, 0) * s for t, s in zip(tickers, shares))
-    starting_value = df["CurrentValue($)"].sum() if "CurrentValue($)" in df.columns else None
-
-    return current_value, starting_value, prices_now.to_dict()
+        _update_history()
+    finally:
+        monitoring.observe("run_seconds", time.perf_counter() - start, process="history")
+        monitoring.set_gauge("last_run_timestamp_seconds", time.time(), process="history")
+        monitoring.write_textfile("history")
 
 
-def update_history():
+def _update_history():
     os.makedirs(RESULTS_DIR, exist_ok=True)
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    if not os.path.exists(PORTFOLIO_DIR):
+    if not os.path.exists(PORTFOLIO_DIR) and not os.path.exists(POSITIONS_FILE):
         log(f"Brak katalogu {PORTFOLIO_DIR}")
         return
 
-    files = [f for f in os.listdir(PORTFOLIO_DIR) if f.endswith(".csv")]
-    if not files:
+    # wszystkie portfele (pliki strategii i tabela pozycji) w jednej tabeli zakodowanej słownikowo
+    table = load_positions()
+    if not table.n_portfolios:
         log("Brak portfeli do analizy.")
         return
 
-    rows = []
-    for fname in files:
-        path = os.path.join(PORTFOLIO_DIR, fname)
-        current_value, starting_value, prices_dict = get_portfolio_value(path)
-
-        if current_value is None:
-            continue
-
-        growth_abs = (current_value - starting_value) if starting_value else 0
-        growth_pct = (growth_abs / starting_value * 100) if starting_value else 0
-
-        parts = fname.replace(".csv", "").split("_")
-        strategy = parts[0] if len(parts) > 0 else "Unknown"
-        tactic = parts[1] if len(parts) > 1 else "None"
+    try:
+        prices = get_latest_prices(list(table.tickers))
+    except Exception as e:
+        monitoring.inc("errors_total", process="history", stage="prices")
+        log(f"Błąd pobierania cen: {e}")
+        return
+    if prices is None or len(prices) == 0:
+        log("Brak danych cenowych.")
+        return
 
+    monitoring.set_gauge("portfolios", table.n_portfolios, process="history")
+    with monitoring.timer("valuation_seconds", process="history"):
+        values = table.valuation(prices, timestamp)
+
+    # niepełne notowania zaniżyłyby wartość (fałszywa strata w historii, obsunięciach i szczytach)
+    incomplete = values["MissingQuotes"] > 0
+    if incomplete.any():
+        log(f"⚠️ Pominięto {int(incomplete.sum())} portfeli bez kompletu notowań.")
+        values = values[~incomplete]
+
+    names = values["Portfolio"].str.replace(".csv", "", regex=False).str.split("_")
+    new_df = pd.DataFrame({
+        "Timestamp": timestamp,
+        "Portfolio": values["Portfolio"],
+        "Strategy": names.str[0].fillna("Unknown"),
+        "Tactic": names.str[1].fillna("None"),
+        "Value($)": values["Value($)"],
+        "StartValue($)": values["CostBasis($)"],
+        "Change($)": values["Change($)"],
+        "Change(%)": values["Change(%)"],
+    })
+
+    # portfele strategii: log, osobny plik historii i historia zbiorcza; pozostałe w POSITIONS_HISTORY_FILE
+    files = set(portfolio_files())
+    own = new_df[new_df["Portfolio"].isin(files)]
+    for fname, strategy, tactic, current_value, growth_pct in zip(
+            own["Portfolio"], own["Strategy"], own["Tactic"], own["Value($)"], own["Change(%)"]):
         log(f"📊 {fname}: ${current_value:,.2f} ({growth_pct:+.2f}%)")
 
-        rows.append({
-            "Timestamp": timestamp,
-            "Portfolio": fname,
-            "Strategy": strategy,
-            "Tactic": tactic,
-            "Value($)": current_value,
-            "StartValue($)": starting_value,
-            "Change($)": growth_abs,
-            "Change(%)": growth_pct,
-        })
-
         details_path = os.path.join(RESULTS_DIR, f"history_{strategy}_{tactic}.csv")
         detail_row = {
             "Timestamp": timestamp,
@@ -100,22 +93,39 @@ def update_history():
         else:
             df_all = detail_df
         df_all.to_csv(details_path, index=False)
+    others = new_df[~new_df["Portfolio"].isin(files)]
+    if not others.empty:
+        # portfele z tabeli pozycji w osobnym pliku — historia zbiorcza zostaje dla portfeli strategii
+        others.to_csv(POSITIONS_HISTORY_FILE, mode="a", header=not os.path.exists(POSITIONS_HISTORY_FILE), index=False)
+        log(f"📊 Tabela pozycji: {len(others)} portfeli, łącznie ${others['Value($)'].sum():,.2f} "
+            f"({POSITIONS_HISTORY_FILE})")
+
+    # historia zbiorcza i metryki ryzyka (czytane przez app.py i API) tylko dla portfeli strategii
+    new_df = own
+    if not new_df.empty:
+        # dopisanie na końcu pliku — bez ponownego wczytywania całej historii
+        new_df.to_csv(HISTORY_FILE, mode="a", header=not os.path.exists(HISTORY_FILE), index=False)
+        log(f"Zaktualizowano historię zbiorczą: {HISTORY_FILE}")
 
-        time.sleep(0.3)
+        try:
+            update_risk_metrics(new_df)
+            log("Zaktualizowano metryki ryzyka portfeli.")
+        except Exception as e:
+            monitoring.inc("errors_total", process="history", stage="risk")
+            log(f"Błąd aktualizacji metryk ryzyka: {e}")
 
-    if rows:
-        new_df = pd.DataFrame(rows)
-        if os.path.exists(HISTORY_FILE):
-            old_df = pd.read_csv(HISTORY_FILE)
-            df_all = pd.concat([old_df, new_df], ignore_index=True)
-        else:
-            df_all = new_df
-        df_all.to_csv(HISTORY_FILE, index=False)
-        log(f"Zaktualizowano historię zbiorczą: {HISTORY_FILE}")
+    try:
+        update_accuracy()
+        log("Zaktualizowano trafność prognoz.")
+    except Exception as e:
+        monitoring.inc("errors_total", process="history", stage="accuracy")
+        log(f"Błąd aktualizacji trafności prognoz: {e}")
 
     log("Zakończono aktualizację historii portfeli.")
 
 
 if __name__ == "__main__":
+    if os.getenv("METRICS_PORT"):
+        monitoring.start_server()
     log("Start aktualizacji wyników portfeli")
     update_history()